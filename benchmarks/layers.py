@@ -0,0 +1,182 @@
+"""Per-layer benchmarks of the building insights pipeline.
+
+Each layer is timed on its own so that a regression can be pinned down:
+
+* `construct_model`: `SchemaBuilder.construct_model`, i.e. building the
+  properties models and wrapping them in `SchemaModel`.
+* `dumps_model`: the serialization done by `core.main` and the routes,
+  with the configured `Serializer`.
+* `http`: the full FastAPI path through `TestClient`.
+
+Each layer runs on a small synthetic building, the fixture building and
+a synthetic 5,000-panel building. Results are written as JSON and can be
+checked against a stored baseline::
+
+    python -m benchmarks.layers -o results.json
+    python -m benchmarks.layers --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core import corpus_schema, dataset, randomizer, schema
+from solar_api_mock.core.dataset import Corpus, CorpusHolder, CorpusWriter, Grid
+from solar_api_mock.core.serialization import dumps_model, get_serializer
+from solar_api_mock.core.settings import get_settings
+from solar_api_mock.web.app import app
+
+BBOX = (37.40, -122.20, 37.50, -122.05)
+SIZES = {"small": 10, "fixture": None, "synthetic-5000": 5_000}
+LAYERS = ("construct_model", "dumps_model", "http")
+
+
+def synthetic_corpus(path: Path, panels_count: int) -> Corpus:
+    """A one-building corpus whose building holds exactly `panels_count`
+    panels."""
+    chunk = randomizer.generate_buildings(0, 1, *BBOX, panels_count=panels_count)
+    with CorpusWriter(path, Grid(*BBOX, 1, 1)) as writer:
+        writer.append(chunk)
+    return Corpus(path)
+
+
+def measure(fn, min_time: float = 0.5, min_rounds: int = 5) -> dict:
+    """Call `fn` for at least `min_time` seconds and `min_rounds` rounds."""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_rounds or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def summarize(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "rounds": len(timings),
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "p95": timings[int(0.95 * (len(timings) - 1))],
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def cases(workdir: Path):
+    """Yield `(size, layer, fn)` for every benchmark case."""
+    client = TestClient(app)
+    for size, panels_count in SIZES.items():
+        if panels_count is None:
+            if get_settings().dataset_path is not None:
+                raise RuntimeError("Unset SOLAR_API_MOCK_DATASET_PATH to benchmark")
+            dataset.corpus_holder = CorpusHolder()
+            builder = schema.BuildingInsightsBuilder()
+            params = {}
+        else:
+            corpus = synthetic_corpus(workdir / f"{size}.corpus", panels_count)
+            dataset.corpus_holder = CorpusHolder(corpus)
+            builder = corpus_schema.CorpusBuildingInsightsBuilder(corpus, 0)
+            params = {
+                "lat_lon.latitude": float(corpus.latitude[0]),
+                "lat_lon.longitude": float(corpus.longitude[0]),
+                "required_quality": "BASE",
+            }
+        model = builder.construct_model()
+
+        yield size, "construct_model", builder.construct_model
+        yield (
+            size,
+            "dumps_model",
+            lambda model=model: dumps_model(model.properties, get_serializer(), None),
+        )
+
+        def http(params=params):
+            response = client.get("/buildingInsights:findClosest", params=params)
+            response.raise_for_status()
+
+        yield size, "http", http
+
+
+def run(min_time: float = 0.5, only: str = None) -> dict:
+    holder = dataset.corpus_holder
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size, layer, fn in cases(Path(workdir)):
+                name = f"{layer}/{size}"
+                if only and only not in name:
+                    continue
+                fn()
+                results[name] = measure(fn, min_time)
+                print(
+                    f"{name:40} median {results[name]['median'] * 1e3:9.3f} ms",
+                    file=sys.stderr,
+                )
+    finally:
+        dataset.corpus_holder = holder
+    return {"meta": metadata(), "results": results}
+
+
+def metadata() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of the cases whose median is more than `threshold` (a
+    fraction) slower than in `baseline`."""
+    regressions = []
+    for name, stats in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = stats["median"] / reference["median"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {ratio:.2f}x the baseline median")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.layers")
+    parser.add_argument("-o", "--output", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Results file to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown of the median, as a fraction (default: 0.2).",
+    )
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--only", help="Only run cases whose name contains this.")
+    args = parser.parse_args(argv)
+
+    results = run(args.min_time, args.only)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Cold start benchmarks.
+
+Each case runs in a fresh interpreter, timing one step of the startup of
+a fixture-only app:
+
+* `import/properties-one-model`: importing a single properties model.
+* `import/app`: importing `solar_api_mock.web.app`.
+* `openapi/cold` and `openapi/cached`: the first `app.openapi()` of a
+  process, with an empty and a filled OpenAPI cache.
+* `first-request`: the first `findClosest` call of a process.
+
+Results use the format of `benchmarks.layers` and can be checked against
+a stored baseline the same way::
+
+    python -m benchmarks.startup -o startup.json
+    python -m benchmarks.startup --baseline startup.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.layers import compare, metadata, summarize
+
+APP = "from solar_api_mock.web.app import app"
+CLIENT = (
+    "from fastapi.testclient import TestClient\n" + APP + "\nclient = TestClient(app)"
+)
+CASES = {
+    "import/properties-one-model": (
+        "",
+        "from solar_api_mock.core.properties import LatLngProperties",
+    ),
+    "import/app": ("", "import solar_api_mock.web.app"),
+    "openapi/cold": (APP, "app.openapi()"),
+    "openapi/cached": (APP, "app.openapi()"),
+    "first-request": (
+        CLIENT,
+        "client.get('/buildingInsights:findClosest').raise_for_status()",
+    ),
+}
+SCRIPT = """\
+import time
+{setup}
+start = time.perf_counter()
+{step}
+print(time.perf_counter() - start)
+"""
+
+
+def time_fresh(setup: str, step: str, env: dict = None) -> float:
+    """Seconds taken by `step` in a new interpreter, once `setup` ran."""
+    script = SCRIPT.format(setup=setup, step=step)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.split()[-1])
+
+
+def run(rounds: int = 5, only: str = None) -> dict:
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith("SOLAR_API_MOCK_")
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cached = Path(workdir) / "cached"
+        for name, (setup, step) in CASES.items():
+            if only and only not in name:
+                continue
+            timings = []
+            for i in range(rounds):
+                cache = cached if name != "openapi/cold" else Path(workdir) / str(i)
+                env["SOLAR_API_MOCK_OPENAPI_CACHE_DIR"] = str(cache)
+                if name == "openapi/cached" and i == 0:
+                    time_fresh(setup, step, env)
+                timings.append(time_fresh(setup, step, env))
+            results[name] = summarize(timings)
+            print(
+                f"{name:40} median {results[name]['median'] * 1e3:9.3f} ms",
+                file=sys.stderr,
+            )
+    return {"meta": metadata(), "results": results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("-o", "--output", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Results file to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown of the median, as a fraction (default: 0.2).",
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--only", help="Only run cases whose name contains this.")
+    args = parser.parse_args(argv)
+
+    results = run(args.rounds, args.only)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
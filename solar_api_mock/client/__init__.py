@@ -0,0 +1,6 @@
+"""Async client of the Solar API, see `session.SolarClient`."""
+
+from solar_api_mock.client.decoding import LazyView, decode
+from solar_api_mock.client.session import GOOGLE_API_URL, SolarClient
+
+__all__ = ["GOOGLE_API_URL", "LazyView", "SolarClient", "decode"]
@@ -0,0 +1,70 @@
+"""Decoding of API responses into the properties models.
+
+`decode` validates, like the server would. Validation runs in
+pydantic-core and costs far more than parsing the JSON, so bulk jobs that
+read a few fields of many responses decode lazily instead: a `LazyView`
+reads attributes of the models straight from the parsed JSON, wrapping
+only the sub-trees it is asked for, and is validated only on demand."""
+
+from functools import lru_cache
+from typing import Generic, Type, TypeVar, get_args, get_origin
+
+from pydantic import BaseModel
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+@lru_cache
+def _nested(model: Type[BaseModel]) -> dict[str, tuple[Type[BaseModel], bool]]:
+    """The fields of `model` holding models: their model, and whether they
+    hold a list of them."""
+    nested = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        repeated = get_origin(annotation) is list
+        for candidate in get_args(annotation) or (annotation,):
+            if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+                nested[name] = (candidate, repeated)
+    return nested
+
+
+class LazyView(Generic[Model]):
+    """The attributes of a `model` read from its unvalidated JSON `data`.
+
+    Fields missing from `data`, e.g. masked out, read as their default, or
+    None for required fields."""
+
+    __slots__ = ("model", "data")
+
+    def __init__(self, model: Type[Model], data: dict):
+        self.model = model
+        self.data = data
+
+    def __getattr__(self, name: str):
+        field = self.model.model_fields.get(name)
+        if field is None:
+            raise AttributeError(f"{self.model.__name__} has no field {name!r}")
+        value = self.data.get(name)
+        if value is None:
+            return None if field.is_required() else field.get_default()
+        nested = _nested(self.model).get(name)
+        if nested is None:
+            return value
+        submodel, repeated = nested
+        if repeated:
+            return [LazyView(submodel, item) for item in value]
+        return LazyView(submodel, value)
+
+    def __repr__(self) -> str:
+        return f"LazyView({self.model.__name__})"
+
+    def model_validate(self) -> Model:
+        """The validated model."""
+        return self.model.model_validate(self.data)
+
+
+def decode(model: Type[Model], data: dict, lazy: bool = False) -> Model | LazyView:
+    """`data` as a `model`, or a `LazyView` of one when `lazy`."""
+    if lazy:
+        return LazyView(model, data)
+    return model.model_validate(data)
@@ -0,0 +1,247 @@
+"""Async client of the Solar API, for the mock and for the Google API.
+
+One `SolarClient` keeps a pool of keep-alive connections. Calls rejected
+with `RESOURCE_EXHAUSTED` or `UNAVAILABLE` are retried after an
+exponential backoff with full jitter, honoring `Retry-After`; other errors
+raise the `SolarApiError` of their status. `gather` runs a call over many
+inputs with at most a given number of them in flight."""
+
+import asyncio
+import random
+from typing import Awaitable, Callable, Iterable, Literal, Type, TypeVar
+
+import httpx
+
+from solar_api_mock.client.decoding import LazyView, Model, decode
+from solar_api_mock.core import properties
+from solar_api_mock.core.errors import ERRORS, SolarApiError
+
+GOOGLE_API_URL = "https://solar.googleapis.com/v1"
+RETRIED_STATUSES = (429, 503)
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+ImageryQuality = Literal["IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"]
+DataLayerView = Literal[
+    "DATA_LAYER_VIEW_UNSPECIFIED",
+    "DSM_LAYER",
+    "IMAGERY_LAYERS",
+    "IMAGERY_AND_ANNUAL_FLUX_LAYERS",
+    "IMAGERY_AND_ALL_FLUX_LAYERS",
+    "FULL_LAYERS",
+]
+
+
+def _lat_lng_params(name: str, lat_lng: properties.LatLngProperties) -> dict:
+    return {
+        f"{name}.latitude": lat_lng.latitude,
+        f"{name}.longitude": lat_lng.longitude,
+    }
+
+
+def _error(response: httpx.Response) -> SolarApiError:
+    """The error of the Google API envelope of `response`."""
+    try:
+        error = response.json()["error"]
+        status, message = error["status"], error.get("message")
+    except (ValueError, KeyError, TypeError):
+        status, message = None, response.text or None
+    cls = ERRORS.get(status, SolarApiError)
+    exc = cls(message)
+    if cls is SolarApiError:
+        exc.code = response.status_code
+    return exc
+
+
+class SolarClient:
+    """Client of the Solar API at `base_url`, the mock by default.
+
+    `max_connections` bounds the connection pool, and by default the calls
+    in flight in `gather`. Calls are tried up to `retries + 1` times; the
+    backoff before retry `n` is drawn uniformly up to
+    `min(backoff * 2**n, max_backoff)` seconds, or is the `Retry-After` of
+    the response, also capped at `max_backoff`. With `lazy`, responses are
+    `decoding.LazyView`s rather than validated models; so are masked ones,
+    which lack required fields. `transport` is passed to httpx, e.g. an
+    `httpx.ASGITransport` of the app in tests."""
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        api_key: str = None,
+        max_connections: int = 32,
+        timeout: float = 30.0,
+        retries: int = 4,
+        backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        lazy: bool = False,
+        transport: httpx.AsyncBaseTransport = None,
+        seed: int = None,
+    ):
+        headers = {"X-Goog-Api-Key": api_key} if api_key else {}
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lazy = lazy
+        self._rng = random.Random(seed)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _delay(self, attempt: int, response: httpx.Response) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                # Capped like the backoff: a server hint of hours would
+                # otherwise stall the call.
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        return self._rng.uniform(0, min(self.backoff * 2**attempt, self.max_backoff))
+
+    async def _get(
+        self, path: str, params: dict, model: Type[Model], fields: str, lazy: bool
+    ) -> Model | LazyView:
+        params = {k: v for k, v in params.items() if v is not None}
+        if fields is not None:
+            params["fields"] = fields
+        for attempt in range(self.retries + 1):
+            response = await self._http.get(path, params=params)
+            if response.status_code not in RETRIED_STATUSES or attempt == self.retries:
+                break
+            await asyncio.sleep(self._delay(attempt, response))
+        if response.is_error:
+            raise _error(response)
+        lazy = self.lazy if lazy is None else lazy
+        return decode(model, response.json(), lazy or fields is not None)
+
+    async def find_closest_building_insights(
+        self,
+        location: properties.LatLngProperties,
+        required_quality: ImageryQuality = None,
+        fields: str = None,
+        lazy: bool = None,
+    ) -> properties.BuildingInsightsProperties | LazyView:
+        """The building closest to `location`."""
+        return await self._get(
+            "/buildingInsights:findClosest",
+            _lat_lng_params("location", location)
+            | {"required_quality": required_quality},
+            properties.BuildingInsightsProperties,
+            fields,
+            lazy,
+        )
+
+    async def get_building(
+        self, place_id: str, fields: str = None, lazy: bool = None
+    ) -> properties.BuildingInsightsProperties | LazyView:
+        """The building of resource name `buildings/{place_id}`; a mock
+        extension."""
+        return await self._get(
+            f"/buildings/{place_id}",
+            {},
+            properties.BuildingInsightsProperties,
+            fields,
+            lazy,
+        )
+
+    async def get_data_layers(
+        self,
+        location: properties.LatLngProperties,
+        radius_meters: float = 50,
+        view: DataLayerView = None,
+        required_quality: ImageryQuality = None,
+        pixel_size_meters: float = None,
+        exact_quality_required: bool = None,
+        fields: str = None,
+        lazy: bool = None,
+    ) -> properties.DataLayersProperties | LazyView:
+        """The data layers of the region of `radius_meters` around
+        `location`."""
+        return await self._get(
+            "/dataLayers:get",
+            _lat_lng_params("location", location)
+            | {
+                "radius_meters": radius_meters,
+                "view": view,
+                "required_quality": required_quality,
+                "pixel_size_meters": pixel_size_meters,
+                "exact_quality_required": exact_quality_required,
+            },
+            properties.DataLayersProperties,
+            fields,
+            lazy,
+        )
+
+    async def summarize_region(
+        self, box: properties.LatLngBoxProperties, fields: str = None, lazy: bool = None
+    ) -> properties.RegionSummaryProperties | LazyView:
+        """The aggregate solar potential of the buildings in `box`; a mock
+        extension."""
+        return await self._get(
+            "/regions:summarize",
+            _lat_lng_params("bounding_box.sw", box.sw)
+            | _lat_lng_params("bounding_box.ne", box.ne),
+            properties.RegionSummaryProperties,
+            fields,
+            lazy,
+        )
+
+    async def gather(
+        self,
+        call: Callable[[Item], Awaitable[Result]],
+        items: Iterable[Item],
+        concurrency: int = None,
+        return_exceptions: bool = False,
+    ) -> list[Result]:
+        """`call` of each of `items`, in order, with at most `concurrency`
+        calls in flight, by default `max_connections`. With
+        `return_exceptions`, a failed call gives its exception rather than
+        cancelling the others; e.g.::
+
+            buildings = await client.gather(
+                client.find_closest_building_insights, locations
+            )
+        """
+        items = list(items)
+        results = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def worker():
+            for i, item in pending:
+                try:
+                    results[i] = await call(item)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[i] = e
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(concurrency or self.max_connections, len(items)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            raise
+        return results
@@ -0,0 +1,409 @@
+"""Builders of the schema models of the buildings of a corpus.
+
+Imported by `core.schema` only when a corpus may be served, so that the
+dataset machinery and NumPy stay out of fixture-only processes."""
+
+import base64
+from time import perf_counter
+from typing import Type
+
+import numpy as np
+
+from solar_api_mock.core import metrics, properties, randomizer, region_tables
+from solar_api_mock.core.dataset import (
+    ORIENTATIONS,
+    QUALITIES,
+    Corpus,
+    get_corpus,
+    qualifying_qualities,
+)
+from solar_api_mock.core.errors import NotFoundError
+from solar_api_mock.core.field_mask import selects
+from solar_api_mock.core.schema import (
+    BuildingInsightsBuilder,
+    DataLayersBuilder,
+    RegionSummaryBuilder,
+    box_bounds,
+)
+from solar_api_mock.core.settings import get_settings
+
+DATA_LAYER_VIEWS = {
+    "DSM_LAYER": ("dsm",),
+    "IMAGERY_LAYERS": ("dsm", "rgb", "mask"),
+    "IMAGERY_AND_ANNUAL_FLUX_LAYERS": ("dsm", "rgb", "mask", "annualFlux"),
+    "IMAGERY_AND_ALL_FLUX_LAYERS": (
+        "dsm",
+        "rgb",
+        "mask",
+        "annualFlux",
+        "monthlyFlux",
+        "hourlyShade",
+    ),
+    "FULL_LAYERS": (
+        "dsm",
+        "rgb",
+        "mask",
+        "annualFlux",
+        "monthlyFlux",
+        "hourlyShade",
+    ),
+}
+GEOTIFF_LAYERS = {
+    "dsm": "DSM",
+    "rgb": "RGB",
+    "mask": "MASK",
+    "annualFlux": "ANNUAL_FLUX",
+    "monthlyFlux": "MONTHLY_FLUX",
+}
+MONTHLY_BILLS = range(20, 310, 10)
+DEFAULT_MONTHLY_BILL = 150
+ELECTRICITY_PRICE_PER_KWH = 0.3
+DC_TO_AC_DERATE = 0.85
+
+
+def _floats(values, decimals: int = 4) -> list[float]:
+    """Round float32 storage back to the short decimals the API returns."""
+    return np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+
+
+def _date(value) -> properties.DateProperties:
+    value = int(value)
+    return properties.DateProperties(
+        year=value // 10_000, month=value // 100 % 100, day=value % 100
+    )
+
+
+def _lat_lng(latitude, longitude) -> properties.LatLngProperties:
+    return properties.LatLngProperties(
+        latitude=float(latitude), longitude=float(longitude)
+    )
+
+
+class CorpusBuildingInsightsBuilder(BuildingInsightsBuilder):
+    """Builds the insights of one building of a memory-mapped corpus."""
+
+    def __init__(self, corpus: Corpus, row: int, schema_name="BuildingInsights"):
+        super().__init__(schema_name)
+        self.corpus = corpus
+        self.row = row
+
+    def _roof_segment_stats(self, bounding_box, center, quantiles):
+        c, row = self.corpus, self.row
+        segments = int(c["segment_count"][row])
+        pitch = _floats(c["segment_pitch_degrees"][row][:segments])
+        azimuth = _floats(c["segment_azimuth_degrees"][row][:segments])
+        area = _floats(c["segment_area_meters2"][row][:segments])
+        ground = _floats(c["segment_ground_area_meters2"][row][:segments], 2)
+        plane_height = _floats(c["plane_height_meters"][row])
+        return [
+            properties.RoofSegmentSizeAndSunshineStatsProperties(
+                pitchDegrees=pitch[i],
+                azimuthDegrees=azimuth[i],
+                stats=properties.SizeAndSunshineStatsProperties(
+                    areaMeters2=area[i],
+                    sunshineQuantiles=quantiles,
+                    groundAreaMeters2=ground[i],
+                ),
+                center=center,
+                boundingBox=bounding_box,
+                planeHeightAtCenterMeters=plane_height,
+            )
+            for i in range(segments)
+        ]
+
+    def _solar_panels(self, panels: np.ndarray):
+        latitude = panels["latitude"].tolist()
+        longitude = panels["longitude"].tolist()
+        energy = _floats(panels["yearly_energy_dc_kwh"])
+        segment = panels["segment_index"].tolist()
+        orientation = panels["orientation"].tolist()
+        return [
+            properties.SolarPanelProperties(
+                center=properties.LatLngProperties(
+                    latitude=latitude[i], longitude=longitude[i]
+                ),
+                orientation=ORIENTATIONS[orientation[i]],
+                segmentIndex=segment[i],
+                yearlyEnergyDcKwh=energy[i],
+            )
+            for i in range(len(panels))
+        ]
+
+    def _panel_configs(self, panels: np.ndarray, pitch, azimuth):
+        """One layout per panel count from 4 up to the maximum array, each
+        made of the first N panels, like the real API."""
+        if len(panels) < 4:
+            return []
+        segments = len(pitch)
+        energy = panels["yearly_energy_dc_kwh"].astype(np.float64)
+        on_segment = panels["segment_index"][:, None] == np.arange(segments)
+        segment_counts = np.cumsum(on_segment, axis=0)[3:]
+        segment_energy = np.cumsum(on_segment * energy[:, None], axis=0)[3:]
+        totals = _floats(np.cumsum(energy)[3:])
+        segment_energy = _floats(segment_energy)
+        segment_counts = segment_counts.tolist()
+
+        configs = []
+        for n, total in enumerate(totals, start=4):
+            counts, energies = segment_counts[n - 4], segment_energy[n - 4]
+            configs.append(
+                properties.SolarPanelConfigProperties(
+                    panelsCount=n,
+                    yearlyEnergyDcKwh=total,
+                    roofSegmentSummaries=[
+                        properties.RoofSegmentSummaryProperties(
+                            pitchDegrees=pitch[i],
+                            azimuthDegrees=azimuth[i],
+                            panelsCount=counts[i],
+                            yearlyEnergyDcKwh=energies[i],
+                            segmentIndex=i,
+                        )
+                        for i in range(segments)
+                        if counts[i]
+                    ],
+                )
+            )
+        return configs
+
+    def _financial_analyses(self, configs):
+        yearly_ac = [config.yearlyEnergyDcKwh * DC_TO_AC_DERATE for config in configs]
+        analyses = []
+        for bill in MONTHLY_BILLS:
+            average_kwh = bill / ELECTRICITY_PRICE_PER_KWH
+            index = next(
+                (i for i, kwh in enumerate(yearly_ac) if kwh / 12 >= average_kwh),
+                len(configs) - 1,
+            )
+            analyses.append(
+                properties.FinancialAnalysisProperties(
+                    monthlyBill=properties.MoneyProperties(
+                        currencyCode="USD", units=str(bill)
+                    ),
+                    averageKwhPerMonth=round(average_kwh, 4),
+                    panelConfigIndex=index,
+                    **({"defaultBill": True} if bill == DEFAULT_MONTHLY_BILL else {}),
+                )
+            )
+        return analyses
+
+    def _set_properties(
+        self, model: Type[properties.BuildingInsightsProperties]
+    ) -> properties.BuildingInsightsProperties:
+        c, row = self.corpus, self.row
+        center = _lat_lng(c["latitude"][row], c["longitude"][row])
+        bounding_box = properties.LatLngBoxProperties(
+            sw=_lat_lng(c["sw_latitude"][row], c["sw_longitude"][row]),
+            ne=_lat_lng(c["ne_latitude"][row], c["ne_longitude"][row]),
+        )
+        quantiles = _floats(c["sunshine_quantiles"][row])
+        whole_roof_stats = properties.SizeAndSunshineStatsProperties(
+            areaMeters2=_floats(c["area_meters2"][row]),
+            sunshineQuantiles=quantiles,
+            groundAreaMeters2=_floats(c["ground_area_meters2"][row], 2),
+        )
+
+        # The panel lists make up most of a building: only those selected
+        # by the field mask are built.
+        wanted = {
+            name: selects(self.fields, f"solarPotential.{name}")
+            for name in (
+                "solarPanels",
+                "roofSegmentStats",
+                "solarPanelConfigs",
+                "financialAnalyses",
+            )
+        }
+        solar_panels, roof_segment_stats, configs = [], [], []
+        if wanted["solarPanels"]:
+            solar_panels = self._solar_panels(c.panels_of(row))
+        if wanted["roofSegmentStats"]:
+            roof_segment_stats = self._roof_segment_stats(
+                bounding_box, center, quantiles
+            )
+        if wanted["solarPanelConfigs"] or wanted["financialAnalyses"]:
+            segments = int(c["segment_count"][row])
+            pitch = _floats(c["segment_pitch_degrees"][row][:segments])
+            azimuth = _floats(c["segment_azimuth_degrees"][row][:segments])
+            configs = self._panel_configs(c.panels_of(row), pitch, azimuth)
+        analyses = (
+            self._financial_analyses(configs) if wanted["financialAnalyses"] else []
+        )
+
+        return model(
+            name=f"buildings/{c['place_id'][row].decode()}",
+            center=center,
+            imageryDate=_date(c["imagery_date"][row]),
+            postalCode=c["postal_code"][row].decode(),
+            administrativeArea=c.metadata.get("administrative_area", "CA"),
+            statisticalArea=c["statistical_area"][row].decode(),
+            regionCode=c.metadata.get("region_code", "US"),
+            solarPotential=properties.SolarPotentialProperties(
+                buildingStats=whole_roof_stats,
+                maxArrayPanelsCount=int(c["max_array_panels_count"][row]),
+                maxArrayAreaMeters2=_floats(c["max_array_area_meters2"][row]),
+                maxSunshineHoursPerYear=_floats(c["max_sunshine_hours_per_year"][row]),
+                carbonOffsetFactorKgPerMwh=_floats(
+                    c["carbon_offset_factor_kg_per_mwh"][row]
+                ),
+                solarPanels=solar_panels,
+                wholeRoofStats=whole_roof_stats,
+                roofSegmentStats=roof_segment_stats,
+                solarPanelConfigs=configs if wanted["solarPanelConfigs"] else [],
+                financialAnalyses=analyses,
+                panelCapacityWatts=randomizer.PANEL_CAPACITY_WATTS,
+                panelHeightMeters=randomizer.PANEL_HEIGHT_METERS,
+                panelWidthMeters=randomizer.PANEL_WIDTH_METERS,
+                panelLifetimeYears=randomizer.PANEL_LIFETIME_YEARS,
+            ),
+            boundingBox=bounding_box,
+            imageryQuality=QUALITIES[c["imagery_quality"][row]],
+            imageryProcessedDate=_date(c["imagery_processed_date"][row]),
+        )
+
+
+def _geotiff_url(place_id: str, layer: str, quality: str) -> str:
+    token = base64.urlsafe_b64encode(f"{place_id}:{layer}:{quality}".encode())
+    return (
+        f"https://solar.googleapis.com/v1/geoTiff:get?id={token.decode().rstrip('=')}"
+    )
+
+
+class CorpusDataLayersBuilder(DataLayersBuilder):
+    """Builds the data layers around one building of a memory-mapped corpus."""
+
+    def __init__(
+        self, corpus: Corpus, row: int, view: str = None, schema_name="DataLayers"
+    ):
+        super().__init__(schema_name)
+        self.corpus = corpus
+        self.row = row
+        self.view = view
+
+    def _set_properties(
+        self, model: Type[properties.DataLayersProperties]
+    ) -> properties.DataLayersProperties:
+        c, row = self.corpus, self.row
+        place_id = c["place_id"][row].decode()
+        quality = QUALITIES[c["imagery_quality"][row]]
+        layers = DATA_LAYER_VIEWS.get(self.view, DATA_LAYER_VIEWS["FULL_LAYERS"])
+
+        urls = {
+            f"{layer}Url": _geotiff_url(place_id, GEOTIFF_LAYERS[layer], quality)
+            for layer in layers
+            if layer != "hourlyShade" and selects(self.fields, f"{layer}Url")
+        }
+        if "hourlyShade" in layers and selects(self.fields, "hourlyShadeUrls"):
+            urls["hourlyShadeUrls"] = [
+                _geotiff_url(f"{place_id}-{month:02d}", "HOURLY_SHADE", quality)
+                for month in range(1, 13)
+            ]
+        return model(
+            imageryDate=_date(c["imagery_date"][row]),
+            imageryProcessedDate=_date(c["imagery_processed_date"][row]),
+            imageryQuality=quality,
+            **urls,
+        )
+
+
+class CorpusRegionSummaryBuilder(RegionSummaryBuilder):
+    """Summarizes the buildings of a corpus in a bounding box."""
+
+    def __init__(
+        self,
+        corpus: Corpus,
+        box: properties.LatLngBoxProperties,
+        schema_name="RegionSummary",
+    ):
+        super().__init__(box, schema_name)
+        self.corpus = corpus
+
+    def _aggregates(self) -> list[float]:
+        start = perf_counter()
+        aggregates = region_tables.summarize(
+            self.corpus, *box_bounds(self.box)
+        ).tolist()
+        metrics.STAGE_SECONDS.observe(perf_counter() - start, "RegionSummary", "lookup")
+        return aggregates
+
+
+def _corpus_row(
+    lat_lng, qualities, schema_name: str
+) -> tuple[Corpus, int] | tuple[None, None]:
+    """The corpus and row of the building of one of `qualities` closest to
+    `lat_lng`, timed as the lookup stage of `schema_name`.
+
+    Raises `NotFoundError` when the point is outside the coverage of the
+    corpus or no such building lies within `Settings.search_radius_meters`."""
+    corpus = get_corpus()
+    if corpus is None:
+        return None, None
+    start = perf_counter()
+    lat_lng = properties.LatLngProperties.model_validate(lat_lng)
+    latitude, longitude = lat_lng.latitude, lat_lng.longitude
+    settings = get_settings()
+    coverage = corpus.coverage(
+        settings.search_radius_meters,
+        settings.coverage_cell_degrees,
+        settings.coverage_max_bitmap_bits,
+    )
+    covered = (latitude, longitude) in coverage
+    metrics.COVERAGE_LOOKUPS.inc("inside" if covered else "outside")
+    if not covered:
+        raise NotFoundError()
+    row = corpus.nearest(latitude, longitude, settings.search_radius_meters, qualities)
+    metrics.STAGE_SECONDS.observe(perf_counter() - start, schema_name, "lookup")
+    if row is None:
+        raise NotFoundError()
+    return corpus, row
+
+
+def building_insights_builder(
+    lat_lon, required_quality: str = None
+) -> CorpusBuildingInsightsBuilder | None:
+    """See `schema.building_insights_builder`; None without a corpus."""
+    corpus, row = _corpus_row(
+        lat_lon, qualifying_qualities(required_quality), "BuildingInsights"
+    )
+    if corpus is None:
+        return None
+    return CorpusBuildingInsightsBuilder(corpus, row)
+
+
+def building_builder(place_id: str) -> CorpusBuildingInsightsBuilder | None:
+    """See `schema.building_builder`; None without a corpus."""
+    corpus = get_corpus()
+    if corpus is None:
+        return None
+    start = perf_counter()
+    row = corpus.find(place_id)
+    metrics.STAGE_SECONDS.observe(perf_counter() - start, "BuildingInsights", "lookup")
+    if row is None:
+        raise NotFoundError()
+    return CorpusBuildingInsightsBuilder(corpus, row)
+
+
+def data_layers_builder(
+    location,
+    view: str = None,
+    required_quality: str = None,
+    exact_quality_required: bool = False,
+) -> CorpusDataLayersBuilder | None:
+    """See `schema.data_layers_builder`; None without a corpus."""
+    corpus, row = _corpus_row(
+        location,
+        qualifying_qualities(required_quality, bool(exact_quality_required)),
+        "DataLayers",
+    )
+    if corpus is None:
+        return None
+    return CorpusDataLayersBuilder(corpus, row, view)
+
+
+def region_summary_builder(
+    box: properties.LatLngBoxProperties,
+) -> CorpusRegionSummaryBuilder | None:
+    """See `schema.region_summary_builder`; None without a corpus."""
+    corpus = get_corpus()
+    if corpus is None:
+        return None
+    return CorpusRegionSummaryBuilder(corpus, box)
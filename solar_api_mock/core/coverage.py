@@ -0,0 +1,130 @@
+"""Constant-time coverage checks.
+
+A coarse lat/lng grid marks every cell within the search radius of some
+building. Points in unmarked cells cannot have a building in range, so
+they are rejected before any index lookup. Compact extents use a dense
+bitmap; when the extent is too large for one, e.g. a few cities spread
+over a continent, the marked cells go into a Bloom filter instead, whose
+false positives merely fall through to the index lookup."""
+
+import numpy as np
+
+METERS_PER_DEGREE = 111_320.0
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix_int(key: int) -> int:
+    """splitmix64 finaliser on a Python int, identical to `_mix`."""
+    z = (key + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser, vectorised."""
+    with np.errstate(over="ignore"):
+        z = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class BloomFilter:
+    def __init__(self, keys: np.ndarray, false_positive_rate: float = 0.01):
+        n = max(len(keys), 1)
+        self.bits = max(64, int(-n * np.log(false_positive_rate) / np.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / n * np.log(2)))
+        self._table = np.zeros(-(-self.bits // 8), dtype=np.uint8)
+        positions = self._positions(np.asarray(keys, dtype=np.int64))
+        np.bitwise_or.at(
+            self._table, positions >> 3, (1 << (positions & 7)).astype(np.uint8)
+        )
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        h1 = _mix(keys)
+        h2 = _mix(h1) | np.uint64(1)
+        i = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            combined = h1[:, None] + i * h2[:, None]
+        return (combined % np.uint64(self.bits)).astype(np.int64).ravel()
+
+    def __contains__(self, key: int) -> bool:
+        h1 = _mix_int(key & _MASK64)
+        h2 = _mix_int(h1) | 1
+        table = self._table
+        for i in range(self.hashes):
+            position = ((h1 + i * h2) & _MASK64) % self.bits
+            if not table[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class CoverageMap:
+    def __init__(
+        self,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        radius_meters: float,
+        cell_degrees: float = 0.01,
+        max_bitmap_bits: int = 1 << 24,
+    ):
+        self.cell_degrees = cell_degrees
+        self.radius_meters = radius_meters
+        rows = np.floor(np.asarray(latitude) / cell_degrees).astype(np.int64)
+        cols = np.floor(np.asarray(longitude) / cell_degrees).astype(np.int64)
+
+        # Dilate every building's cell by the search radius. Longitude
+        # degrees shrink towards the poles, so the column reach is taken
+        # at the highest latitude of the corpus.
+        max_abs_lat = float(np.max(np.abs(latitude), initial=0.0))
+        reach_rows = int(np.ceil(radius_meters / (cell_degrees * METERS_PER_DEGREE)))
+        cos_lat = max(np.cos(np.radians(min(max_abs_lat + cell_degrees, 89.9))), 1e-3)
+        reach_cols = int(
+            np.ceil(radius_meters / (cell_degrees * METERS_PER_DEGREE * cos_lat))
+        )
+        if len(rows):
+            base_col = int(cols.min())
+            keys = np.unique(rows * (1 << 32) + (cols - base_col))
+            rows, cols = keys >> 32, (keys & 0xFFFFFFFF) + base_col
+        d_rows, d_cols = np.meshgrid(
+            np.arange(-reach_rows, reach_rows + 1),
+            np.arange(-reach_cols, reach_cols + 1),
+            indexing="ij",
+        )
+        rows = (rows[:, None] + d_rows.ravel()).ravel()
+        cols = (cols[:, None] + d_cols.ravel()).ravel()
+
+        self._bloom = None
+        self._bitmap = None
+        if len(rows) == 0:
+            self._row0 = self._col0 = 0
+            self._rows = self._cols = 0
+            return
+        self._row0, self._col0 = int(rows.min()), int(cols.min())
+        self._rows = int(rows.max()) - self._row0 + 1
+        self._cols = int(cols.max()) - self._col0 + 1
+        if self._rows * self._cols <= max_bitmap_bits:
+            marked = np.zeros(self._rows * self._cols, dtype=bool)
+            marked[(rows - self._row0) * self._cols + (cols - self._col0)] = True
+            self._bitmap = np.packbits(marked)
+        else:
+            self._bloom = BloomFilter(np.unique(rows * (1 << 32) + cols))
+
+    @property
+    def kind(self) -> str:
+        return "bloom" if self._bloom is not None else "bitmap"
+
+    def __contains__(self, lat_lng: tuple[float, float]) -> bool:
+        latitude, longitude = lat_lng
+        row = int(np.floor(latitude / self.cell_degrees))
+        col = int(np.floor(longitude / self.cell_degrees))
+        r, c = row - self._row0, col - self._col0
+        if not (0 <= r < self._rows and 0 <= c < self._cols):
+            return False
+        if self._bloom is not None:
+            return row * (1 << 32) + col in self._bloom
+        i = r * self._cols + c
+        return bool(self._bitmap[i >> 3] & (0x80 >> (i & 7)))
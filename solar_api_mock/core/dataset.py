@@ -0,0 +1,709 @@
+"""Columnar, memory-mappable building corpus.
+
+A corpus file holds one fixed-width column per building attribute and a
+variable-length panel section addressed through `panel_offsets`. Buildings
+are partitioned by imagery quality and, within a partition, sorted by the
+cell of a regular lat/lng grid. The per-partition cell offsets double as
+a spatial index: the buildings of one quality in one cell are one
+contiguous slice of every column, and a query restricted to some
+qualities never touches the rows of the others. The place ids are also
+stored sorted, with their rows, as an index of the buildings by id, and
+the summed-area tables of `core.regions` summarize the grid.
+
+Layout::
+
+    MAGIC | uint64 header length | JSON header | padding | column data
+
+Column offsets in the header are relative to the start of the column data,
+which is aligned on `ALIGNMENT` bytes, as is every column."""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from solar_api_mock.core import metrics, region_tables, regions
+from solar_api_mock.core.regions import METERS_PER_DEGREE
+from solar_api_mock.core.coverage import CoverageMap
+from solar_api_mock.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SOLARMK\x01"
+VERSION = 2
+ALIGNMENT = 64
+
+QUALITIES = ("IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE")
+ORIENTATIONS = ("SOLAR_PANEL_ORIENTATION_UNSPECIFIED", "LANDSCAPE", "PORTRAIT")
+
+PANEL_DTYPE = np.dtype(
+    [
+        ("latitude", "<f8"),
+        ("longitude", "<f8"),
+        ("yearly_energy_dc_kwh", "<f4"),
+        ("segment_index", "u1"),
+        ("orientation", "u1"),
+    ]
+)
+
+BUILDING_COLUMNS = {
+    "place_id": ("S27", ()),
+    "latitude": ("<f8", ()),
+    "longitude": ("<f8", ()),
+    "sw_latitude": ("<f8", ()),
+    "sw_longitude": ("<f8", ()),
+    "ne_latitude": ("<f8", ()),
+    "ne_longitude": ("<f8", ()),
+    "imagery_quality": ("u1", ()),
+    "imagery_date": ("<i4", ()),
+    "imagery_processed_date": ("<i4", ()),
+    "postal_code": ("S5", ()),
+    "statistical_area": ("S11", ()),
+    "area_meters2": ("<f4", ()),
+    "ground_area_meters2": ("<f4", ()),
+    "sunshine_quantiles": ("<f4", (11,)),
+    "max_array_panels_count": ("<i4", ()),
+    "max_array_area_meters2": ("<f4", ()),
+    "max_sunshine_hours_per_year": ("<f4", ()),
+    "carbon_offset_factor_kg_per_mwh": ("<f4", ()),
+    "yearly_energy_dc_kwh": ("<f4", ()),
+    "plane_height_meters": ("<f4", ()),
+    "segment_count": ("u1", ()),
+    "segment_pitch_degrees": ("<f4", (4,)),
+    "segment_azimuth_degrees": ("<f4", (4,)),
+    "segment_area_meters2": ("<f4", (4,)),
+    "segment_ground_area_meters2": ("<f4", (4,)),
+}
+
+
+class CorpusFormatError(ValueError):
+    pass
+
+
+def _align(n: int) -> int:
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+class Grid:
+    """Regular lat/lng grid used to order and index the buildings."""
+
+    def __init__(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        rows: int,
+        cols: int,
+    ):
+        if not (south < north and west < east):
+            raise ValueError("Grid bounds must satisfy south < north and west < east")
+        self.south, self.west, self.north, self.east = south, west, north, east
+        self.rows, self.cols = rows, cols
+        self.cell_height = (north - south) / rows
+        self.cell_width = (east - west) / cols
+
+    @classmethod
+    def for_count(
+        cls,
+        count: int,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        per_cell: int = 4,
+    ) -> "Grid":
+        """A grid of roughly square cells holding `per_cell` buildings each."""
+        cos_lat = np.cos(np.radians((south + north) / 2))
+        height = north - south
+        width = (east - west) * cos_lat
+        cells = max(1, count // per_cell)
+        rows = max(1, round(np.sqrt(cells * height / width)))
+        cols = max(1, round(cells / rows))
+        return cls(south, west, north, east, rows, cols)
+
+    @property
+    def size(self) -> int:
+        return self.rows * self.cols
+
+    def row_col(self, latitude, longitude):
+        row = np.clip(
+            np.floor((np.asarray(latitude) - self.south) / self.cell_height),
+            0,
+            self.rows - 1,
+        ).astype(np.int64)
+        col = np.clip(
+            np.floor((np.asarray(longitude) - self.west) / self.cell_width),
+            0,
+            self.cols - 1,
+        ).astype(np.int64)
+        return row, col
+
+    def cell(self, latitude, longitude):
+        row, col = self.row_col(latitude, longitude)
+        return row * self.cols + col
+
+    def to_dict(self) -> dict:
+        return {
+            "south": self.south,
+            "west": self.west,
+            "north": self.north,
+            "east": self.east,
+            "rows": self.rows,
+            "cols": self.cols,
+        }
+
+
+class CorpusWriter:
+    """Stream building chunks to a corpus file.
+
+    Buildings are laid out by imagery quality partition, then by grid
+    cell. Chunks, as returned by `randomizer.generate_buildings`, must
+    arrive in non-decreasing grid cell order, both within and across
+    chunks; each chunk is split by quality as it arrives. Every column of
+    every partition is spooled to its own temporary file so that memory
+    use only depends on the chunk size and the grid."""
+
+    def __init__(self, path, grid: Grid, metadata: dict = None):
+        self.path = Path(path)
+        self.grid = grid
+        self.metadata = metadata or {}
+        self._tmpdir = tempfile.TemporaryDirectory(
+            dir=self.path.parent, prefix=f".{self.path.name}."
+        )
+        self._spools = {}
+        self._cell_counts = np.zeros((len(QUALITIES), grid.size), dtype=np.int64)
+        self._last_cell = np.full(len(QUALITIES), -1)
+        self._region_cells = np.zeros((regions.TABLES, grid.size))
+        self.count = 0
+        self.panel_count = 0
+
+    def _spool_path(self, quality: int, name: str) -> str:
+        return os.path.join(self._tmpdir.name, f"{quality}.{name}")
+
+    def _write(self, quality: int, name: str, data: np.ndarray):
+        if (quality, name) not in self._spools:
+            self._spools[quality, name] = open(self._spool_path(quality, name), "wb")
+        self._spools[quality, name].write(data.tobytes())
+
+    def append(self, chunk: dict[str, np.ndarray]):
+        cells = self.grid.cell(chunk["latitude"], chunk["longitude"])
+        if len(cells) == 0:
+            return
+        if np.any(np.diff(cells) < 0):
+            raise ValueError("Chunks must be sorted by grid cell")
+        panels_count = np.asarray(chunk["max_array_panels_count"], dtype=np.int64)
+        panels = np.ascontiguousarray(chunk["panels"], dtype=PANEL_DTYPE)
+        if len(panels) != panels_count.sum():
+            raise ValueError("Panel section does not match max_array_panels_count")
+        panel_owner = np.repeat(np.arange(len(cells)), panels_count)
+        region_tables.add_cell_aggregates(
+            self._region_cells, region_tables.building_values(chunk), cells
+        )
+
+        quality = np.asarray(chunk["imagery_quality"])
+        for q in np.unique(quality):
+            rows = quality == q
+            if cells[rows][0] < self._last_cell[q]:
+                raise ValueError("Chunks must be sorted by grid cell")
+            self._last_cell[q] = cells[rows][-1]
+            self._cell_counts[q] += np.bincount(cells[rows], minlength=self.grid.size)
+            for name, (dtype, shape) in BUILDING_COLUMNS.items():
+                column = np.ascontiguousarray(chunk[name][rows], dtype=dtype)
+                if column.shape[1:] != shape:
+                    raise ValueError(f"Column {name} has shape {column.shape[1:]}")
+                self._write(q, name, column)
+            self._write(q, "panels", panels[rows[panel_owner]])
+
+        self.count += len(cells)
+        self.panel_count += len(panels)
+
+    def _partition_spools(self, name: str) -> list[str]:
+        return [
+            self._spool_path(q, name)
+            for q in range(len(QUALITIES))
+            if (q, name) in self._spools
+        ]
+
+    def close(self):
+        for spool in self._spools.values():
+            spool.close()
+
+        panels_count = np.concatenate(
+            [np.zeros(1, dtype="<i8")]
+            + [
+                np.fromfile(spool, dtype="<i4").astype("<i8")
+                for spool in self._partition_spools("max_array_panels_count")
+            ]
+        )
+        np.cumsum(panels_count).astype("<i8").tofile(
+            os.path.join(self._tmpdir.name, "panel_offsets")
+        )
+        flat = np.concatenate([[0], np.cumsum(self._cell_counts.ravel())])
+        cells = self.grid.size
+        cell_offsets = np.stack(
+            [flat[q * cells : (q + 1) * cells + 1] for q in range(len(QUALITIES))]
+        ).astype("<i8")
+        cell_offsets.tofile(os.path.join(self._tmpdir.name, "cell_offsets"))
+        place_ids = np.concatenate(
+            [np.zeros(0, dtype=BUILDING_COLUMNS["place_id"][0])]
+            + [
+                np.fromfile(spool, dtype=BUILDING_COLUMNS["place_id"][0])
+                for spool in self._partition_spools("place_id")
+            ]
+        )
+        order = np.argsort(place_ids, kind="stable")
+        place_ids[order].tofile(os.path.join(self._tmpdir.name, "place_id_sorted"))
+        order.astype("<i8").tofile(os.path.join(self._tmpdir.name, "place_id_rows"))
+        region_tables.summed_area(
+            self._region_cells, self.grid.rows, self.grid.cols
+        ).astype("<f8").tofile(os.path.join(self._tmpdir.name, "region_tables"))
+
+        sources = {name: self._partition_spools(name) for name in BUILDING_COLUMNS}
+        sources["panel_offsets"] = [os.path.join(self._tmpdir.name, "panel_offsets")]
+        sources["panels"] = self._partition_spools("panels")
+        sources["cell_offsets"] = [os.path.join(self._tmpdir.name, "cell_offsets")]
+        for name in ("place_id_sorted", "place_id_rows", "region_tables"):
+            sources[name] = [os.path.join(self._tmpdir.name, name)]
+
+        columns = {
+            name: {"dtype": dtype, "shape": [self.count, *shape]}
+            for name, (dtype, shape) in BUILDING_COLUMNS.items()
+        }
+        columns["panel_offsets"] = {"dtype": "<i8", "shape": [self.count + 1]}
+        columns["panels"] = {"dtype": "panels", "shape": [self.panel_count]}
+        columns["cell_offsets"] = {
+            "dtype": "<i8",
+            "shape": [len(QUALITIES), cells + 1],
+        }
+        columns["place_id_sorted"] = {
+            "dtype": BUILDING_COLUMNS["place_id"][0],
+            "shape": [self.count],
+        }
+        columns["place_id_rows"] = {"dtype": "<i8", "shape": [self.count]}
+        columns["region_tables"] = {
+            "dtype": "<f8",
+            "shape": [regions.TABLES, self.grid.rows + 1, self.grid.cols + 1],
+        }
+        offset = 0
+        for name, column in columns.items():
+            column["offset"] = offset
+            offset = _align(offset + sum(map(os.path.getsize, sources[name])))
+
+        header = json.dumps(
+            {
+                "version": VERSION,
+                "count": self.count,
+                "panel_count": self.panel_count,
+                "grid": self.grid.to_dict(),
+                "metadata": self.metadata,
+                "columns": columns,
+            }
+        ).encode()
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        partial = self.path.with_name(f".{self.path.name}.partial")
+        with open(partial, "wb") as out:
+            out.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, column in columns.items():
+                out.seek(data_start + column["offset"])
+                for source in sources[name]:
+                    with open(source, "rb") as spool:
+                        shutil.copyfileobj(spool, out, 1 << 22)
+            out.truncate(_align(out.tell()))
+        os.replace(partial, self.path)
+        self._tmpdir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for spool in self._spools.values():
+                spool.close()
+            self._tmpdir.cleanup()
+
+
+def _read_header(f, path) -> bytes:
+    """The JSON header of the corpus file open as `f`, checked."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise CorpusFormatError(f"{path} is not a corpus file")
+    (header_length,) = struct.unpack("<Q", f.read(8))
+    header = f.read(header_length)
+    try:
+        version = json.loads(header)["version"]
+    except (ValueError, KeyError, TypeError):
+        raise CorpusFormatError(f"{path} has an invalid corpus header")
+    if version != VERSION:
+        raise CorpusFormatError(f"Unsupported corpus version {version}")
+    return header
+
+
+def check_corpus(path):
+    """Raise `CorpusFormatError` unless `path` starts like a corpus file."""
+    with open(path, "rb") as f:
+        _read_header(f, path)
+
+
+class Corpus:
+    """A read-only, memory-mapped view of a corpus file.
+
+    Columns are NumPy arrays backed directly by the file mapping, so
+    opening a corpus costs a header parse regardless of its size."""
+
+    def __init__(self, path, source=None):
+        self.path = Path(path)
+        self.source = Path(source or path)
+        with open(self.path, "rb") as f:
+            header = _read_header(f, self.path)
+            self.header = json.loads(header)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        self.columns = {}
+        for name, column in self.header["columns"].items():
+            dtype = PANEL_DTYPE if column["dtype"] == "panels" else column["dtype"]
+            shape = tuple(column["shape"])
+            self.columns[name] = np.frombuffer(
+                self._mmap,
+                dtype=dtype,
+                count=int(np.prod(shape)),
+                offset=data_start + column["offset"],
+            ).reshape(shape)
+
+        # Unlike `CorpusHolder.version`, the same in every process serving
+        # this file, staged or not, and across restarts.
+        try:
+            stat = os.stat(self.source)
+        except OSError:
+            stat = os.stat(self.path)
+        digest = hashlib.sha1(header)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        self.fingerprint = digest.hexdigest()[:16]
+
+        self.grid = Grid(**self.header["grid"])
+        self.metadata = self.header["metadata"]
+        self.panel_offsets = self.columns["panel_offsets"]
+        self.cell_offsets = self.columns["cell_offsets"]
+        self.panels = self.columns["panels"]
+        self.latitude = self.columns["latitude"]
+        self.longitude = self.columns["longitude"]
+        self._coverage = {}
+        self._place_id_index = None
+        self._region_tables = None
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def panels_of(self, row: int) -> np.ndarray:
+        return self.panels[self.panel_offsets[row] : self.panel_offsets[row + 1]]
+
+    def place_id_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """The place ids in sorted order and their rows.
+
+        Written with the corpus, so every worker maps the same index;
+        corpora written before it existed get one sorted on first use."""
+        if self._place_id_index is None:
+            if "place_id_sorted" in self.columns:
+                index = self.columns["place_id_sorted"], self.columns["place_id_rows"]
+            else:
+                order = np.argsort(self.columns["place_id"], kind="stable")
+                index = self.columns["place_id"][order], order
+            self._place_id_index = index
+        return self._place_id_index
+
+    def region_tables(self) -> np.ndarray:
+        """The summed-area tables of `core.region_tables` over the grid; computed
+        on first use for corpora written before they existed."""
+        if self._region_tables is None:
+            tables = self.columns.get("region_tables")
+            if tables is None or tables.shape[0] != regions.TABLES:
+                cells = self.grid.cell(self.latitude, self.longitude)
+                tables = region_tables.summed_area(
+                    region_tables.cell_aggregates(
+                        region_tables.building_values(self.columns),
+                        cells,
+                        self.grid.size,
+                    ),
+                    self.grid.rows,
+                    self.grid.cols,
+                )
+            self._region_tables = tables
+        return self._region_tables
+
+    def find(self, place_id: str) -> int | None:
+        """Row of the building `place_id`, by binary search of the sorted
+        place ids: a handful of page reads, whatever the corpus size."""
+        ids, rows = self.place_id_index()
+        key = place_id.encode()
+        if len(key) > ids.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(ids, key))
+        if i < len(ids) and ids[i] == key:
+            return int(rows[i])
+        return None
+
+    def _ring_slices(self, row: int, col: int, r: int):
+        grid = self.grid
+        col_lo, col_hi = max(col - r, 0), min(col + r, grid.cols - 1)
+        for ring_row in range(max(row - r, 0), min(row + r, grid.rows - 1) + 1):
+            base = ring_row * grid.cols
+            if abs(ring_row - row) == r:
+                yield base + col_lo, base + col_hi + 1
+            else:
+                if col - r >= 0:
+                    yield base + col - r, base + col - r + 1
+                if col + r < grid.cols:
+                    yield base + col + r, base + col + r + 1
+
+    def coverage(
+        self,
+        radius_meters: float,
+        cell_degrees: float = 0.01,
+        max_bitmap_bits: int = 1 << 24,
+    ) -> CoverageMap:
+        key = (radius_meters, cell_degrees, max_bitmap_bits)
+        hit = key in self._coverage
+        metrics.cache_lookup("coverage_map", hit)
+        if not hit:
+            self._coverage[key] = CoverageMap(self.latitude, self.longitude, *key)
+        return self._coverage[key]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance_meters: float = None,
+        qualities=None,
+    ) -> int | None:
+        """Row of the building whose center is closest to the given point.
+
+        Only the partitions of `qualities` (indices into `QUALITIES`, all
+        of them by default) are searched. In each, cells are visited in
+        rings of growing Chebyshev distance around the cell of the point,
+        stopping as soon as no unvisited cell can hold a building closer
+        than the best one so far, or one within `max_distance_meters`."""
+        grid = self.grid
+        row, col = (int(v) for v in grid.row_col(latitude, longitude))
+        cos_lat = np.cos(np.radians(latitude))
+        min_cell = min(grid.cell_height, grid.cell_width * cos_lat)
+        best_distance = (
+            np.inf
+            if max_distance_meters is None
+            else (max_distance_meters / METERS_PER_DEGREE) ** 2
+        )
+        best_row = None
+
+        if qualities is None:
+            qualities = range(len(QUALITIES))
+        for quality in qualities:
+            offsets = self.cell_offsets[quality]
+            if offsets[0] == offsets[-1]:
+                continue
+            for r in range(max(grid.rows, grid.cols)):
+                if r > 0 and (r - 1) * min_cell >= np.sqrt(best_distance):
+                    break
+                for first, last in self._ring_slices(row, col, r):
+                    start, stop = offsets[first], offsets[last]
+                    if start == stop:
+                        continue
+                    d_lat = self.latitude[start:stop] - latitude
+                    d_lng = (self.longitude[start:stop] - longitude) * cos_lat
+                    distance = d_lat * d_lat + d_lng * d_lng
+                    i = int(np.argmin(distance))
+                    if distance[i] <= best_distance:
+                        best_row, best_distance = int(start) + i, distance[i]
+        return best_row
+
+    def warm(self):
+        """Ask the kernel to page the whole file in ahead of first use."""
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self._mmap.madvise(mmap.MADV_WILLNEED)
+
+    def distance_meters(self, row: int, latitude: float, longitude: float) -> float:
+        cos_lat = np.cos(np.radians(latitude))
+        d_lat = self.latitude[row] - latitude
+        d_lng = (self.longitude[row] - longitude) * cos_lat
+        return float(np.hypot(d_lat, d_lng) * METERS_PER_DEGREE)
+
+    def close(self):
+        self.columns.clear()
+        self.panel_offsets = self.cell_offsets = self.panels = None
+        self._place_id_index = None
+        self._region_tables = None
+        self.latitude = self.longitude = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Arrays handed out to callers still reference the mapping; it
+            # is released once they are garbage collected.
+            pass
+
+
+def qualifying_qualities(required_quality: str = None, exact: bool = False):
+    """Indices into `QUALITIES` of the partitions a request may be served from.
+
+    An unspecified quality means HIGH. Qualities are ordered from HIGH down
+    to BASE, so a minimum quality admits itself and everything above it."""
+    if required_quality in (None, "IMAGERY_QUALITY_UNSPECIFIED"):
+        required_quality = "HIGH"
+    index = QUALITIES.index(required_quality)
+    if exact:
+        return (index,)
+    return tuple(range(QUALITIES.index("HIGH"), index + 1))
+
+
+def share_corpus(path, directory="/dev/shm") -> Path:
+    """Stage a corpus file in shared memory and return the staged path.
+
+    Every process that opens the staged file maps the same RAM-resident
+    pages read-only, so the columns and the grid index exist once however
+    many workers attach to them. The copy is keyed by the source path,
+    size and modification time, so restarts reuse an up-to-date copy.
+
+    The source is checked to be a corpus before it is copied, and copies
+    take a lock on their name: processes staging the same file at once,
+    such as workers seeing it replaced, wait for the first one's copy."""
+    path = Path(path).resolve()
+    check_corpus(path)
+    stat = path.stat()
+    key = hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    shared = Path(directory) / f"solar-api-mock-{key.hexdigest()[:16]}.corpus"
+    if shared.exists():
+        return shared
+    lock = os.open(shared.with_name(f".{shared.name}.lock"), os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not shared.exists():
+            partial = shared.with_name(f".{shared.name}.{os.getpid()}")
+            shutil.copyfile(path, partial)
+            os.chmod(partial, 0o444)
+            os.replace(partial, shared)
+    finally:
+        os.close(lock)
+    return shared
+
+
+class CorpusHolder:
+    """Copy-on-write reference to the active corpus.
+
+    Readers take `holder.corpus` once per request and keep using that
+    object, so a reload never changes the data under an in-flight request.
+    A new corpus is opened and paged in before the reference is swapped;
+    the previous one is released when its last reader drops it."""
+
+    def __init__(self, corpus: Corpus = None):
+        self._corpus = corpus
+        self._initialized = corpus is not None
+        self._lock = threading.Lock()
+        self.version = int(corpus is not None)
+
+    @property
+    def corpus(self) -> Corpus | None:
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    path = get_settings().dataset_path
+                    if path is not None:
+                        self._swap(self._open(path))
+                    self._initialized = True
+        return self._corpus
+
+    @staticmethod
+    def _open(path) -> Corpus:
+        settings = get_settings()
+        shared_memory_dir = settings.shared_memory_dir
+        mapped = share_corpus(path, shared_memory_dir) if shared_memory_dir else path
+        corpus = Corpus(mapped, source=path)
+        corpus.warm()
+        corpus.coverage(
+            settings.search_radius_meters,
+            settings.coverage_cell_degrees,
+            settings.coverage_max_bitmap_bits,
+        )
+        return corpus
+
+    def _swap(self, corpus: Corpus) -> Corpus | None:
+        previous, self._corpus = self._corpus, corpus
+        self.version += 1
+        return previous
+
+    def load(self, path) -> Corpus:
+        """Open the corpus at `path` and make it the active one."""
+        corpus = self._open(path)
+        with self._lock:
+            previous = self._swap(corpus)
+            self._initialized = True
+        shared_memory_dir = get_settings().shared_memory_dir
+        if (
+            previous is not None
+            and shared_memory_dir is not None
+            and previous.path != corpus.path
+            and previous.path.parent == Path(shared_memory_dir)
+        ):
+            # Mappings held by in-flight requests or other workers keep the
+            # pages alive; only the name goes away.
+            previous.path.unlink(missing_ok=True)
+        return corpus
+
+    async def watch(self, path, interval: float):
+        """Reload the corpus whenever the file at `path` is replaced."""
+
+        def signature():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+        last = signature()
+        while True:
+            await asyncio.sleep(interval)
+            current = signature()
+            if current is None or current == last:
+                continue
+            try:
+                await asyncio.to_thread(self.load, path)
+            except (OSError, ValueError):
+                logger.exception("Could not reload corpus %s", path)
+                continue
+            last = current
+            logger.info("Reloaded corpus %s (version %d)", path, self.version)
+
+
+corpus_holder = CorpusHolder()
+
+
+def get_corpus() -> Corpus | None:
+    """The active corpus, initially the one at `Settings.dataset_path`."""
+    return corpus_holder.corpus
+
+
+def sort_by_cell(chunk: dict[str, np.ndarray], grid: Grid) -> dict[str, np.ndarray]:
+    """Reorder a generated chunk, panels included, by grid cell."""
+    order = np.argsort(grid.cell(chunk["latitude"], chunk["longitude"]), kind="stable")
+    counts = np.asarray(chunk["max_array_panels_count"], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sorted_counts = counts[order]
+    sorted_starts = np.concatenate([[0], np.cumsum(sorted_counts)[:-1]])
+    panel_order = np.repeat(starts[order] - sorted_starts, sorted_counts) + np.arange(
+        sorted_counts.sum()
+    )
+    sorted_chunk = {name: column[order] for name, column in chunk.items()}
+    sorted_chunk["panels"] = chunk["panels"][panel_order]
+    return sorted_chunk
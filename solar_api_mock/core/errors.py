@@ -0,0 +1,62 @@
+class SolarApiError(Exception):
+    """An error reported the way Google APIs do.
+
+    `to_dict` gives the JSON error envelope, e.g.
+    `{"error": {"code": 404, "message": "...", "status": "NOT_FOUND"}}`."""
+
+    code = 500
+    status = "INTERNAL"
+    default_message = "Internal error encountered."
+
+    def __init__(self, message: str = None):
+        self.message = message or self.default_message
+        super().__init__(self.message)
+
+    def to_dict(self) -> dict:
+        return {
+            "error": {"code": self.code, "message": self.message, "status": self.status}
+        }
+
+
+class InvalidArgumentError(SolarApiError):
+    code = 400
+    status = "INVALID_ARGUMENT"
+    default_message = "Request contains an invalid argument."
+
+
+class NotFoundError(SolarApiError):
+    code = 404
+    status = "NOT_FOUND"
+    default_message = "Requested entity was not found."
+
+
+class ResourceExhaustedError(SolarApiError):
+    code = 429
+    status = "RESOURCE_EXHAUSTED"
+    default_message = "Resource has been exhausted (e.g. check quota)."
+
+
+class UnavailableError(SolarApiError):
+    code = 503
+    status = "UNAVAILABLE"
+    default_message = "The service is currently unavailable."
+
+
+class DeadlineExceededError(SolarApiError):
+    code = 504
+    status = "DEADLINE_EXCEEDED"
+    default_message = "Deadline expired before operation could complete."
+
+
+# Errors by status, as named in settings.
+ERRORS = {
+    error.status: error
+    for error in (
+        SolarApiError,
+        InvalidArgumentError,
+        NotFoundError,
+        ResourceExhaustedError,
+        UnavailableError,
+        DeadlineExceededError,
+    )
+}
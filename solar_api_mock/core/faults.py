@@ -0,0 +1,128 @@
+"""Latency and errors injected into calls, to exercise the timeouts,
+retries and concurrency limits of clients.
+
+Each route may have a `FaultProfile`: a delay drawn from its latency
+distribution is awaited, without blocking the event loop, before the
+call is handled, and a share of the calls then fail with the statuses of
+its error rates. The profiles start as `Settings.fault_profiles` and can
+be replaced while serving, in a file every worker reads when the workers
+of a deployment are to change together."""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from solar_api_mock.core import metrics
+from solar_api_mock.core.errors import ERRORS
+from solar_api_mock.core.settings import FaultProfile, LatencyProfile
+
+logger = logging.getLogger(__name__)
+
+_PROFILES = TypeAdapter(dict[str, FaultProfile])
+
+
+class FaultInjector:
+    """Injects the faults of `profiles`, keyed by route.
+
+    With `path`, the profiles are kept in that file, created with
+    `profiles` if missing: setting them replaces the file, and every
+    injector of the file reads it again when it changed, at the cost of a
+    `stat` per call."""
+
+    def __init__(
+        self,
+        profiles: dict[str, FaultProfile] = None,
+        seed: int = None,
+        path: Path = None,
+    ):
+        self.random = random.Random(seed)
+        self.path = path
+        self._profiles = profiles or {}
+        self._stamp = None
+        if path is not None and not path.exists():
+            self.profiles = self._profiles
+
+    @property
+    def profiles(self) -> dict[str, FaultProfile]:
+        if self.path is not None:
+            self._refresh()
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, profiles: dict[str, FaultProfile]):
+        if self.path is not None:
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=self.path.parent, prefix=f".{self.path.name}", delete=False
+            ) as f:
+                f.write(_PROFILES.dump_json(profiles, exclude_none=True))
+            os.replace(f.name, self.path)
+        self._profiles = profiles
+
+    def _refresh(self):
+        """Read the profiles file again if it was replaced; a missing or
+        invalid file leaves the profiles as they are."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        try:
+            self._profiles = _PROFILES.validate_json(self.path.read_bytes())
+        except (OSError, ValueError):
+            logger.exception("Could not read the fault profiles %s", self.path)
+
+    def delay(self, latency: LatencyProfile) -> float:
+        """A delay in seconds drawn from `latency`."""
+        if latency.distribution == "lognormal":
+            if latency.seconds == 0:
+                return 0.0
+            return self.random.lognormvariate(math.log(latency.seconds), latency.sigma)
+        if latency.distribution == "histogram":
+            cumulated = list(itertools.accumulate(latency.bucket_counts))
+            bucket = bisect.bisect_right(
+                cumulated, self.random.random() * cumulated[-1]
+            )
+            # A draw of exactly the total count lands past the last bucket.
+            bucket = min(bucket, len(cumulated) - 1)
+            lower = latency.bucket_seconds[bucket - 1] if bucket else 0.0
+            return self.random.uniform(lower, latency.bucket_seconds[bucket])
+        return latency.seconds
+
+    def error(self, profile: FaultProfile) -> str | None:
+        """The status a call fails with, drawn from the error rates of
+        `profile`, or None."""
+        draw = self.random.random()
+        for status, rate in profile.error_rates.items():
+            if draw < rate:
+                return status
+            draw -= rate
+        return None
+
+    async def inject(self, route: str):
+        """Delay a call of `route`, then raise the error it fails with, if
+        any, as its profile says."""
+        profile = self.profiles.get(route)
+        if profile is None:
+            return
+        if profile.latency is not None:
+            delay = self.delay(profile.latency)
+            metrics.INJECTED_FAULTS.inc(route, "latency")
+            await asyncio.sleep(delay)
+        status = self.error(profile)
+        if status is not None:
+            metrics.INJECTED_FAULTS.inc(route, status)
+            raise ERRORS[status]()
+
+
+injector = FaultInjector()
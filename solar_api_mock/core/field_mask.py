@@ -0,0 +1,152 @@
+"""Field masks selecting the parts of a response to return.
+
+A mask is given by the `fields` query parameter or the `X-Goog-FieldMask`
+header, in the syntax of Google APIs: comma separated field paths, dotted
+or with parenthesized sub-selections, e.g.
+`center,solarPotential(maxArrayPanelsCount,buildingStats)`, or `*` for
+every field. The builders skip the subtrees a mask leaves out, and the
+serialized response keeps only the fields it selects."""
+
+import types
+import typing
+from typing import Type, Union
+
+from pydantic import BaseModel
+
+from solar_api_mock.core.errors import InvalidArgumentError
+
+
+class FieldMask:
+    """A tree of field names. A name mapped to None selects its whole
+    subtree."""
+
+    def __init__(self, fields: dict[str, "FieldMask | None"]):
+        self.fields = fields
+
+    @classmethod
+    def parse(cls, text: str) -> "FieldMask | None":
+        """The mask described by `text`, or None when it selects every
+        field."""
+        text = "".join(text.split())
+        if text in ("", "*"):
+            return None
+        mask, end = cls._parse(text, 0)
+        if end != len(text):
+            raise InvalidArgumentError(f"Invalid field mask: {text}")
+        return mask
+
+    @classmethod
+    def _parse(cls, text: str, position: int) -> tuple["FieldMask", int]:
+        mask = cls({})
+        while True:
+            start = position
+            while position < len(text) and text[position] not in ",()":
+                position += 1
+            path = text[start:position]
+            if not path or "" in path.split("."):
+                raise InvalidArgumentError(f"Invalid field mask: {text}")
+            child = None
+            if position < len(text) and text[position] == "(":
+                child, position = cls._parse(text, position + 1)
+                if position >= len(text) or text[position] != ")":
+                    raise InvalidArgumentError(f"Invalid field mask: {text}")
+                position += 1
+            mask._add(path.split("."), child)
+            if position < len(text) and text[position] == ",":
+                position += 1
+                continue
+            return mask, position
+
+    def _add(self, names: list[str], child: "FieldMask | None"):
+        name, *rest = names
+        if rest:
+            child = FieldMask._nest(rest, child)
+        if name in self.fields:
+            current = self.fields[name]
+            if current is None or child is None:
+                self.fields[name] = None
+            else:
+                for child_name, grandchild in child.fields.items():
+                    current._add([child_name], grandchild)
+        else:
+            self.fields[name] = child
+
+    @classmethod
+    def _nest(cls, names: list[str], child: "FieldMask | None") -> "FieldMask":
+        mask = cls({})
+        mask._add(names, child)
+        return mask
+
+    def selects(self, path: str) -> bool:
+        """Whether some of the dotted `path` is selected."""
+        mask = self
+        for name in path.split("."):
+            if mask is None or "*" in mask.fields:
+                return True
+            if name not in mask.fields:
+                return False
+            mask = mask.fields[name]
+        return True
+
+    def apply(self, content):
+        """Keep the selected fields of `content`, a dumped model or a list
+        of them."""
+        if "*" in self.fields:
+            return content
+        if isinstance(content, list):
+            return [self.apply(item) for item in content]
+        if not isinstance(content, dict):
+            return content
+        selected = {}
+        for name, value in content.items():
+            if name in self.fields:
+                child = self.fields[name]
+                selected[name] = value if child is None else child.apply(value)
+        return selected
+
+    def validate(self, model: Type[BaseModel]):
+        """Raise `InvalidArgumentError` when a path is not a field of
+        `model`."""
+        if "*" in self.fields:
+            return
+        fields = {
+            field.alias or name: field for name, field in model.model_fields.items()
+        }
+        for name, child in self.fields.items():
+            field = fields.get(name)
+            if field is None:
+                raise InvalidArgumentError(f"Invalid field selection {name}")
+            if child is not None:
+                submodel = _model_of(field.annotation)
+                if submodel is None:
+                    raise InvalidArgumentError(
+                        f"Invalid field selection {name}: it has no subfields"
+                    )
+                child.validate(submodel)
+
+
+def _model_of(annotation) -> Type[BaseModel] | None:
+    """The model in a field annotation such as `list[Model]` or `Model |
+    None`."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    if typing.get_origin(annotation) in (list, Union, types.UnionType):
+        for argument in typing.get_args(annotation):
+            model = _model_of(argument)
+            if model is not None:
+                return model
+    return None
+
+
+def selects(mask: FieldMask | None, path: str) -> bool:
+    """Whether `mask` selects some of `path`; every path without a mask."""
+    return mask is None or mask.selects(path)
+
+
+def parse_field_mask(text: str | None, model: Type[BaseModel]) -> FieldMask | None:
+    """The mask described by `text`, checked against the fields of
+    `model`; None when there is no mask or it selects every field."""
+    mask = FieldMask.parse(text) if text else None
+    if mask is not None:
+        mask.validate(model)
+    return mask
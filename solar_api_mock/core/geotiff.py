@@ -0,0 +1,222 @@
+"""Synthetic GeoTIFF rasters behind the data layer URLs.
+
+A layer id, as found in the `geoTiff:get?id=` URLs of the data layers,
+is the unpadded URL-safe base64 of `<place id>:<layer>:<quality>`. The
+raster of an id is noise seeded from it, so the same id always gives the
+same file, with the bands, sample type and resolution of the real layer,
+covering `EXTENT_METERS` around the building.
+
+The rasters of the last `RASTER_CACHE_SIZE` ids are kept, read-only, and
+`read_layer` returns windows of them as views, without copying."""
+
+import base64
+import hashlib
+import math
+import struct
+from functools import lru_cache
+
+import numpy as np
+
+from solar_api_mock.core import schema
+from solar_api_mock.core.errors import InvalidArgumentError
+
+EXTENT_METERS = 100
+RASTER_CACHE_SIZE = 64
+METERS_PER_DEGREE = 111_320
+
+# Layer: pixel size in meters, bands, sample type.
+LAYERS = {
+    "DSM": (0.1, 1, np.float32),
+    "RGB": (0.1, 3, np.uint8),
+    "MASK": (0.1, 1, np.uint8),
+    "ANNUAL_FLUX": (0.1, 1, np.float32),
+    "MONTHLY_FLUX": (0.5, 12, np.float32),
+    # One band per hour, one bit per day of the month.
+    "HOURLY_SHADE": (1.0, 24, np.uint32),
+}
+
+_SHORT, _LONG, _DOUBLE = 3, 4, 12
+_TYPE_FORMATS = {_SHORT: "H", _LONG: "I", _DOUBLE: "d"}
+
+
+def parse_geotiff_id(geotiff_id: str) -> tuple[str, str, str]:
+    """The place id, layer and imagery quality of a layer id."""
+    try:
+        decoded = base64.urlsafe_b64decode(geotiff_id + "=" * (-len(geotiff_id) % 4))
+        place_id, layer, quality = decoded.decode().rsplit(":", 2)
+    except ValueError:
+        raise InvalidArgumentError(f"Invalid GeoTIFF id: {geotiff_id}")
+    if layer not in LAYERS:
+        raise InvalidArgumentError(f"Invalid GeoTIFF id: {geotiff_id}")
+    return place_id, layer, quality
+
+
+def building_center(place_id: str) -> tuple[float, float]:
+    """Where the building `place_id` of the corpus stands, the center of
+    its rasters; the fixture building when it is not in the corpus."""
+    corpus = None
+    if schema.dataset_version() != "fixture":
+        from solar_api_mock.core.dataset import get_corpus
+
+        corpus = get_corpus()
+    if corpus is not None:
+        # Hourly shade layers have one id per month: `<place id>-<month>`.
+        for candidate in (place_id, place_id.rpartition("-")[0]):
+            row = corpus.find(candidate)
+            if row is not None:
+                return float(corpus["latitude"][row]), float(corpus["longitude"][row])
+    return _fixture_center()
+
+
+@lru_cache
+def _fixture_center() -> tuple[float, float]:
+    center = schema.BuildingInsightsBuilder().construct_model().properties.center
+    return center.latitude, center.longitude
+
+
+@lru_cache(maxsize=RASTER_CACHE_SIZE)
+def raster(geotiff_id: str) -> np.ndarray:
+    """The read-only pixels of the layer `geotiff_id`, rows from north to
+    south by columns from west to east by bands."""
+    _, layer, _ = parse_geotiff_id(geotiff_id)
+    pixels = _pixels(geotiff_id, layer)
+    pixels.flags.writeable = False
+    return pixels
+
+
+def _degrees_per_pixel(pixel_size: float, latitude: float) -> tuple[float, float]:
+    degrees_y = pixel_size / METERS_PER_DEGREE
+    return degrees_y, degrees_y / max(math.cos(math.radians(latitude)), 1e-6)
+
+
+def read_layer(
+    geotiff_id: str,
+    center: tuple[float, float],
+    box: tuple[float, float, float, float],
+    pixel_size_meters: float = None,
+) -> np.ndarray:
+    """The pixels of the layer `geotiff_id`, centered on `center`, whose
+    center lies in the `(south, west, north, east)` box.
+
+    Pixels are sampled every `pixel_size_meters`, never finer than the
+    layer. The result is a view of the cached raster unless the pixel size
+    is not a multiple of the layer's: `(rows, columns)` for single-band
+    layers, else `(rows, columns, bands)`."""
+    _, layer, _ = parse_geotiff_id(geotiff_id)
+    pixels = raster(geotiff_id)
+    side = pixels.shape[0]
+    native = LAYERS[layer][0]
+    latitude, longitude = center
+    degrees_y, degrees_x = _degrees_per_pixel(native, latitude)
+    top = latitude + degrees_y * side / 2
+    left = longitude - degrees_x * side / 2
+    south, west, north, east = box
+
+    def bounds(low: float, high: float, size: float) -> tuple[int, int]:
+        """The pixels whose center lies between `low` and `high`."""
+        first = min(max(math.ceil(low / size - 0.5), 0), side)
+        return first, min(max(math.floor(high / size - 0.5) + 1, first), side)
+
+    row_lo, row_hi = bounds(top - north, top - south, degrees_y)
+    col_lo, col_hi = bounds(west - left, east - left, degrees_x)
+    step = max((pixel_size_meters or native) / native, 1.0)
+    if math.isclose(step, round(step)):
+        step = round(step)
+        window = pixels[row_lo:row_hi:step, col_lo:col_hi:step]
+    else:
+        rows = np.arange(row_lo, row_hi, step).astype(np.int64)
+        cols = np.arange(col_lo, col_hi, step).astype(np.int64)
+        window = pixels[np.ix_(rows, cols)]
+        window.flags.writeable = False
+    return window[..., 0] if window.shape[2] == 1 else window
+
+
+def _pixels(geotiff_id: str, layer: str) -> np.ndarray:
+    pixel_size, bands, dtype = LAYERS[layer]
+    side = round(EXTENT_METERS / pixel_size)
+    seed = int.from_bytes(hashlib.blake2b(geotiff_id.encode(), digest_size=8).digest())
+    rng = np.random.default_rng(seed)
+    shape = (side, side, bands)
+    if layer == "DSM":
+        return rng.normal(10, 2, shape).astype(dtype)
+    if layer == "MASK":
+        return rng.integers(0, 2, shape, dtype=dtype)
+    if layer == "ANNUAL_FLUX":
+        return rng.uniform(0, 1800, shape).astype(dtype)
+    if layer == "MONTHLY_FLUX":
+        return rng.uniform(0, 200, shape).astype(dtype)
+    return rng.integers(0, np.iinfo(dtype).max, shape, dtype=dtype, endpoint=True)
+
+
+def render_geotiff(
+    geotiff_id: str, latitude: float = 0.0, longitude: float = 0.0
+) -> bytes:
+    """The GeoTIFF of the layer `geotiff_id`, in WGS 84, centered on
+    `latitude` and `longitude`."""
+    _, layer, _ = parse_geotiff_id(geotiff_id)
+    pixels = raster(geotiff_id)
+    height, width, bands = pixels.shape
+    degrees_y, degrees_x = _degrees_per_pixel(LAYERS[layer][0], latitude)
+    data = pixels.astype(pixels.dtype.newbyteorder("<"), copy=False).tobytes()
+
+    sample_format = 3 if pixels.dtype.kind == "f" else 1
+    tags = [
+        (256, _LONG, [width]),
+        (257, _LONG, [height]),
+        (258, _SHORT, [pixels.dtype.itemsize * 8] * bands),
+        (259, _SHORT, [1]),
+        (262, _SHORT, [2 if layer == "RGB" else 1]),
+        (273, _LONG, [0]),
+        (277, _SHORT, [bands]),
+        (278, _LONG, [height]),
+        (279, _LONG, [len(data)]),
+        (284, _SHORT, [1]),
+        (339, _SHORT, [sample_format] * bands),
+        (33550, _DOUBLE, [degrees_x, degrees_y, 0.0]),
+        (
+            33922,
+            _DOUBLE,
+            [
+                0.0,
+                0.0,
+                0.0,
+                longitude - degrees_x * width / 2,
+                latitude + degrees_y * height / 2,
+                0.0,
+            ],
+        ),
+        # Geographic model, pixel is area, EPSG:4326.
+        (34735, _SHORT, [1, 1, 0, 3, 1024, 0, 1, 2, 1025, 0, 1, 1, 2048, 0, 1, 4326]),
+    ]
+    if bands > 1 and layer != "RGB":
+        tags.insert(10, (338, _SHORT, [0] * (bands - 1)))
+    return _tiff(tags, data)
+
+
+def _tiff(tags: list[tuple[int, int, list]], data: bytes) -> bytes:
+    """A little-endian TIFF of one image and strip. The strip offset tag
+    (273) is filled in here."""
+    directory_size = 2 + 12 * len(tags) + 4
+    overflow = bytearray()
+    overflow_offset = 8 + directory_size
+    values = [
+        struct.pack(f"<{len(items)}{_TYPE_FORMATS[kind]}", *items)
+        for _, kind, items in tags
+    ]
+    data_offset = overflow_offset + sum(
+        len(v) + len(v) % 2 for v in values if len(v) > 4
+    )
+
+    directory = bytearray(struct.pack("<H", len(tags)))
+    for (tag, kind, items), value in zip(tags, values):
+        if tag == 273:
+            value = struct.pack("<I", data_offset)
+        if len(value) <= 4:
+            field = value.ljust(4, b"\0")
+        else:
+            field = struct.pack("<I", overflow_offset + len(overflow))
+            overflow += value + b"\0" * (len(value) % 2)
+        directory += struct.pack("<HHI", tag, kind, len(items)) + field
+    directory += struct.pack("<I", 0)
+    header = b"II*\0" + struct.pack("<I", 8)
+    return header + bytes(directory) + bytes(overflow) + data
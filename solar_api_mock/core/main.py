@@ -1,7 +1,40 @@
-from typing import Literal
+import argparse
+import bz2
+import csv
+import functools
+import gzip
+import itertools
+import lzma
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Literal
 
-from solar_api_mock.core.properties import LatLngProperties
-from solar_api_mock.core.schema import BuildingInsightsBuilder, DataLayersBuilder
+import numpy as np
+
+from solar_api_mock.core import dataset, geotiff, randomizer
+from solar_api_mock.core.dataset import CorpusWriter, Grid, sort_by_cell
+from solar_api_mock.core.errors import InvalidArgumentError, SolarApiError
+from solar_api_mock.core.field_mask import parse_field_mask
+from solar_api_mock.core.properties import (
+    BuildingInsightsProperties,
+    DataLayersProperties,
+    LatLngBoxProperties,
+    LatLngProperties,
+)
+from solar_api_mock.core.schema import building_insights_builder, data_layers_builder
+from solar_api_mock.core.serialization import dumps_model, get_serializer
+
+# Compressors of the batches of `export_building_insights`: each batch is
+# a stream of its own, and concatenated streams read as one file.
+COMPRESSIONS = {
+    "gzip": functools.partial(gzip.compress, compresslevel=6),
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
 
 
 def get_building_insights(
@@ -9,10 +42,12 @@ def get_building_insights(
     required_quality: Literal[
         "IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"
     ] = None,
+    fields: str = None,
 ):
-    builder = BuildingInsightsBuilder()
-    obj = builder.construct_model()
-    return obj.properties.model_dump_json(exclude_none=True)
+    mask = parse_field_mask(fields, BuildingInsightsProperties)
+    builder = building_insights_builder(lat_lon, required_quality)
+    obj = builder.construct_model(mask)
+    return dumps_model(obj.properties, fields=mask).decode()
 
 
 def get_data_layers(
@@ -31,7 +66,320 @@ def get_data_layers(
     ] = None,
     pixel_size_numbers: float = None,
     exact_quality_required: bool = None,
+    fields: str = None,
 ):
-    builder = DataLayersBuilder()
-    obj = builder.construct_model()
-    return obj.properties.model_dump_json(exclude_none=True)
+    mask = parse_field_mask(fields, DataLayersProperties)
+    builder = data_layers_builder(
+        location, view, required_quality, exact_quality_required
+    )
+    obj = builder.construct_model(mask)
+    return dumps_model(obj.properties, fields=mask).decode()
+
+
+def get_data_layer_arrays(
+    location: LatLngProperties,
+    radius_meters: float = 50,
+    view: Literal[
+        "DATA_LAYER_VIEW_UNSPECIFIED",
+        "DSM_LAYER",
+        "IMAGERY_LAYERS",
+        "IMAGERY_AND_ANNUAL_FLUX_LAYERS",
+        "IMAGERY_AND_ALL_FLUX_LAYERS",
+        "FULL_LAYERS",
+    ] = None,
+    required_quality: Literal[
+        "IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"
+    ] = None,
+    pixel_size_meters: float = None,
+    exact_quality_required: bool = None,
+    window: LatLngBoxProperties = None,
+) -> dict[str, np.ndarray | list[np.ndarray]]:
+    """The layers `get_data_layers` links to, as arrays rather than GeoTIFF
+    URLs: keyed `dsm`, `rgb`, `mask`, `annualFlux` and `monthlyFlux`, and
+    `hourlyShade` for the list of the layers of each month.
+
+    Each covers the square of `radius_meters` around `location`, or
+    `window` when given, clipped to the rasters. See `geotiff.read_layer`
+    for their shape and sampling; they are read-only views of the cached
+    rasters."""
+    location = LatLngProperties.model_validate(location)
+    builder = data_layers_builder(
+        location, view, required_quality, exact_quality_required
+    )
+    layers = builder.construct_model().properties
+    if window is None:
+        degrees_y = radius_meters / geotiff.METERS_PER_DEGREE
+        degrees_x = degrees_y / max(np.cos(np.radians(location.latitude)), 1e-6)
+        box = (
+            location.latitude - degrees_y,
+            location.longitude - degrees_x,
+            location.latitude + degrees_y,
+            location.longitude + degrees_x,
+        )
+    else:
+        window = LatLngBoxProperties.model_validate(window)
+        box = (
+            window.sw.latitude,
+            window.sw.longitude,
+            window.ne.latitude,
+            window.ne.longitude,
+        )
+
+    def read(url: str) -> np.ndarray:
+        geotiff_id = url.partition("id=")[2]
+        place_id, _, _ = geotiff.parse_geotiff_id(geotiff_id)
+        center = geotiff.building_center(place_id)
+        return geotiff.read_layer(geotiff_id, center, box, pixel_size_meters)
+
+    arrays = {
+        name: read(url)
+        for name in ("dsm", "rgb", "mask", "annualFlux", "monthlyFlux")
+        if (url := getattr(layers, f"{name}Url")) is not None
+    }
+    if layers.hourlyShadeUrls:
+        arrays["hourlyShade"] = [read(url) for url in layers.hourlyShadeUrls]
+    return arrays
+
+
+def _init_export_worker(dataset_path):
+    if dataset_path is not None:
+        dataset.corpus_holder.load(dataset_path)
+
+
+def _export_batch(args) -> bytes:
+    """The NDJSON lines of the building insights of a batch of locations;
+    the error envelope for invalid locations and those without a
+    building."""
+    locations, required_quality, fields, compression = args
+    mask = parse_field_mask(fields, BuildingInsightsProperties)
+    serializer = get_serializer()
+    lines = []
+    for location in locations:
+        try:
+            try:
+                if location is None:
+                    raise ValueError("malformed location")
+                latitude, longitude = location
+                lat_lon = LatLngProperties(latitude=latitude, longitude=longitude)
+            except ValueError:
+                raise InvalidArgumentError(
+                    "Invalid value at 'location': expected a latitude in "
+                    "[-90, 90] and a longitude in [-180, 180]."
+                )
+            builder = building_insights_builder(lat_lon, required_quality)
+            obj = builder.construct_model(mask)
+            lines.append(dumps_model(obj.properties, serializer, mask))
+        except SolarApiError as e:
+            lines.append(serializer.dumps(e.to_dict()))
+    lines.append(b"")
+    content = b"\n".join(lines)
+    return COMPRESSIONS[compression](content) if compression else content
+
+
+def _lat_lng_pairs(locations: Iterable) -> Iterator[tuple[float, float] | None]:
+    """The latitude and longitude of each of `locations`, or None for those
+    that are not a pair of numbers, answered with an error line."""
+    for location in locations:
+        if isinstance(location, LatLngProperties):
+            yield location.latitude, location.longitude
+            continue
+        try:
+            latitude, longitude = location
+            yield float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            yield None
+
+
+def _csv_locations(lines: Iterable[str]) -> Iterator[list[str]]:
+    """The latitude and longitude of the rows of CSV `lines`, from their
+    first two columns; a header row and blank rows are left out. Rows
+    missing a column are passed on as they are, to be reported."""
+    rows = (row for row in csv.reader(lines) if any(cell.strip() for cell in row))
+    for i, row in enumerate(rows):
+        if i == 0:
+            try:
+                float(row[0])
+            except ValueError:
+                continue
+        yield row[:2]
+
+
+def export_building_insights(
+    path,
+    locations: Iterable,
+    required_quality: Literal[
+        "IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"
+    ] = None,
+    fields: str = None,
+    workers: int = None,
+    batch_size: int = 256,
+    compression: Literal["gzip", "bz2", "xz"] = None,
+    dataset_path=None,
+) -> int:
+    """Write the building insights of `locations`, `LatLngProperties` or
+    `(latitude, longitude)` pairs, to `path` as NDJSON: one line per
+    location, in order, with the error envelope of the API for locations
+    without a building or that are invalid, e.g. not two numbers. Returns
+    the number of lines.
+
+    Batches of `batch_size` locations are built in a process pool, from
+    the corpus at `dataset_path` or else the configured one. `locations`
+    is read as batches are submitted and at most two batches per worker
+    are in flight, so memory use does not grow with the input. With
+    `compression`, by default after the suffix of `path` (`.gz`, `.bz2` or
+    `.xz`), the workers compress their batches too."""
+    # Checked here: the workers would only fail once the output is open.
+    parse_field_mask(fields, BuildingInsightsProperties)
+    workers = workers or os.cpu_count()
+    path = Path(path)
+    compression = compression or COMPRESSION_SUFFIXES.get(path.suffix)
+    pairs = _lat_lng_pairs(locations)
+    batches = iter(lambda: list(itertools.islice(pairs, batch_size)), [])
+
+    count = 0
+    with (
+        open(path, "wb") as output,
+        ProcessPoolExecutor(
+            workers, initializer=_init_export_worker, initargs=(dataset_path,)
+        ) as pool,
+    ):
+        pending = deque()
+        for batch in batches:
+            count += len(batch)
+            task = (batch, required_quality, fields, compression)
+            pending.append(pool.submit(_export_batch, task))
+            if len(pending) >= 2 * workers:
+                output.write(pending.popleft().result())
+        while pending:
+            output.write(pending.popleft().result())
+    return count
+
+
+def _generate_band(args) -> dict[str, np.ndarray]:
+    seed, count, south, west, north, east, grid = args
+    chunk = randomizer.generate_buildings(seed, count, south, west, north, east)
+    return sort_by_cell(chunk, Grid(**grid))
+
+
+def build_dataset(
+    path,
+    count: int,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    seed: int = 0,
+    workers: int = None,
+    region_code: str = "US",
+    administrative_area: str = "CA",
+) -> Grid:
+    """Generate `count` synthetic buildings over a bounding box into a
+    corpus file.
+
+    The bounding box is cut into bands of grid rows, generated in a process
+    pool and written in band order, so the file comes out sorted by cell
+    without a global sort. At most two bands per worker are in flight."""
+    workers = workers or os.cpu_count()
+    grid = Grid.for_count(count, south, west, north, east)
+    # The band layout, hence the output, does not depend on `workers`.
+    bands = int(min(grid.rows, max(64, -(-count // 20_000))))
+    band_rows = np.round(np.linspace(0, grid.rows, bands + 1)).astype(int)
+    band_counts = np.diff(np.round(band_rows / grid.rows * count).astype(int))
+    # Keep generated points clear of band edges so rounding never assigns
+    # a building to a row of the neighbouring band.
+    margin = grid.cell_height * 1e-6
+    tasks = [
+        (
+            (seed, band),
+            int(band_counts[band]),
+            south + band_rows[band] * grid.cell_height + margin,
+            west,
+            south + band_rows[band + 1] * grid.cell_height - margin,
+            east,
+            grid.to_dict(),
+        )
+        for band in range(bands)
+    ]
+
+    metadata = {"region_code": region_code, "administrative_area": administrative_area}
+    with (
+        CorpusWriter(path, grid, metadata) as writer,
+        ProcessPoolExecutor(workers) as pool,
+    ):
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_generate_band, task))
+            if len(pending) >= 2 * workers:
+                writer.append(pending.popleft().result())
+        while pending:
+            writer.append(pending.popleft().result())
+    return grid
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="solar-api-mock")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser(
+        "build-dataset", help="Generate a synthetic building corpus file."
+    )
+    build.add_argument("output", help="Path of the corpus file to write.")
+    build.add_argument("-n", "--count", type=int, required=True)
+    build.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+        default=(37.2, -122.5, 37.9, -121.7),
+    )
+    build.add_argument("--seed", type=int, default=0)
+    build.add_argument("-j", "--workers", type=int, default=None)
+    build.add_argument("--region-code", default="US")
+    build.add_argument("--administrative-area", default="CA")
+
+    export = commands.add_parser(
+        "export-insights",
+        help="Write the building insights of locations to an NDJSON file.",
+    )
+    export.add_argument(
+        "locations",
+        help="CSV file of latitude and longitude columns, optionally with a header "
+        "row and further columns, or - for standard input.",
+    )
+    export.add_argument(
+        "output", help="Path of the NDJSON file; compressed after .gz/.bz2/.xz."
+    )
+    export.add_argument("--dataset", help="Corpus file; else the configured one.")
+    export.add_argument("--required-quality", choices=dataset.QUALITIES, default=None)
+    export.add_argument("--fields", default=None)
+    export.add_argument("-j", "--workers", type=int, default=None)
+    export.add_argument("--batch-size", type=int, default=256)
+
+    args = parser.parse_args(argv)
+    if args.command == "build-dataset":
+        build_dataset(
+            args.output,
+            args.count,
+            *args.bbox,
+            seed=args.seed,
+            workers=args.workers,
+            region_code=args.region_code,
+            administrative_area=args.administrative_area,
+        )
+    elif args.command == "export-insights":
+        with (
+            sys.stdin if args.locations == "-" else open(args.locations, newline="")
+        ) as lines:
+            export_building_insights(
+                args.output,
+                _csv_locations(lines),
+                required_quality=args.required_quality,
+                fields=args.fields,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                dataset_path=args.dataset,
+            )
+
+
+if __name__ == "__main__":
+    cli()
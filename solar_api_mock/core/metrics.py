@@ -0,0 +1,311 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Instruments are plain counters updated from the event loop thread, cheap
+enough to sit on the request path: an observation is a `perf_counter`
+difference and a bisection over the bucket bounds. Each worker process
+keeps its own registry."""
+
+import asyncio
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Bounds in seconds, dense below a millisecond where most stages fall.
+BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value)}"' for name, value in zip(names, values, strict=True)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def samples(self) -> list[str]:
+        return []
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """A gauge either set by the instrumented code or, given `collect`,
+    read when the registry is rendered."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        collect: Callable[[], dict[tuple, float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> list[str]:
+        values = self.collect() if self.collect is not None else self.values
+        return [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Per label values: a count per bucket (the last one is +Inf), then
+        # the sum of the observations.
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labels) -> int:
+        counts = self.values.get(labels)
+        return sum(counts[:-1]) if counts is not None else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        bounds = [*self.buckets, float("inf")]
+        for key, counts in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_labels(self.labels, key)} {_number(counts[-1])}"
+            )
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "solar_api_mock_stage_seconds",
+        "Time spent in each stage of the handling of a request.",
+        ("schema", "stage"),
+    )
+)
+COMPRESSION_SECONDS = REGISTRY.register(
+    Histogram(
+        "solar_api_mock_compression_seconds",
+        "Time spent compressing response bodies, by encoding.",
+        ("encoding",),
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "solar_api_mock_request_seconds",
+        "Time from the receipt of a request to the end of its response.",
+        ("route", "status"),
+    )
+)
+REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge(
+        "solar_api_mock_requests_in_flight",
+        "Requests received and not yet answered.",
+    )
+)
+CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "solar_api_mock_cache_lookups_total",
+        "Lookups in in-process caches, by cache and result (hit or miss).",
+        ("cache", "result"),
+    )
+)
+COVERAGE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "solar_api_mock_coverage_lookups_total",
+        "Requested points checked against the corpus coverage, by result.",
+        ("result",),
+    )
+)
+
+INJECTED_FAULTS = REGISTRY.register(
+    Counter(
+        "solar_api_mock_injected_faults_total",
+        "Delays and errors injected into calls, by route and fault (latency or the error status).",
+        ("route", "fault"),
+    )
+)
+
+RATE_LIMITED = REGISTRY.register(
+    Counter(
+        "solar_api_mock_rate_limited_total",
+        "Calls rejected as over their API key's limits, by route and limit (rate or daily).",
+        ("route", "limit"),
+    )
+)
+
+
+RATE_LIMIT_EVICTIONS = REGISTRY.register(
+    Counter(
+        "solar_api_mock_rate_limit_evictions_total",
+        "Token buckets dropped to make room for another in a full bucket table, by route of the new bucket.",
+        ("route",),
+    )
+)
+
+
+class InstrumentedThreadPool(ThreadPoolExecutor):
+    """A thread pool counting its running and queued tasks. Installed as
+    the default executor of the event loop, it is the pool that
+    `asyncio.to_thread` uses."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counts = threading.Lock()
+        self.busy = self.queued = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._counts:
+            self.queued += 1
+
+        def run():
+            with self._counts:
+                self.queued -= 1
+                self.busy += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counts:
+                    self.busy -= 1
+
+        return super().submit(run)
+
+
+thread_pool: InstrumentedThreadPool = None
+
+
+def install_thread_pool() -> InstrumentedThreadPool:
+    """Make a measured pool the default executor of the running loop."""
+    global thread_pool
+    thread_pool = InstrumentedThreadPool(thread_name_prefix="solar-api-mock")
+    asyncio.get_running_loop().set_default_executor(thread_pool)
+    return thread_pool
+
+
+def _thread_pool_usage() -> dict[tuple, float]:
+    pool = thread_pool
+    return {
+        ("busy",): pool.busy if pool is not None else 0,
+        ("queued",): pool.queued if pool is not None else 0,
+    }
+
+
+THREAD_POOL_TASKS = REGISTRY.register(
+    Gauge(
+        "solar_api_mock_thread_pool_tasks",
+        "Tasks of the default executor of the event loop, used by `asyncio.to_thread`, running (busy) or waiting for a thread (queued).",
+        ("state",),
+        collect=_thread_pool_usage,
+    )
+)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
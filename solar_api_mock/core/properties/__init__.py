@@ -1,45 +1,94 @@
-from .building_insights import BuildingInsightsProperties
-from .common import (
-    DateProperties,
-    LatLngBoxProperties,
-    LatLngProperties,
-    MoneyProperties,
-)
-from .data_layers import DataLayersProperties
-from .financial_analysis import (
-    CashPurchaseSavingsProperties,
-    FinancedPurchaseSavingsProperties,
-    FinancialAnalysisProperties,
-    FinancialDetailsProperties,
-    LeasingSavingsProperties,
-    SavingsOverTimeProperties,
-)
-from .solar_potential import (
-    RoofSegmentSizeAndSunshineStatsProperties,
-    RoofSegmentSummaryProperties,
-    SizeAndSunshineStatsProperties,
-    SolarPanelConfigProperties,
-    SolarPanelProperties,
-    SolarPotentialProperties,
-)
+"""Properties models of the API schemas.
+
+Submodules are imported on first access to one of their models, so that
+importing a single model does not build all of them."""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+_SUBMODULES = {
+    "BuildingInsightsProperties": "building_insights",
+    "DateProperties": "common",
+    "LatLngBoxProperties": "common",
+    "LatLngProperties": "common",
+    "MoneyProperties": "common",
+    "DataLayersProperties": "data_layers",
+    "CashPurchaseSavingsProperties": "financial_analysis",
+    "FinancedPurchaseSavingsProperties": "financial_analysis",
+    "FinancialAnalysisProperties": "financial_analysis",
+    "FinancialDetailsProperties": "financial_analysis",
+    "LeasingSavingsProperties": "financial_analysis",
+    "SavingsOverTimeProperties": "financial_analysis",
+    "DistributionBucketProperties": "region",
+    "RegionSummaryProperties": "region",
+    "RoofSegmentSizeAndSunshineStatsProperties": "solar_potential",
+    "RoofSegmentSummaryProperties": "solar_potential",
+    "SizeAndSunshineStatsProperties": "solar_potential",
+    "SolarPanelConfigProperties": "solar_potential",
+    "SolarPanelProperties": "solar_potential",
+    "SolarPotentialProperties": "solar_potential",
+}
 
 __all__ = [
-    MoneyProperties,
-    DateProperties,
-    LatLngBoxProperties,
-    LatLngProperties,
-    BuildingInsightsProperties,
-    DataLayersProperties,
-    SolarPotentialProperties,
-    SolarPanelConfigProperties,
-    SolarPanelProperties,
-    SizeAndSunshineStatsProperties,
-    RoofSegmentSummaryProperties,
-    RoofSegmentSizeAndSunshineStatsProperties,
-    FinancialAnalysisProperties,
-    FinancedPurchaseSavingsProperties,
-    CashPurchaseSavingsProperties,
-    LeasingSavingsProperties,
-    SavingsOverTimeProperties,
-    FinancialDetailsProperties,
+    "BuildingInsightsProperties",
+    "DateProperties",
+    "LatLngBoxProperties",
+    "LatLngProperties",
+    "MoneyProperties",
+    "DataLayersProperties",
+    "CashPurchaseSavingsProperties",
+    "FinancedPurchaseSavingsProperties",
+    "FinancialAnalysisProperties",
+    "FinancialDetailsProperties",
+    "LeasingSavingsProperties",
+    "SavingsOverTimeProperties",
+    "DistributionBucketProperties",
+    "RegionSummaryProperties",
+    "RoofSegmentSizeAndSunshineStatsProperties",
+    "RoofSegmentSummaryProperties",
+    "SizeAndSunshineStatsProperties",
+    "SolarPanelConfigProperties",
+    "SolarPanelProperties",
+    "SolarPotentialProperties",
 ]
+
+
+def __getattr__(name: str):
+    submodule = _SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{submodule}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
+
+
+if TYPE_CHECKING:
+    from .building_insights import BuildingInsightsProperties
+    from .common import (
+        DateProperties,
+        LatLngBoxProperties,
+        LatLngProperties,
+        MoneyProperties,
+    )
+    from .data_layers import DataLayersProperties
+    from .financial_analysis import (
+        CashPurchaseSavingsProperties,
+        FinancedPurchaseSavingsProperties,
+        FinancialAnalysisProperties,
+        FinancialDetailsProperties,
+        LeasingSavingsProperties,
+        SavingsOverTimeProperties,
+    )
+    from .region import DistributionBucketProperties, RegionSummaryProperties
+    from .solar_potential import (
+        RoofSegmentSizeAndSunshineStatsProperties,
+        RoofSegmentSummaryProperties,
+        SizeAndSunshineStatsProperties,
+        SolarPanelConfigProperties,
+        SolarPanelProperties,
+        SolarPotentialProperties,
+    )
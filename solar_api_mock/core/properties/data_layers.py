@@ -29,10 +29,12 @@ class DataLayersProperties(SchemaProperties):
         locations outside our coverage area will be invalid, and a few
         locations inside the coverage area, where we were unable to
         calculate flux, will also be invalid.""",
+        default=None,
     )
     maskUrl: str = Field(
         description="""The URL for the building mask image: one bit per
         pixel saying whether that pixel is considered to be part of a rooftop or not.""",
+        default=None,
     )
     imageryQuality: Literal[
         "IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"
@@ -44,6 +46,7 @@ class DataLayersProperties(SchemaProperties):
         broken down by month) of the region. Values are kWh/kW/year.
         The GeoTIFF pointed to by this URL will contain twelve bands,
         corresponding to January...December, in order.""",
+        default=None,
     )
     imageryDate: DateProperties = Field(
         description="""When the source imagery (from which all the other
@@ -52,11 +55,13 @@ class DataLayersProperties(SchemaProperties):
     )
     rgbUrl: str = Field(
         description="The URL for an image of RGB data (aerial photo) of the region.",
+        default=None,
     )
     dsmUrl: str = Field(
         description="""The URL for an image of the DSM (Digital Surface Model) of the region.
         Values are in meters above EGM96 geoid (i.e., sea level).
         Invalid locations (where we don't have data) are stored as -9999.""",
+        default=None,
     )
     hourlyShadeUrls: list[str] = Field(
         description="""Twelve URLs for hourly shade, corresponding to January...December, in order.
@@ -79,6 +84,7 @@ class DataLayersProperties(SchemaProperties):
         the `month - 1`st URL (indexing from zero), `[hour]` is indexing into the channels,
         and a final non-zero result means "sunny". There are no leap days, and DST
         doesn\'t exist (all days are 24 hours long; noon is always "standard time" noon).""",
+        default=None,
     )
     imageryProcessedDate: DateProperties = Field(
         description="When processing was completed on this imagery.", default=None
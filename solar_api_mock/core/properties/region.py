@@ -0,0 +1,54 @@
+from pydantic import Field
+
+from solar_api_mock.core.properties.base import SchemaProperties
+from solar_api_mock.core.properties.common import LatLngBoxProperties
+
+
+class DistributionBucketProperties(SchemaProperties):
+    """Number of buildings whose value lies in a range."""
+
+    lowerBound: float = Field(
+        description="Inclusive lower bound of the range.",
+    )
+    upperBound: float = Field(
+        description="Exclusive upper bound of the range. Unset for the last range, which is unbounded.",
+        default=None,
+    )
+    buildingsCount: int = Field(
+        description="Buildings whose value lies in the range.",
+    )
+
+
+class RegionSummaryProperties(SchemaProperties):
+    """Aggregate solar potential of the buildings whose center lies in a
+    bounding box."""
+
+    boundingBox: LatLngBoxProperties = Field(
+        description="The bounding box summarized.",
+    )
+    buildingsCount: int = Field(
+        description="Buildings whose center lies in the box.",
+    )
+    maxArrayPanelsCount: int = Field(
+        description="Total of the `maxArrayPanelsCount` of the buildings.",
+    )
+    maxArrayAreaMeters2: float = Field(
+        description="Total of the `maxArrayAreaMeters2` of the buildings.",
+    )
+    yearlyEnergyDcKwh: float = Field(
+        description="Total yearly DC energy of the largest array of each building, in kWh.",
+    )
+    carbonOffsetKgPerYear: float = Field(
+        description="""CO2 emissions avoided per year by the largest arrays,
+        in kg: the yearly energy of each building weighted by its
+        `carbonOffsetFactorKgPerMwh`.""",
+    )
+    maxArrayPanelsCountDistribution: list[DistributionBucketProperties] = Field(
+        description="Distribution of the `maxArrayPanelsCount` of the buildings.",
+    )
+    yearlyEnergyDcKwhDistribution: list[DistributionBucketProperties] = Field(
+        description="Distribution of the yearly DC energy of the buildings.",
+    )
+    carbonOffsetKgPerYearDistribution: list[DistributionBucketProperties] = Field(
+        description="Distribution of the yearly carbon offset of the buildings.",
+    )
@@ -0,0 +1,192 @@
+"""Per-API-key rate limits and daily quotas, enforced like the Solar API.
+
+Every API key gets a token bucket per route, refilled at the
+`queries_per_second` of its `RateLimit`, and a count of its calls of the
+day. The buckets are kept in a table of fixed-size slots, in memory or
+in a file every worker maps, so that limits hold across the workers of a
+deployment; updates take an exclusive lock on the file. The table is
+sized from the configured limits; when it fills up around a bucket, the
+least recently used of its neighbours is evicted, which resets its
+limits, and evictions are logged and counted."""
+
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from solar_api_mock.core import metrics
+from solar_api_mock.core.errors import ResourceExhaustedError
+from solar_api_mock.core.settings import RateLimit, Settings
+
+logger = logging.getLogger(__name__)
+
+SLOTS = 4096
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Bucket id (0 for a free slot), tokens, time of the last update, day of
+# the calls counted and their count.
+_SLOT = struct.Struct("<Qddii")
+# Slots tried from the one a bucket hashes to before taking it over.
+_PROBES = 32
+
+
+def _bucket_id(key: str, route: str) -> int:
+    digest = hashlib.blake2b(f"{key}\0{route}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class BucketStore:
+    """Token buckets in memory, or in the file at `path` when given."""
+
+    def __init__(self, path: Path = None, slots: int = SLOTS):
+        self._lock = threading.Lock()
+        self._fd = None
+        if path is None:
+            self._buffer = bytearray(slots * _SLOT.size)
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self.locked():
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, slots * _SLOT.size)
+            self._buffer = mmap.mmap(self._fd, 0)
+        self.slots = len(self._buffer) // _SLOT.size
+        self.evictions = 0
+
+    @contextmanager
+    def locked(self):
+        """Exclude the other threads and, for a file, the other processes."""
+        with self._lock:
+            if self._fd is None:
+                yield
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, bucket_id: int) -> tuple[int, bool]:
+        """The offset of the slot of `bucket_id`, claimed if need be, and
+        whether another bucket was evicted from it: when the slots around
+        it are all taken, the one updated longest ago is reused."""
+        first = bucket_id % self.slots
+        oldest = None
+        for probe in range(min(_PROBES, self.slots)):
+            offset = (first + probe) % self.slots * _SLOT.size
+            slot_id, _, updated, _, _ = _SLOT.unpack_from(self._buffer, offset)
+            if slot_id in (bucket_id, 0):
+                return offset, False
+            if oldest is None or updated < oldest[1]:
+                oldest = offset, updated
+        return oldest[0], True
+
+    def take(self, key: str, route: str, limit: RateLimit, now: float, day: int):
+        """Count a call of `key` to `route` at time `now`, unless it is over
+        `limit`: then return the limit exceeded, `rate` or `daily`."""
+        bucket_id = _bucket_id(key, route)
+        burst = limit.burst or math.ceil(limit.queries_per_second or 1)
+        with self.locked():
+            offset, evicted = self._offset(bucket_id)
+            if evicted:
+                self._evicted(route)
+            slot_id, tokens, updated, slot_day, used = _SLOT.unpack_from(
+                self._buffer, offset
+            )
+            if slot_id != bucket_id:
+                tokens, updated, slot_day, used = burst, now, day, 0
+            if slot_day != day:
+                slot_day, used = day, 0
+            if limit.queries_per_second is not None:
+                elapsed = max(now - updated, 0.0)
+                tokens = min(burst, tokens + elapsed * limit.queries_per_second)
+            exceeded = None
+            if limit.queries_per_day is not None and used >= limit.queries_per_day:
+                exceeded = "daily"
+            elif limit.queries_per_second is not None and tokens < 1:
+                exceeded = "rate"
+            else:
+                tokens -= limit.queries_per_second is not None
+                used += 1
+            _SLOT.pack_into(
+                self._buffer, offset, bucket_id, tokens, now, slot_day, used
+            )
+        return exceeded
+
+    def _evicted(self, route: str):
+        metrics.RATE_LIMIT_EVICTIONS.inc(route)
+        self.evictions += 1
+        if self.evictions == 1:
+            logger.warning(
+                "The %d token buckets are full: evicting buckets resets their "
+                "limits; see solar_api_mock_rate_limit_evictions_total",
+                self.slots,
+            )
+
+
+def table_slots(
+    limits: dict[str, RateLimit], key_limits: dict[str, dict[str, RateLimit]]
+) -> int:
+    """Slots for the buckets of `limits` and `key_limits`: at least `SLOTS`,
+    and four per bucket of the keys named in the limits, so that probes
+    stay short."""
+    routes = set(limits)
+    buckets = len(routes) + sum(
+        len(routes | set(key_routes)) for key_routes in key_limits.values()
+    )
+    return max(SLOTS, 1 << (4 * buckets - 1).bit_length())
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: dict[str, RateLimit] = None,
+        key_limits: dict[str, dict[str, RateLimit]] = None,
+        store: BucketStore = None,
+        clock=time.time,
+    ):
+        self.limits = limits or {}
+        self.key_limits = key_limits or {}
+        self.store = store or BucketStore()
+        self.clock = clock
+
+    def check(self, key: str | None, route: str):
+        """Count a call of `key` to `route`. Raises `ResourceExhaustedError`
+        when it is over a limit; calls without a key share one bucket."""
+        key = key or ""
+        limit = self.key_limits.get(key, {}).get(route) or self.limits.get(route)
+        if limit is None:
+            return
+        now = self.clock()
+        day = datetime.fromtimestamp(now, QUOTA_TIMEZONE).toordinal()
+        exceeded = self.store.take(key, route, limit, now, day)
+        if exceeded is None:
+            return
+        metrics.RATE_LIMITED.inc(route, exceeded)
+        period = "day" if exceeded == "daily" else "second"
+        raise ResourceExhaustedError(
+            f"Quota exceeded for quota metric 'Requests' and limit 'Requests per "
+            f"{period}' of service 'solar.googleapis.com' for consumer "
+            f"'api_key:{key}'."
+        )
+
+
+def from_settings(settings: Settings) -> RateLimiter:
+    store = None
+    if settings.rate_limits or settings.key_rate_limits:
+        store = BucketStore(
+            settings.rate_limit_store,
+            table_slots(settings.rate_limits, settings.key_rate_limits),
+        )
+    return RateLimiter(settings.rate_limits, settings.key_rate_limits, store)
+
+
+limiter = RateLimiter()
@@ -0,0 +1,160 @@
+"""Synthetic building generation.
+
+Buildings are produced in chunks of plain NumPy columns so that chunks
+can be generated in worker processes and streamed to a corpus file
+without ever materialising pydantic models."""
+
+import numpy as np
+
+from solar_api_mock.core.dataset import PANEL_DTYPE, QUALITIES
+
+QUALITY_WEIGHTS = {"HIGH": 0.6, "MEDIUM": 0.25, "LOW": 0.1, "BASE": 0.05}
+PANEL_HEIGHT_METERS = 1.879
+PANEL_WIDTH_METERS = 1.045
+PANEL_CAPACITY_WATTS = 400
+PANEL_LIFETIME_YEARS = 20
+MAX_ROOF_SEGMENTS = 4
+SUNSHINE_QUANTILES = 11
+METERS_PER_DEGREE = 111_320.0
+
+_PLACE_ID_ALPHABET = np.frombuffer(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_", dtype="u1"
+)
+
+
+def _random_digits(rng: np.random.Generator, n: int, width: int) -> np.ndarray:
+    digits = rng.integers(ord("0"), ord("9") + 1, size=(n, width), dtype="u1")
+    return digits.view(f"S{width}").ravel()
+
+
+def _random_place_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    body = _PLACE_ID_ALPHABET[rng.integers(0, len(_PLACE_ID_ALPHABET), (n, 23))]
+    prefix = np.broadcast_to(np.frombuffer(b"ChIJ", dtype="u1"), (n, 4))
+    return np.ascontiguousarray(np.hstack([prefix, body])).view("S27").ravel()
+
+
+def _random_dates(rng: np.random.Generator, n: int, first_year: int) -> np.ndarray:
+    years = rng.integers(first_year, first_year + 5, n)
+    months = rng.integers(1, 13, n)
+    days = rng.integers(1, 29, n)
+    return (years * 10_000 + months * 100 + days).astype("<i4")
+
+
+def generate_buildings(
+    seed: int,
+    count: int,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    panels_count: int = None,
+) -> dict[str, np.ndarray]:
+    """Generate `count` buildings uniformly spread over a bounding box.
+
+    Returns a mapping of building columns plus a `panels` structured array
+    holding the panels of every building back to back, in building order.
+    The panels of a building are sorted by decreasing yearly energy, like
+    the layouts returned by the real API. `panels_count` forces every
+    building to hold exactly that many panels, with a footprint to match."""
+    rng = np.random.default_rng(seed)
+
+    latitude = rng.uniform(south, north, count)
+    longitude = rng.uniform(west, east, count)
+    cos_lat = np.cos(np.radians(latitude))
+
+    panel_area = PANEL_HEIGHT_METERS * PANEL_WIDTH_METERS
+    panel_fill = rng.uniform(0.5, 0.8, count)
+    if panels_count is None:
+        ground_area = np.clip(rng.lognormal(np.log(150.0), 0.6, count), 40.0, 20_000.0)
+    else:
+        ground_area = np.full(count, (panels_count + 1) * panel_area) / panel_fill
+    aspect = rng.uniform(0.6, 1.6, count)
+    width_m = np.sqrt(ground_area * aspect)
+    height_m = ground_area / width_m
+    half_lat = height_m / 2 / METERS_PER_DEGREE
+    half_lng = width_m / 2 / (METERS_PER_DEGREE * cos_lat)
+
+    segment_count = rng.integers(1, MAX_ROOF_SEGMENTS + 1, count).astype("u1")
+    segment_mask = np.arange(MAX_ROOF_SEGMENTS) < segment_count[:, None]
+    segment_share = rng.gamma(2.0, 1.0, (count, MAX_ROOF_SEGMENTS)) * segment_mask
+    segment_share /= segment_share.sum(axis=1, keepdims=True)
+    segment_pitch = rng.uniform(0.0, 35.0, (count, MAX_ROOF_SEGMENTS)) * segment_mask
+    segment_azimuth = (
+        rng.integers(0, 4, (count, MAX_ROOF_SEGMENTS)) * 90.0
+        + rng.normal(0.0, 5.0, (count, MAX_ROOF_SEGMENTS))
+    ) % 360.0
+    segment_ground_area = ground_area[:, None] * segment_share
+    segment_area = segment_ground_area / np.cos(np.radians(segment_pitch))
+    area = segment_area.sum(axis=1)
+
+    max_sunshine = np.clip(
+        2000.0 - 12.0 * np.abs(latitude) + rng.normal(0.0, 60.0, count), 600.0, 2600.0
+    )
+    quantiles = (
+        np.sort(rng.uniform(0.2, 1.0, (count, SUNSHINE_QUANTILES)), axis=1)
+        * max_sunshine[:, None]
+    )
+    quantiles[:, -1] = max_sunshine
+
+    if panels_count is None:
+        panels_count = np.floor(area * panel_fill / panel_area).astype("<i4")
+    else:
+        panels_count = np.full(count, panels_count, dtype="<i4")
+
+    quality = rng.choice(
+        [QUALITIES.index(q) for q in QUALITY_WEIGHTS],
+        size=count,
+        p=list(QUALITY_WEIGHTS.values()),
+    ).astype("u1")
+
+    owner = np.repeat(np.arange(count), panels_count)
+    panels = np.empty(len(owner), dtype=PANEL_DTYPE)
+    panels["latitude"] = (
+        latitude[owner] + rng.uniform(-1.0, 1.0, len(owner)) * (half_lat[owner])
+    )
+    panels["longitude"] = (
+        longitude[owner] + rng.uniform(-1.0, 1.0, len(owner)) * (half_lng[owner])
+    )
+    panels["segment_index"] = np.floor(
+        rng.uniform(0.0, 1.0, len(owner)) * segment_count[owner]
+    )
+    panels["orientation"] = rng.integers(1, 3, len(owner))
+    energy = (
+        PANEL_CAPACITY_WATTS
+        / 1000.0
+        * max_sunshine[owner]
+        * rng.uniform(0.7, 1.0, len(owner))
+        * np.cos(np.radians(segment_pitch[owner, panels["segment_index"]])) ** 0.5
+    )
+    panels["yearly_energy_dc_kwh"] = energy
+    panels = panels[np.lexsort((-energy, owner))]
+
+    return {
+        "place_id": _random_place_ids(rng, count),
+        "latitude": latitude,
+        "longitude": longitude,
+        "sw_latitude": latitude - half_lat,
+        "sw_longitude": longitude - half_lng,
+        "ne_latitude": latitude + half_lat,
+        "ne_longitude": longitude + half_lng,
+        "imagery_quality": quality,
+        "imagery_date": _random_dates(rng, count, 2017),
+        "imagery_processed_date": _random_dates(rng, count, 2022),
+        "postal_code": _random_digits(rng, count, 5),
+        "statistical_area": _random_digits(rng, count, 11),
+        "area_meters2": area,
+        "ground_area_meters2": ground_area,
+        "sunshine_quantiles": quantiles,
+        "max_array_panels_count": panels_count,
+        "max_array_area_meters2": panels_count * panel_area,
+        "max_sunshine_hours_per_year": max_sunshine,
+        "carbon_offset_factor_kg_per_mwh": rng.uniform(300.0, 900.0, count),
+        "yearly_energy_dc_kwh": np.bincount(owner, weights=energy, minlength=count),
+        "plane_height_meters": rng.uniform(3.0, 15.0, count),
+        "segment_count": segment_count,
+        "segment_pitch_degrees": segment_pitch,
+        "segment_azimuth_degrees": segment_azimuth,
+        "segment_area_meters2": segment_area,
+        "segment_ground_area_meters2": segment_ground_area,
+        "panels": panels,
+    }
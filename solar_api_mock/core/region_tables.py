@@ -0,0 +1,143 @@
+"""Summed-area tables of the buildings of a corpus, for region summaries.
+
+For each cell of the corpus grid, the number of buildings, the totals of
+`regions.REGION_TOTALS` and the bucket counts of the distributions of
+`regions.REGION_DISTRIBUTIONS` are summed, and each of these tables is
+turned into its two-dimensional prefix sums. The aggregates of any block
+of cells are then four lookups per table, whatever its size. A bounding
+box is answered from the block of cells strictly inside it, plus a scan
+of the buildings of the ring of cells its edges cross, so the result is
+exact and its cost only grows with the perimeter of the box."""
+
+import numpy as np
+
+from solar_api_mock.core.regions import (
+    REGION_DISTRIBUTIONS,
+    REGION_TOTALS,
+    TABLES,
+    in_box,
+)
+
+
+def building_values(columns, rows=slice(None)) -> dict[str, np.ndarray]:
+    """The summarized values of the buildings at `rows` of `columns`, the
+    building columns of a corpus or of a chunk written to one."""
+    energy = np.asarray(columns["yearly_energy_dc_kwh"][rows], dtype=np.float64)
+    factor = np.asarray(
+        columns["carbon_offset_factor_kg_per_mwh"][rows], dtype=np.float64
+    )
+    return {
+        "maxArrayPanelsCount": np.asarray(
+            columns["max_array_panels_count"][rows], dtype=np.float64
+        ),
+        "maxArrayAreaMeters2": np.asarray(
+            columns["max_array_area_meters2"][rows], dtype=np.float64
+        ),
+        "yearlyEnergyDcKwh": energy,
+        "carbonOffsetKgPerYear": energy / 1000 * factor,
+    }
+
+
+def cell_aggregates(values: dict[str, np.ndarray], cells, size: int) -> np.ndarray:
+    """The aggregates, in `RegionSummaryBuilder._aggregates` order, of the
+    buildings of `values` in each of `size` cells, given the cell of each."""
+    tables = np.zeros((TABLES, size))
+    tables[0] = np.bincount(cells, minlength=size)
+    for i, name in enumerate(REGION_TOTALS, start=1):
+        tables[i] = np.bincount(cells, weights=values[name], minlength=size)
+    i = 1 + len(REGION_TOTALS)
+    for name, bounds in REGION_DISTRIBUTIONS.items():
+        buckets = np.searchsorted(bounds, values[name], side="right") - 1
+        counts = np.bincount(
+            buckets * size + cells, minlength=len(bounds) * size
+        ).reshape(len(bounds), size)
+        tables[i : i + len(bounds)] = counts
+        i += len(bounds)
+    return tables
+
+
+def add_cell_aggregates(tables: np.ndarray, values: dict[str, np.ndarray], cells):
+    """Add the aggregates of the buildings of `values` to the per-cell
+    `tables`, given the cell of each. Only the cells holding buildings are
+    aggregated, not the whole grid."""
+    touched, index = np.unique(cells, return_inverse=True)
+    tables[:, touched] += cell_aggregates(values, index, len(touched))
+
+
+def summed_area(tables: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """The prefix sums of per-cell `tables` over the grid, with a leading
+    row and column of zeros: `[t, r, c]` sums the cells above and left of
+    row `r` and column `c`."""
+    areas = np.zeros((len(tables), rows + 1, cols + 1))
+    areas[:, 1:, 1:] = tables.reshape(len(tables), rows, cols).cumsum(1).cumsum(2)
+    return areas
+
+
+def _block(areas: np.ndarray, row_lo: int, row_hi: int, col_lo: int, col_hi: int):
+    """The aggregates of the cells of rows and columns from `row_lo` to
+    `row_hi` and from `col_lo` to `col_hi`, inclusive."""
+    if row_lo > row_hi or col_lo > col_hi:
+        return np.zeros(len(areas))
+    return (
+        areas[:, row_hi + 1, col_hi + 1]
+        - areas[:, row_lo, col_hi + 1]
+        - areas[:, row_hi + 1, col_lo]
+        + areas[:, row_lo, col_lo]
+    )
+
+
+def _rows_of_cells(corpus, cells: np.ndarray) -> np.ndarray:
+    """The rows of the buildings in `cells`, across every quality partition."""
+    starts = corpus.cell_offsets[:, cells].ravel()
+    stops = corpus.cell_offsets[:, cells + 1].ravel()
+    lengths = stops - starts
+    total = int(lengths.sum())
+    # Concatenated ranges: each row is its offset in its cell plus the
+    # start of that cell.
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+def summarize(
+    corpus, south: float, west: float, north: float, east: float
+) -> np.ndarray:
+    """The aggregates of the buildings of `corpus` in the box of these
+    bounds."""
+    if west > east:
+        # Across the antimeridian: the parts on either side.
+        return summarize(corpus, south, west, north, 180.0) + summarize(
+            corpus, south, -180.0, north, east
+        )
+    grid = corpus.grid
+    (row_lo, row_hi), (col_lo, col_hi) = (
+        (int(v) for v in values)
+        for values in grid.row_col([south, north], [west, east])
+    )
+    aggregates = _block(
+        corpus.region_tables(), row_lo + 1, row_hi - 1, col_lo + 1, col_hi - 1
+    )
+
+    # The cells the edges of the box cross, holding buildings on both sides.
+    ring_rows = np.arange(row_lo, row_hi + 1)
+    ring_cols = np.arange(col_lo, col_hi + 1)
+    cells = np.unique(
+        np.concatenate(
+            [
+                row_lo * grid.cols + ring_cols,
+                row_hi * grid.cols + ring_cols,
+                ring_rows * grid.cols + col_lo,
+                ring_rows * grid.cols + col_hi,
+            ]
+        )
+    )
+    rows = _rows_of_cells(corpus, cells)
+    rows = rows[
+        in_box(south, west, north, east, corpus.latitude[rows], corpus.longitude[rows])
+    ]
+    if len(rows):
+        values = building_values(corpus.columns, rows)
+        aggregates = (
+            aggregates
+            + cell_aggregates(values, np.zeros(len(rows), dtype=np.int64), 1)[:, 0]
+        )
+    return aggregates
@@ -0,0 +1,34 @@
+"""What region summaries aggregate, and which buildings a region holds.
+
+Kept free of NumPy and of the properties models: the fixture builders and
+the corpus tables of `core.region_tables` both build on it."""
+
+# Length of a degree of latitude, or of longitude at the equator.
+METERS_PER_DEGREE = 111_320.0
+
+# Totals of region summaries, then the lower bounds of the buckets of
+# their distributions.
+REGION_TOTALS = (
+    "maxArrayPanelsCount",
+    "maxArrayAreaMeters2",
+    "yearlyEnergyDcKwh",
+    "carbonOffsetKgPerYear",
+)
+REGION_DISTRIBUTIONS = {
+    "maxArrayPanelsCount": (0, 10, 20, 50, 100, 200, 500, 1000),
+    "yearlyEnergyDcKwh": (0, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5),
+    "carbonOffsetKgPerYear": (0, 2.5e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5),
+}
+# Aggregates of a region: its number of buildings, their totals and the
+# bucket counts of their distributions.
+TABLES = 1 + len(REGION_TOTALS) + sum(map(len, REGION_DISTRIBUTIONS.values()))
+
+
+def in_box(south: float, west: float, north: float, east: float, latitude, longitude):
+    """Whether points, scalars or arrays, lie in the box of these bounds,
+    edges included. Boxes whose west edge is east of their east edge cross
+    the antimeridian."""
+    inside = (south <= latitude) & (latitude <= north)
+    if west <= east:
+        return inside & (west <= longitude) & (longitude <= east)
+    return inside & ((west <= longitude) | (longitude <= east))
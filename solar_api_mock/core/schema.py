@@ -1,9 +1,19 @@
+import bisect
+import sys
+from time import perf_counter
 from typing import Type
 
 from pydantic import BaseModel
 
-from solar_api_mock.core import properties
+from solar_api_mock.core import metrics, properties
+from solar_api_mock.core.errors import NotFoundError
+from solar_api_mock.core.field_mask import FieldMask
+from solar_api_mock.core.settings import get_settings
 from solar_api_mock.core.properties.base import SchemaProperties
+from solar_api_mock.core.regions import REGION_DISTRIBUTIONS, REGION_TOTALS, in_box
+
+# The building served without a corpus.
+FIXTURE_PLACE_ID = "ChIJh0CMPQW7j4ARLrRiVvmg6Vs"
 
 schemas = {
     "FinancialDetails": """Details of a financial analysis. Some of these details are already stored at higher levels (e.g., out of pocket cost). Total money amounts are over a lifetime period defined by the panel_lifetime_years field in SolarPotential. Note: The out of pocket cost of purchasing the panels is given in the out_of_pocket_cost field in CashPurchaseSavings.""",
@@ -25,6 +35,7 @@ schemas = {
     "SolarPanelConfig": """SolarPanelConfig describes a particular placement of solar panels on the roof.""",
     "LatLng": """An object that represents a latitude/longitude pair. This is expressed as a pair of doubles to represent degrees latitude and degrees longitude. Unless specified otherwise, this object must conform to the WGS84 standard. Values must be within normalized ranges.""",
     "LatLngBox": """A bounding box in lat/lng coordinates.""",
+    "RegionSummary": """Aggregate solar potential of the buildings whose center lies in a bounding box: totals, and distributions over fixed ranges, of the largest array of each building, its yearly energy and the carbon emissions it avoids.""",
 }
 
 
@@ -35,15 +46,22 @@ class SchemaModel(BaseModel):
 
 
 class SchemaBuilder:
+    # Set by `construct_model`: builders may skip the subtrees it leaves
+    # out, filling required fields with empty values.
+    fields: FieldMask = None
+
     def __init__(self, schema_name: str):
         if schema_name not in schemas:
             raise ValueError(f"Schema {schema_name} not found")
         self.schema_name = schema_name
 
-    def construct_model(self):
+    def construct_model(self, fields: FieldMask = None):
+        self.fields = fields
         PropertiesModel = getattr(properties, f"{self.schema_name}Properties")
 
+        start = perf_counter()
         properties_m = self._set_properties(PropertiesModel)
+        metrics.STAGE_SECONDS.observe(perf_counter() - start, self.schema_name, "build")
 
         return SchemaModel(
             name=self.schema_name,
@@ -63,7 +81,7 @@ class BuildingInsightsBuilder(SchemaBuilder):
         self, model: Type[properties.BuildingInsightsProperties]
     ) -> properties.BuildingInsightsProperties:
         return model(
-            name="buildings/ChIJh0CMPQW7j4ARLrRiVvmg6Vs",
+            name=f"buildings/{FIXTURE_PLACE_ID}",
             center=properties.LatLngProperties(
                 latitude=37.4449739, longitude=-122.13914659999998
             ),
@@ -291,3 +309,175 @@ class DataLayersBuilder(SchemaBuilder):
             ],
             imageryQuality="HIGH",
         )
+
+
+def box_bounds(box: properties.LatLngBoxProperties) -> tuple[float, ...]:
+    """The south, west, north and east bounds of `box`."""
+    return box.sw.latitude, box.sw.longitude, box.ne.latitude, box.ne.longitude
+
+
+class RegionSummaryBuilder(SchemaBuilder):
+    """Summarizes the buildings in `box`: the fixture building, if it lies
+    in it."""
+
+    def __init__(
+        self, box: properties.LatLngBoxProperties, schema_name="RegionSummary"
+    ):
+        super().__init__(schema_name)
+        self.box = box
+
+    def _aggregates(self) -> list[float]:
+        """The number of buildings in the box, then their `REGION_TOTALS`,
+        then the bucket counts of each of their `REGION_DISTRIBUTIONS`."""
+        building = BuildingInsightsBuilder()._set_properties(
+            properties.BuildingInsightsProperties
+        )
+        potential = building.solarPotential
+        configs = potential.solarPanelConfigs
+        energy = configs[-1].yearlyEnergyDcKwh if configs else 0.0
+        values = {
+            "maxArrayPanelsCount": potential.maxArrayPanelsCount,
+            "maxArrayAreaMeters2": potential.maxArrayAreaMeters2,
+            "yearlyEnergyDcKwh": energy,
+            "carbonOffsetKgPerYear": energy
+            / 1000
+            * potential.carbonOffsetFactorKgPerMwh,
+        }
+        inside = float(
+            in_box(
+                *box_bounds(self.box),
+                building.center.latitude,
+                building.center.longitude,
+            )
+        )
+        aggregates = [inside, *(values[name] * inside for name in REGION_TOTALS)]
+        for name, bounds in REGION_DISTRIBUTIONS.items():
+            bucket = bisect.bisect_right(bounds, values[name]) - 1
+            aggregates += [inside * (i == bucket) for i in range(len(bounds))]
+        return aggregates
+
+    def _set_properties(
+        self, model: Type[properties.RegionSummaryProperties]
+    ) -> properties.RegionSummaryProperties:
+        aggregates = iter(self._aggregates())
+        count = int(next(aggregates))
+        totals = {name: round(float(next(aggregates)), 4) for name in REGION_TOTALS}
+        distributions = {}
+        for name, bounds in REGION_DISTRIBUTIONS.items():
+            buckets = [
+                properties.DistributionBucketProperties(
+                    lowerBound=lower,
+                    upperBound=upper,
+                    buildingsCount=int(next(aggregates)),
+                )
+                for lower, upper in zip(bounds, bounds[1:])
+            ]
+            buckets.append(
+                properties.DistributionBucketProperties(
+                    lowerBound=bounds[-1], buildingsCount=int(next(aggregates))
+                )
+            )
+            distributions[f"{name}Distribution"] = buckets
+        totals["maxArrayPanelsCount"] = int(totals["maxArrayPanelsCount"])
+        return model(
+            boundingBox=self.box, buildingsCount=count, **totals, **distributions
+        )
+
+
+def _corpus_possible() -> bool:
+    """Whether a corpus may be served: one is configured, or one was loaded
+    into `dataset.corpus_holder`.
+
+    Without a configured corpus the holder is only looked at if its module
+    was loaded, since a holder never created holds nothing: fixture-only
+    apps use the fixture builders without importing the dataset
+    machinery."""
+    if get_settings().dataset_path is not None:
+        return True
+    dataset = sys.modules.get("solar_api_mock.core.dataset")
+    return dataset is not None and dataset.corpus_holder.corpus is not None
+
+
+def _corpus_schema():
+    """`core.corpus_schema`, or None when no corpus can be served."""
+    if not _corpus_possible():
+        return None
+    from solar_api_mock.core import corpus_schema
+
+    return corpus_schema
+
+
+def dataset_version() -> str:
+    """Identifies the data served: the fingerprint of the corpus, or
+    `fixture` without one."""
+    if not _corpus_possible():
+        return "fixture"
+    from solar_api_mock.core.dataset import get_corpus
+
+    corpus = get_corpus()
+    return corpus.fingerprint if corpus is not None else "fixture"
+
+
+def building_insights_builder(
+    lat_lon, required_quality: str = None
+) -> BuildingInsightsBuilder:
+    """The builder for the building closest to `lat_lon` whose imagery is
+    at least of `required_quality` (HIGH when unspecified).
+
+    Falls back to the fixture building when no corpus is configured."""
+    corpus_schema = _corpus_schema()
+    if corpus_schema is not None:
+        builder = corpus_schema.building_insights_builder(lat_lon, required_quality)
+        if builder is not None:
+            return builder
+    return BuildingInsightsBuilder()
+
+
+def building_builder(place_id: str) -> BuildingInsightsBuilder:
+    """The builder for the building `place_id`, looked up by its id rather
+    than searched for around a location.
+
+    Raises `NotFoundError` when there is no such building. Without a
+    corpus, the fixture building is the only one."""
+    corpus_schema = _corpus_schema()
+    if corpus_schema is not None:
+        builder = corpus_schema.building_builder(place_id)
+        if builder is not None:
+            return builder
+    if place_id != FIXTURE_PLACE_ID:
+        raise NotFoundError()
+    return BuildingInsightsBuilder()
+
+
+def region_summary_builder(
+    box: properties.LatLngBoxProperties,
+) -> RegionSummaryBuilder:
+    """The builder of the summary of the buildings in `box`.
+
+    Falls back to the fixture building when no corpus is configured."""
+    corpus_schema = _corpus_schema()
+    if corpus_schema is not None:
+        builder = corpus_schema.region_summary_builder(box)
+        if builder is not None:
+            return builder
+    return RegionSummaryBuilder(box)
+
+
+def data_layers_builder(
+    location,
+    view: str = None,
+    required_quality: str = None,
+    exact_quality_required: bool = False,
+) -> DataLayersBuilder:
+    """The builder for the data layers around `location`, from imagery of
+    at least, or exactly, `required_quality` (HIGH when unspecified).
+
+    Falls back to the fixture layers when no corpus is configured."""
+    corpus_schema = _corpus_schema()
+    if corpus_schema is not None:
+        builder = corpus_schema.data_layers_builder(
+            location, view, required_quality, exact_quality_required
+        )
+        if builder is not None:
+            return builder
+    return DataLayersBuilder()
@@ -0,0 +1,135 @@
+"""Encoding of API responses.
+
+Responses are dumped to plain JSON-compatible Python objects by pydantic,
+then encoded by one of the serializers below. The JSON ones produce the
+same bytes as FastAPI's `JSONResponse`: compact separators and raw UTF-8.
+The only difference between them is the spelling of floats in exponent
+notation (`1e-05` for the standard library, `1e-5` for orjson), which the
+values served, rounded to a few decimals, never use.
+
+msgpack encodes the same objects, never going through JSON text, with
+floats as 64-bit doubles. Protocol buffers are encoded by the serializer
+of `rpc.wire`, which implements `Serializer` for the messages of the RPC
+layer."""
+
+import json
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from pydantic import BaseModel
+
+from solar_api_mock.core.field_mask import FieldMask
+from solar_api_mock.core.settings import get_settings
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+PROTOBUF = "application/x-protobuf"
+
+
+class Serializer(ABC):
+    media_type: str
+
+    @abstractmethod
+    def dumps(self, content) -> bytes:
+        """The encoding of the JSON-compatible `content`."""
+
+
+class JsonSerializer(Serializer):
+    name: str
+    media_type = JSON
+
+
+class StdlibSerializer(JsonSerializer):
+    name = "stdlib"
+
+    def dumps(self, content) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class OrjsonSerializer(JsonSerializer):
+    """Requires the optional `orjson` package, about ten times faster than
+    the standard library on large buildings."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+
+    def dumps(self, content) -> bytes:
+        return self._dumps(content)
+
+
+SERIALIZERS = {
+    serializer.name: serializer for serializer in (StdlibSerializer, OrjsonSerializer)
+}
+
+
+def get_serializer(name: str = None) -> JsonSerializer:
+    """The serializer called `name`, by default `Settings.json_serializer`.
+
+    `auto` picks orjson when it is installed and the standard library
+    otherwise."""
+    # Resolved before the cached call, which would otherwise keep the
+    # serializer of the first settings seen.
+    return _serializer(name or get_settings().json_serializer)
+
+
+@lru_cache
+def _serializer(name: str) -> JsonSerializer:
+    if name != "auto":
+        return SERIALIZERS[name]()
+    try:
+        return OrjsonSerializer()
+    except ImportError:
+        return StdlibSerializer()
+
+
+class MsgpackSerializer(Serializer):
+    """Requires the optional `msgpack` package."""
+
+    media_type = MSGPACK
+
+    def __init__(self):
+        import msgpack
+
+        self._packb = msgpack.packb
+
+    def dumps(self, content) -> bytes:
+        return self._packb(content)
+
+
+def msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_media_serializer(media_type: str) -> Serializer:
+    """The serializer of `media_type`, JSON or msgpack; those of protocol
+    buffers depend on the message and are made by `rpc.wire.serializer`."""
+    if media_type == MSGPACK:
+        return _msgpack_serializer()
+    return get_serializer()
+
+
+@lru_cache
+def _msgpack_serializer() -> MsgpackSerializer:
+    return MsgpackSerializer()
+
+
+def dumps_model(
+    model: BaseModel, serializer: Serializer = None, fields: FieldMask = None
+) -> bytes:
+    """Encode `model` as a response, leaving out unset optional fields and
+    those `fields` does not select."""
+    serializer = serializer or get_serializer()
+    content = model.model_dump(mode="json", by_alias=True, exclude_none=True)
+    if fields is not None:
+        content = fields.apply(content)
+    return serializer.dumps(content)
@@ -0,0 +1,218 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from solar_api_mock.core.errors import ERRORS
+
+ENV_PREFIX = "SOLAR_API_MOCK_"
+
+
+class LatencyProfile(BaseModel):
+    """Distribution of the delays added to calls."""
+
+    distribution: Literal["fixed", "lognormal", "histogram"] = Field(
+        description="`fixed` delays of `seconds`, `lognormal` ones of median `seconds`, or delays drawn from a recorded `histogram`.",
+        default="fixed",
+    )
+    seconds: float = Field(
+        description="Delay of `fixed` profiles, median delay of `lognormal` ones.",
+        default=0.0,
+        ge=0,
+    )
+    sigma: float = Field(
+        description="Standard deviation of the logarithm of `lognormal` delays.",
+        default=0.5,
+        ge=0,
+    )
+    bucket_seconds: list[float] = Field(
+        description="Increasing upper bounds of the buckets of a recorded `histogram`. Delays are uniform within a bucket, the first starting at 0.",
+        default=[],
+    )
+    bucket_counts: list[int] = Field(
+        description="Calls recorded in each bucket of `bucket_seconds`, not cumulated.",
+        default=[],
+    )
+
+    @model_validator(mode="after")
+    def check_histogram(self) -> "LatencyProfile":
+        if self.distribution != "histogram":
+            return self
+        if not self.bucket_seconds or len(self.bucket_seconds) != len(
+            self.bucket_counts
+        ):
+            raise ValueError("histogram needs one count per bucket")
+        if any(count < 0 for count in self.bucket_counts) or not any(
+            self.bucket_counts
+        ):
+            raise ValueError("histogram counts must be positive")
+        bounds = [0.0, *self.bucket_seconds]
+        if any(lower >= upper for lower, upper in zip(bounds, bounds[1:])):
+            raise ValueError("histogram bounds must be positive and increasing")
+        return self
+
+
+class FaultProfile(BaseModel):
+    """Latency and errors injected into the calls of a route."""
+
+    latency: LatencyProfile = Field(
+        description="Delay added before a call is handled.", default=None
+    )
+    error_rates: dict[str, float] = Field(
+        description='Fraction of the calls failing with each status, e.g. `{"UNAVAILABLE": 0.01}`.',
+        default={},
+    )
+
+    @field_validator("error_rates")
+    @classmethod
+    def check_error_rates(cls, rates: dict[str, float]) -> dict[str, float]:
+        for status, rate in rates.items():
+            if status not in ERRORS:
+                raise ValueError(
+                    f"unknown status {status}, expected one of {list(ERRORS)}"
+                )
+            if not 0 <= rate <= 1:
+                raise ValueError(f"rate of {status} must be between 0 and 1")
+        if sum(rates.values()) > 1:
+            raise ValueError("error rates add up to more than 1")
+        return rates
+
+
+class RateLimit(BaseModel):
+    """Token bucket and daily quota of the calls of one API key to a
+    route."""
+
+    queries_per_second: float = Field(
+        description="Rate at which the bucket refills. When unset, only the daily quota applies.",
+        default=None,
+        gt=0,
+    )
+    burst: int = Field(
+        description="Capacity of the bucket: the calls accepted at once after a pause. Defaults to `queries_per_second`, rounded up.",
+        default=None,
+        ge=1,
+    )
+    queries_per_day: int = Field(
+        description="Calls accepted per day, reset at midnight Pacific time like Google quotas.",
+        default=None,
+        ge=0,
+    )
+
+
+class Settings(BaseModel):
+    dataset_path: Path = Field(
+        description="Path of a corpus file written by `solar-api-mock build-dataset`. When unset, the routes serve the fixture building.",
+        default=None,
+    )
+    shared_memory_dir: Path = Field(
+        description="tmpfs directory in which corpus files are staged before being mapped, so that every worker shares the same pages.",
+        default=None,
+    )
+    dataset_watch_interval: float = Field(
+        description="When set, seconds between checks of `dataset_path` for a replaced file, which is then reloaded without downtime.",
+        default=None,
+        gt=0,
+    )
+    search_radius_meters: float = Field(
+        description="Buildings further than this from the requested point are not returned; the routes answer NOT_FOUND instead.",
+        default=1000.0,
+        gt=0,
+    )
+    coverage_cell_degrees: float = Field(
+        description="Cell size of the coverage grid used to reject out-of-coverage points before any index lookup.",
+        default=0.01,
+        gt=0,
+    )
+    coverage_max_bitmap_bits: int = Field(
+        description="Largest coverage grid kept as a dense bitmap. Sparser, wider extents fall back to a Bloom filter.",
+        default=1 << 24,
+        gt=0,
+    )
+    validate_responses: bool = Field(
+        description="Validate responses against their `response_model` before sending them, instead of trusting the models built for them. Slower; meant for debugging and tests.",
+        default=False,
+    )
+    json_serializer: Literal["auto", "stdlib", "orjson"] = Field(
+        description="JSON encoder of the responses. `auto` uses orjson when it is installed, the standard library otherwise; both produce the same output.",
+        default="auto",
+    )
+    cache_control: str = Field(
+        description="`Cache-Control` header of the responses of the API routes, which carry strong ETags.",
+        default="public, max-age=300",
+    )
+    compression_min_bytes: int = Field(
+        description="Smallest response body compressed when the client accepts gzip or brotli.",
+        default=1024,
+        ge=0,
+    )
+    response_cache_bytes: int = Field(
+        description="Memory budget of the in-process cache of encoded responses of the API routes, compressed variants included. 0 disables it.",
+        default=0,
+        ge=0,
+    )
+    fault_profiles: dict[str, FaultProfile] = Field(
+        description="Latency and errors injected into the calls of each route, keyed by HTTP path (`/buildingInsights:findClosest`) or gRPC method (`FindClosestBuildingInsights`). Replaced at runtime through `PUT /admin/faults`.",
+        default={},
+    )
+    fault_profiles_file: Path = Field(
+        description="File, ideally on tmpfs, holding the fault profiles of every worker so that `PUT /admin/faults` changes them all. Created with `fault_profiles` if missing. When unset, each worker keeps its own profiles.",
+        default=None,
+    )
+    fault_seed: int = Field(
+        description="Seed of the draws of injected delays and errors, for reproducible runs.",
+        default=None,
+    )
+    rate_limits: dict[str, RateLimit] = Field(
+        description="Limits of the calls of each API key, given by the `key` parameter or the `X-Goog-Api-Key` header, to each route, keyed like `fault_profiles`. Calls over a limit are answered RESOURCE_EXHAUSTED.",
+        default={},
+    )
+    key_rate_limits: dict[str, dict[str, RateLimit]] = Field(
+        description="Limits of particular API keys, by key then route, overriding `rate_limits`.",
+        default={},
+    )
+    rate_limit_store: Path = Field(
+        description="File, ideally on tmpfs, holding the token buckets of every worker so that limits hold across them. When unset, each worker keeps its own buckets.",
+        default=None,
+    )
+    openapi_cache_dir: Path = Field(
+        description="Directory in which the generated OpenAPI document is cached across processes. Unset, the document is generated by each process and not written to disk.",
+        default=None,
+    )
+    profiling_enabled: bool = Field(
+        description="Profile the requests carrying `profiling_header`, keeping their collapsed stacks under their request id.",
+        default=False,
+    )
+    profiling_header: str = Field(
+        description="Header marking a request to profile, when profiling is enabled.",
+        default="X-Debug-Profile",
+    )
+    profiling_dir: Path = Field(
+        description="When set, directory to which profiles are also written, as `<request id>.collapsed`.",
+        default=None,
+    )
+
+    @classmethod
+    def from_env(cls, environ=None) -> "Settings":
+        """Read settings from `SOLAR_API_MOCK_<FIELD>` environment variables.
+
+        Empty variables count as unset. Values that look like JSON objects
+        or arrays are decoded first, everything else is left for pydantic
+        to coerce."""
+        environ = os.environ if environ is None else environ
+        values = {}
+        for name in cls.model_fields:
+            raw = environ.get(f"{ENV_PREFIX}{name.upper()}")
+            if not raw:
+                continue
+            if raw.startswith(("{", "[")):
+                raw = json.loads(raw)
+            values[name] = raw
+        return cls(**values)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings.from_env()
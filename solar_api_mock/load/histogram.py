@@ -0,0 +1,85 @@
+import math
+
+PERCENTILES = {"p50": 50, "p90": 90, "p99": 99, "p999": 99.9}
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds.
+
+    Bucket bounds grow geometrically by `1 + precision`, so every recorded
+    value, and every percentile, is known within that relative error while
+    the memory use only depends on the covered range."""
+
+    def __init__(
+        self, lowest: float = 1e-6, highest: float = 600.0, precision: float = 0.01
+    ):
+        self.lowest = lowest
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts = [0] * (self._index(highest) + 1)
+        self.total = 0
+        self.min = math.inf
+        self.max = 0.0
+        self.sum = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base) + 1
+
+    def upper_bound(self, index: int) -> float:
+        return self.lowest * (1 + self.precision) ** index
+
+    def record(self, value: float):
+        index = min(self._index(value), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        if self.total == 0:
+            return math.nan
+        rank = max(1, math.ceil(percent / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else math.nan
+
+    def buckets(self, per_decade: int = 10) -> list[tuple[float, int]]:
+        """Counts regrouped into `per_decade` buckets per power of ten, as
+        `(upper bound, count)` pairs, for display and export."""
+        grouped = {}
+        for index, count in enumerate(self.counts):
+            if count:
+                exponent = math.ceil(math.log10(self.upper_bound(index)) * per_decade)
+                bound = 10 ** (exponent / per_decade)
+                grouped[bound] = grouped.get(bound, 0) + count
+        return sorted(grouped.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "min": self.min if self.total else None,
+            "max": self.max if self.total else None,
+            "mean": self.mean if self.total else None,
+            "percentiles": {
+                name: self.percentile(percent) for name, percent in PERCENTILES.items()
+            },
+            "buckets": [[bound, count] for bound, count in self.buckets()],
+        }
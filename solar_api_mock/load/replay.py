@@ -0,0 +1,245 @@
+"""Open-loop load generator.
+
+Requests are sent on a fixed schedule, whatever the state of earlier
+requests, and each latency is measured from the time the request was
+*scheduled* to go out rather than from when it actually did. A server
+that stalls therefore shows up as a latency spike for every request that
+should have been sent during the stall, instead of silently lowering the
+offered load (coordinated omission).
+
+Requests come from a JSONL log, one object per line::
+
+    {"method": "GET", "path": "/buildingInsights:findClosest",
+     "params": {"lat_lon.latitude": 37.44, "lat_lon.longitude": -122.13}}
+
+or, without a log, from uniformly random `findClosest` lookups.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import httpx
+
+from solar_api_mock.load.histogram import PERCENTILES, LatencyHistogram
+
+
+def read_log(path) -> Iterator[dict]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def uniform_workload(
+    south: float, west: float, north: float, east: float, seed: int = 0
+) -> Iterator[dict]:
+    rng = random.Random(seed)
+    while True:
+        yield {
+            "method": "GET",
+            "path": "/buildingInsights:findClosest",
+            "params": {
+                "lat_lon.latitude": rng.uniform(south, north),
+                "lat_lon.longitude": rng.uniform(west, east),
+            },
+        }
+
+
+class LoadReport:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.sent = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def completed(self) -> int:
+        return self.latency.total
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or self.started) - self.started
+
+    @property
+    def failures(self) -> int:
+        failed = sum(n for status, n in self.statuses.items() if status >= 400)
+        return failed + sum(self.errors.values())
+
+    def to_dict(self) -> dict:
+        duration = self.duration
+        return {
+            "sent": self.sent,
+            "completed": self.completed,
+            "duration": duration,
+            "throughput": self.completed / duration if duration else None,
+            "error_rate": self.failures / self.sent if self.sent else None,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "errors": dict(self.errors),
+            "latency": self.latency.to_dict(),
+            "service_time": self.service_time.to_dict(),
+        }
+
+    def format(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"sent {data['sent']}  completed {data['completed']}  "
+            f"in {data['duration']:.2f}s  "
+            f"throughput {data['throughput'] or 0:.1f} req/s  "
+            f"error rate {100 * (data['error_rate'] or 0):.2f}%",
+            f"statuses {data['statuses']}  errors {data['errors']}",
+        ]
+        for title, histogram in (
+            ("latency (from intended send time)", self.latency),
+            ("service time (from actual send time)", self.service_time),
+        ):
+            percentiles = "  ".join(
+                f"{name} {histogram.percentile(p) * 1e3:.2f}ms"
+                for name, p in PERCENTILES.items()
+            )
+            lines += ["", f"{title}: {percentiles}"]
+            buckets = histogram.buckets()
+            peak = max((count for _, count in buckets), default=0)
+            for bound, count in buckets:
+                bar = "#" * max(1, round(40 * count / peak))
+                lines.append(f"  <= {bound * 1e3:10.3f}ms {count:8d} {bar}")
+        return "\n".join(lines)
+
+
+async def run(
+    client: httpx.AsyncClient,
+    requests: Iterable[dict],
+    rate: float,
+    duration: float = None,
+    count: int = None,
+    max_in_flight: int = 1000,
+    poisson: bool = False,
+    seed: int = 0,
+) -> LoadReport:
+    """Send `requests` at `rate` requests per second until `duration`
+    seconds have elapsed, `count` requests were sent or the requests run
+    out. With `poisson`, inter-arrival times are exponential rather than
+    constant, with the same mean rate.
+
+    At most `max_in_flight` requests are outstanding; when the limit is
+    reached, scheduled requests wait for a slot and that wait counts
+    towards their latency."""
+    report = LoadReport()
+    slots = asyncio.Semaphore(max_in_flight)
+    rng = random.Random(seed)
+    tasks = set()
+
+    async def send(request: dict, intended: float):
+        async with slots:
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    request.get("method", "GET"),
+                    request["path"],
+                    params=request.get("params"),
+                    headers=request.get("headers"),
+                )
+                await response.aread()
+                report.statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                # Failed requests, e.g. timed out, still took their time:
+                # leaving them out would hide the worst latencies.
+                report.errors[type(e).__name__] += 1
+            finished = time.perf_counter()
+            report.finished = max(report.finished or finished, finished)
+            report.latency.record(finished - intended)
+            report.service_time.record(finished - started)
+
+    start = report.started = time.perf_counter()
+    offset = 0.0
+    limit = itertools.count() if count is None else range(count)
+    for i, request in zip(limit, requests):
+        if poisson and i:
+            offset += rng.expovariate(rate)
+        elif not poisson:
+            offset = i / rate
+        if duration is not None and offset >= duration:
+            break
+        intended = start + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(send(request, intended))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        report.sent += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="solar-api-mock-load")
+    parser.add_argument("url", help="Base URL of the running mock.")
+    parser.add_argument("--log", help="JSONL request log to replay.")
+    parser.add_argument("--loop", action="store_true", help="Replay the log forever.")
+    parser.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+        default=(37.2, -122.5, 37.9, -121.7),
+        help="Area of the synthetic workload used without --log.",
+    )
+    parser.add_argument("-r", "--rate", type=float, required=True, help="Requests/s.")
+    parser.add_argument("-d", "--duration", type=float, default=None)
+    parser.add_argument("-n", "--count", type=int, default=None)
+    parser.add_argument("--poisson", action="store_true")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the full report to this file.")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.count is None and (args.loop or not args.log):
+        parser.error("an endless workload needs --duration or --count")
+
+    if args.log:
+        requests = read_log(args.log)
+        if args.loop:
+            requests = itertools.cycle(list(requests))
+    else:
+        requests = uniform_workload(*args.bbox, seed=args.seed)
+
+    async def go():
+        limits = httpx.Limits(
+            max_connections=args.max_in_flight,
+            max_keepalive_connections=args.max_in_flight,
+        )
+        async with httpx.AsyncClient(
+            base_url=args.url, limits=limits, timeout=args.timeout
+        ) as client:
+            return await run(
+                client,
+                requests,
+                args.rate,
+                args.duration,
+                args.count,
+                args.max_in_flight,
+                args.poisson,
+                args.seed,
+            )
+
+    report = asyncio.run(go())
+    print(report.format())
+    if args.json:
+        Path(args.json).write_text(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Seeded generator of production-like request streams.
+
+Queries are drawn from a fixed pool of addresses, most of them clustered
+around cities, and addresses are picked with a Zipf distribution so that a
+few hot ones are requested over and over. Each query is either a
+`findClosest` or a `dataLayers:get` call with parameters drawn from
+configurable mixes. Lines are written in the JSONL format read by
+`solar_api_mock.load.replay`."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from solar_api_mock.core.regions import METERS_PER_DEGREE
+
+
+class City(BaseModel):
+    latitude: float
+    longitude: float
+    weight: float = 1.0
+    spread_meters: float = Field(
+        description="Standard deviation of the distance of addresses to the city center.",
+        default=5_000.0,
+    )
+
+
+class WorkloadConfig(BaseModel):
+    seed: int = 0
+    bbox: tuple[float, float, float, float] = Field(
+        description="South, west, north, east bounds of the addresses that are not clustered around a city.",
+        default=(37.2, -122.5, 37.9, -121.7),
+    )
+    cities: list[City] = [
+        City(latitude=37.7749, longitude=-122.4194, weight=4.0),
+        City(latitude=37.3382, longitude=-121.8863, weight=3.0),
+        City(latitude=37.8044, longitude=-122.2712, weight=2.0),
+        City(latitude=37.4419, longitude=-122.1430, weight=1.0, spread_meters=2_000),
+    ]
+    addresses: int = Field(
+        description="Size of the pool of distinct addresses requests are drawn from.",
+        default=100_000,
+        gt=0,
+    )
+    zipf_exponent: float = Field(
+        description="Skew of address popularity: the k-th most popular address is requested with a probability proportional to 1 / k ** zipf_exponent. 0 is uniform.",
+        default=1.1,
+        ge=0,
+    )
+    cluster_fraction: float = Field(
+        description="Share of the addresses that are clustered around cities rather than spread uniformly over the bounding box.",
+        default=0.8,
+        ge=0,
+        le=1,
+    )
+    find_closest_fraction: float = Field(
+        description="Share of `findClosest` calls, the rest being `dataLayers:get`.",
+        default=0.7,
+        ge=0,
+        le=1,
+    )
+    required_quality: dict[str, float] = {
+        "": 0.7,
+        "HIGH": 0.1,
+        "MEDIUM": 0.1,
+        "LOW": 0.1,
+    }
+    view: dict[str, float] = {
+        "": 0.2,
+        "DSM_LAYER": 0.1,
+        "IMAGERY_LAYERS": 0.2,
+        "IMAGERY_AND_ANNUAL_FLUX_LAYERS": 0.2,
+        "IMAGERY_AND_ALL_FLUX_LAYERS": 0.1,
+        "FULL_LAYERS": 0.2,
+    }
+    radius_meter: dict[int, float] = {25: 0.2, 50: 0.5, 100: 0.2, 175: 0.1}
+    pixel_size_numbers: dict[float, float] = {
+        0.0: 0.4,
+        0.1: 0.2,
+        0.25: 0.2,
+        0.5: 0.1,
+        1.0: 0.1,
+    }
+    exact_quality_fraction: float = Field(
+        description="Share of `dataLayers:get` calls with `exact_quality_required` set.",
+        default=0.1,
+        ge=0,
+        le=1,
+    )
+
+
+def _choice(rng: np.random.Generator, mix: dict, size: int) -> list:
+    """Draw from a `{value: weight}` mix; empty and zero values stand for
+    an omitted parameter."""
+    values = list(mix)
+    weights = np.array(list(mix.values()), dtype=np.float64)
+    picked = rng.choice(len(values), size=size, p=weights / weights.sum())
+    return [values[i] for i in picked]
+
+
+class WorkloadGenerator:
+    def __init__(self, config: WorkloadConfig = None):
+        self.config = config or WorkloadConfig()
+        self.rng = np.random.default_rng(self.config.seed)
+        self.latitude, self.longitude = self._addresses()
+        ranks = np.arange(1, self.config.addresses + 1, dtype=np.float64)
+        popularity = ranks**-self.config.zipf_exponent
+        self._cumulative = np.cumsum(popularity / popularity.sum())
+        # Hot addresses are not those that happen to come first in the pool.
+        self._by_rank = self.rng.permutation(self.config.addresses)
+
+    def _addresses(self) -> tuple[np.ndarray, np.ndarray]:
+        config, rng = self.config, self.rng
+        south, west, north, east = config.bbox
+        latitude = rng.uniform(south, north, config.addresses)
+        longitude = rng.uniform(west, east, config.addresses)
+        if not config.cities:
+            return latitude, longitude
+
+        clustered = rng.random(config.addresses) < config.cluster_fraction
+        n = int(clustered.sum())
+        weights = np.array([city.weight for city in config.cities])
+        city = rng.choice(len(config.cities), size=n, p=weights / weights.sum())
+        center_lat = np.array([c.latitude for c in config.cities])[city]
+        center_lng = np.array([c.longitude for c in config.cities])[city]
+        spread = np.array([c.spread_meters for c in config.cities])[city]
+        offset = rng.normal(0.0, 1.0, (2, n)) * spread / METERS_PER_DEGREE
+        latitude[clustered] = center_lat + offset[0]
+        longitude[clustered] = center_lng + offset[1] / np.cos(np.radians(center_lat))
+        return latitude, longitude
+
+    def batch(self, size: int) -> list[str]:
+        """The next `size` requests, as JSON lines."""
+        config, rng = self.config, self.rng
+        rank = np.searchsorted(self._cumulative, rng.random(size), side="right")
+        address = self._by_rank[np.minimum(rank, config.addresses - 1)]
+        latitude = self.latitude[address].tolist()
+        longitude = self.longitude[address].tolist()
+        find_closest = (rng.random(size) < config.find_closest_fraction).tolist()
+        quality = _choice(rng, config.required_quality, size)
+        view = _choice(rng, config.view, size)
+        radius = _choice(rng, config.radius_meter, size)
+        pixel_size = _choice(rng, config.pixel_size_numbers, size)
+        exact = (rng.random(size) < config.exact_quality_fraction).tolist()
+
+        lines = []
+        for i in range(size):
+            if find_closest[i]:
+                params = (
+                    f'"lat_lon.latitude":{latitude[i]:.7f},'
+                    f'"lat_lon.longitude":{longitude[i]:.7f}'
+                )
+                path = "/buildingInsights:findClosest"
+            else:
+                params = (
+                    f'"location.latitude":{latitude[i]:.7f},'
+                    f'"location.longitude":{longitude[i]:.7f},'
+                    f'"radius_meter":{radius[i]}'
+                )
+                if view[i]:
+                    params += f',"view":"{view[i]}"'
+                if pixel_size[i]:
+                    params += f',"pixel_size_numbers":{pixel_size[i]}'
+                if exact[i]:
+                    params += ',"exact_quality_required":true'
+                path = "/dataLayers:get"
+            if quality[i]:
+                params += f',"required_quality":"{quality[i]}"'
+            lines.append(f'{{"method":"GET","path":"{path}","params":{{{params}}}}}\n')
+        return lines
+
+    def write(self, out: TextIO, count: int, batch_size: int = 100_000):
+        while count > 0:
+            size = min(batch_size, count)
+            out.writelines(self.batch(size))
+            count -= size
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="solar-api-mock-workload")
+    parser.add_argument("output", help="JSONL file to write, or - for stdout.")
+    parser.add_argument("-n", "--count", type=int, required=True)
+    parser.add_argument("--config", help="JSON file with WorkloadConfig fields.")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--zipf-exponent", type=float)
+    parser.add_argument("--cluster-fraction", type=float)
+    parser.add_argument("--find-closest-fraction", type=float)
+    parser.add_argument("--addresses", type=int)
+    args = parser.parse_args(argv)
+
+    values = json.loads(Path(args.config).read_text()) if args.config else {}
+    for name in (
+        "seed",
+        "zipf_exponent",
+        "cluster_fraction",
+        "find_closest_fraction",
+        "addresses",
+    ):
+        if getattr(args, name) is not None:
+            values[name] = getattr(args, name)
+    generator = WorkloadGenerator(WorkloadConfig(**values))
+
+    if args.output == "-":
+        generator.write(sys.stdout, args.count)
+    else:
+        with open(args.output, "w") as out:
+            generator.write(out, args.count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
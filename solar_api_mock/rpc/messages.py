@@ -0,0 +1,282 @@
+"""Protocol buffer messages and service of the Solar API.
+
+Fields are keyed by the JSON names of the properties models, so a dumped
+model encodes as it is. `solar.proto`, next to this module, is rendered
+from these tables by `proto_source`; regenerate it after changing them
+with::
+
+    python -m solar_api_mock.rpc.messages > solar_api_mock/rpc/solar.proto
+"""
+
+import re
+import sys
+from typing import NamedTuple
+
+PACKAGE = "google.maps.solar.v1"
+SERVICE = "Solar"
+
+
+class Field(NamedTuple):
+    name: str
+    number: int
+    type: str
+    repeated: bool = False
+
+
+class Method(NamedTuple):
+    request: str
+    response: str
+    server_streaming: bool = False
+
+
+ENUMS = {
+    "ImageryQuality": ("IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"),
+    "DataLayerView": (
+        "DATA_LAYER_VIEW_UNSPECIFIED",
+        "DSM_LAYER",
+        "IMAGERY_LAYERS",
+        "IMAGERY_AND_ANNUAL_FLUX_LAYERS",
+        "IMAGERY_AND_ALL_FLUX_LAYERS",
+        "FULL_LAYERS",
+    ),
+    "SolarPanelOrientation": (
+        "SOLAR_PANEL_ORIENTATION_UNSPECIFIED",
+        "LANDSCAPE",
+        "PORTRAIT",
+    ),
+}
+
+# Well-known messages, imported by the rendered file rather than defined.
+IMPORTS = {
+    "google.api.HttpBody": "google/api/httpbody.proto",
+    "google.type.Date": "google/type/date.proto",
+    "google.type.LatLng": "google/type/latlng.proto",
+    "google.type.Money": "google/type/money.proto",
+}
+
+MESSAGES = {
+    "google.api.HttpBody": (
+        Field("contentType", 1, "string"),
+        Field("data", 2, "bytes"),
+    ),
+    "google.type.Date": (
+        Field("year", 1, "int32"),
+        Field("month", 2, "int32"),
+        Field("day", 3, "int32"),
+    ),
+    "google.type.LatLng": (
+        Field("latitude", 1, "double"),
+        Field("longitude", 2, "double"),
+    ),
+    "google.type.Money": (
+        Field("currencyCode", 1, "string"),
+        Field("units", 2, "int64"),
+        Field("nanos", 3, "int32"),
+    ),
+    "FindClosestBuildingInsightsRequest": (
+        Field("location", 1, "google.type.LatLng"),
+        Field("requiredQuality", 3, "ImageryQuality"),
+    ),
+    "GetDataLayersRequest": (
+        Field("location", 1, "google.type.LatLng"),
+        Field("radiusMeters", 2, "float"),
+        Field("view", 3, "DataLayerView"),
+        Field("requiredQuality", 5, "ImageryQuality"),
+        Field("pixelSizeMeters", 6, "float"),
+        Field("exactQualityRequired", 7, "bool"),
+    ),
+    "GetGeoTiffRequest": (Field("id", 1, "string"),),
+    "LatLngBox": (
+        Field("sw", 1, "google.type.LatLng"),
+        Field("ne", 2, "google.type.LatLng"),
+    ),
+    "BuildingInsights": (
+        Field("name", 1, "string"),
+        Field("center", 2, "google.type.LatLng"),
+        Field("imageryDate", 3, "google.type.Date"),
+        Field("postalCode", 4, "string"),
+        Field("administrativeArea", 5, "string"),
+        Field("statisticalArea", 6, "string"),
+        Field("regionCode", 7, "string"),
+        Field("solarPotential", 8, "SolarPotential"),
+        Field("boundingBox", 9, "LatLngBox"),
+        Field("imageryQuality", 10, "ImageryQuality"),
+        Field("imageryProcessedDate", 11, "google.type.Date"),
+    ),
+    "SolarPotential": (
+        Field("maxArrayPanelsCount", 1, "int32"),
+        Field("maxArrayAreaMeters2", 2, "float"),
+        Field("maxSunshineHoursPerYear", 3, "float"),
+        Field("carbonOffsetFactorKgPerMwh", 4, "float"),
+        Field("wholeRoofStats", 5, "SizeAndSunshineStats"),
+        Field("roofSegmentStats", 6, "RoofSegmentSizeAndSunshineStats", True),
+        Field("solarPanelConfigs", 7, "SolarPanelConfig", True),
+        Field("financialAnalyses", 8, "FinancialAnalysis", True),
+        Field("panelCapacityWatts", 9, "float"),
+        Field("panelHeightMeters", 10, "float"),
+        Field("panelWidthMeters", 11, "float"),
+        Field("buildingStats", 12, "SizeAndSunshineStats"),
+        Field("panelLifetimeYears", 13, "int32"),
+        Field("solarPanels", 14, "SolarPanel", True),
+    ),
+    "SizeAndSunshineStats": (
+        Field("areaMeters2", 1, "float"),
+        Field("sunshineQuantiles", 2, "float", True),
+        Field("groundAreaMeters2", 3, "float"),
+    ),
+    "RoofSegmentSizeAndSunshineStats": (
+        Field("pitchDegrees", 1, "float"),
+        Field("azimuthDegrees", 2, "float"),
+        Field("stats", 3, "SizeAndSunshineStats"),
+        Field("center", 4, "google.type.LatLng"),
+        Field("boundingBox", 5, "LatLngBox"),
+        Field("planeHeightAtCenterMeters", 6, "float"),
+    ),
+    "SolarPanelConfig": (
+        Field("panelsCount", 1, "int32"),
+        Field("yearlyEnergyDcKwh", 2, "float"),
+        Field("roofSegmentSummaries", 4, "RoofSegmentSummary", True),
+    ),
+    "RoofSegmentSummary": (
+        Field("pitchDegrees", 2, "float"),
+        Field("azimuthDegrees", 3, "float"),
+        Field("panelsCount", 7, "int32"),
+        Field("yearlyEnergyDcKwh", 8, "float"),
+        Field("segmentIndex", 9, "int32"),
+    ),
+    "SolarPanel": (
+        Field("center", 1, "google.type.LatLng"),
+        Field("orientation", 2, "SolarPanelOrientation"),
+        Field("yearlyEnergyDcKwh", 3, "float"),
+        Field("segmentIndex", 4, "int32"),
+    ),
+    "FinancialAnalysis": (
+        Field("monthlyBill", 3, "google.type.Money"),
+        Field("defaultBill", 4, "bool"),
+        Field("averageKwhPerMonth", 5, "float"),
+        Field("financialDetails", 6, "FinancialDetails"),
+        Field("leasingSavings", 7, "LeasingSavings"),
+        Field("cashPurchaseSavings", 8, "CashPurchaseSavings"),
+        Field("financedPurchaseSavings", 9, "FinancedPurchaseSavings"),
+        Field("panelConfigIndex", 10, "int32"),
+    ),
+    "FinancialDetails": (
+        Field("initialAcKwhPerYear", 1, "float"),
+        Field("remainingLifetimeUtilityBill", 2, "google.type.Money"),
+        Field("federalIncentive", 3, "google.type.Money"),
+        Field("stateIncentive", 4, "google.type.Money"),
+        Field("utilityIncentive", 5, "google.type.Money"),
+        Field("lifetimeSrecTotal", 6, "google.type.Money"),
+        Field("costOfElectricityWithoutSolar", 7, "google.type.Money"),
+        Field("netMeteringAllowed", 8, "bool"),
+        Field("solarPercentage", 9, "float"),
+        Field("percentageExportedToGrid", 10, "float"),
+    ),
+    "LeasingSavings": (
+        Field("leasesAllowed", 1, "bool"),
+        Field("leasesSupported", 2, "bool"),
+        Field("annualLeasingCost", 3, "google.type.Money"),
+        Field("savings", 4, "SavingsOverTime"),
+    ),
+    "CashPurchaseSavings": (
+        Field("outOfPocketCost", 1, "google.type.Money"),
+        Field("upfrontCost", 2, "google.type.Money"),
+        Field("rebateValue", 3, "google.type.Money"),
+        Field("paybackYears", 4, "float"),
+        Field("savings", 5, "SavingsOverTime"),
+    ),
+    "FinancedPurchaseSavings": (
+        Field("annualLoanPayment", 1, "google.type.Money"),
+        Field("rebateValue", 2, "google.type.Money"),
+        Field("loanInterestRate", 3, "float"),
+        Field("savings", 4, "SavingsOverTime"),
+    ),
+    "SavingsOverTime": (
+        Field("savingsYear1", 1, "google.type.Money"),
+        Field("savingsYear20", 2, "google.type.Money"),
+        Field("presentValueOfSavingsYear20", 3, "google.type.Money"),
+        Field("financiallyViable", 4, "bool"),
+        Field("savingsLifetime", 5, "google.type.Money"),
+        Field("presentValueOfSavingsLifetime", 6, "google.type.Money"),
+    ),
+    "DataLayers": (
+        Field("imageryDate", 1, "google.type.Date"),
+        Field("imageryProcessedDate", 2, "google.type.Date"),
+        Field("dsmUrl", 3, "string"),
+        Field("rgbUrl", 4, "string"),
+        Field("maskUrl", 5, "string"),
+        Field("annualFluxUrl", 6, "string"),
+        Field("monthlyFluxUrl", 7, "string"),
+        Field("hourlyShadeUrls", 8, "string", True),
+        Field("imageryQuality", 9, "ImageryQuality"),
+    ),
+    # Not part of the Google API: the summaries of `/regions:summarize`.
+    "RegionSummary": (
+        Field("boundingBox", 1, "LatLngBox"),
+        Field("buildingsCount", 2, "int64"),
+        Field("maxArrayPanelsCount", 3, "int64"),
+        Field("maxArrayAreaMeters2", 4, "double"),
+        Field("yearlyEnergyDcKwh", 5, "double"),
+        Field("carbonOffsetKgPerYear", 6, "double"),
+        Field("maxArrayPanelsCountDistribution", 7, "DistributionBucket", True),
+        Field("yearlyEnergyDcKwhDistribution", 8, "DistributionBucket", True),
+        Field("carbonOffsetKgPerYearDistribution", 9, "DistributionBucket", True),
+    ),
+    "DistributionBucket": (
+        Field("lowerBound", 1, "double"),
+        Field("upperBound", 2, "double"),
+        Field("buildingsCount", 3, "int64"),
+    ),
+}
+
+METHODS = {
+    "FindClosestBuildingInsights": Method(
+        "FindClosestBuildingInsightsRequest", "BuildingInsights"
+    ),
+    "GetDataLayers": Method("GetDataLayersRequest", "DataLayers"),
+    # A single HttpBody in the Google API: streamed here, in chunks.
+    "GetGeoTiff": Method("GetGeoTiffRequest", "google.api.HttpBody", True),
+}
+
+
+def snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)([A-Z])", r"_\1", name).lower()
+
+
+def proto_source() -> str:
+    """The `.proto` definition of the service and its messages."""
+    lines = [
+        "// Generated by `python -m solar_api_mock.rpc.messages`; do not edit.",
+        'syntax = "proto3";',
+        "",
+        f"package {PACKAGE};",
+        "",
+        *(f'import "{path}";' for path in sorted(IMPORTS.values())),
+        "",
+        f"service {SERVICE} {{",
+    ]
+    for name, method in METHODS.items():
+        stream = "stream " if method.server_streaming else ""
+        lines.append(
+            f"  rpc {name}({method.request}) returns ({stream}{method.response});"
+        )
+    lines.append("}")
+    for name, values in ENUMS.items():
+        lines += ["", f"enum {name} {{"]
+        lines += [f"  {value} = {number};" for number, value in enumerate(values)]
+        lines.append("}")
+    for name, fields in MESSAGES.items():
+        if name in IMPORTS:
+            continue
+        lines += ["", f"message {name} {{"]
+        for field in fields:
+            label = "repeated " if field.repeated else ""
+            lines.append(
+                f"  {label}{field.type} {snake_case(field.name)} = {field.number};"
+            )
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    sys.stdout.write(proto_source())
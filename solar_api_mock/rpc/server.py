@@ -0,0 +1,110 @@
+"""gRPC server of the Solar API.
+
+Serves `FindClosestBuildingInsights`, `GetDataLayers` and a streaming
+`GetGeoTiff` from `rpc.service`, with the wire encoding of `rpc.wire`,
+so no generated code is needed. Requires the optional `grpcio` package;
+clients generate their stubs from `solar.proto`, next to this module."""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import grpc
+
+from solar_api_mock.core import faults, metrics, quota
+from solar_api_mock.core.errors import InvalidArgumentError, SolarApiError
+from solar_api_mock.core.settings import ENV_PREFIX, get_settings
+from solar_api_mock.rpc import wire
+from solar_api_mock.rpc.messages import METHODS, PACKAGE, SERVICE, snake_case
+from solar_api_mock.rpc.service import API_KEY_METADATA, SolarService
+
+
+def _handler(service: SolarService, name: str):
+    method = METHODS[name]
+    behavior = getattr(service, snake_case(name))
+
+    async def arguments(data: bytes, context) -> tuple[dict, dict]:
+        metadata = dict(context.invocation_metadata())
+        quota.limiter.check(metadata.get(API_KEY_METADATA), name)
+        await faults.injector.inject(name)
+        try:
+            request = wire.decode(method.request, data)
+        except ValueError as e:
+            raise InvalidArgumentError(f"Invalid {method.request}: {e}")
+        return request, metadata
+
+    async def abort(context, error: SolarApiError):
+        await context.abort(grpc.StatusCode[error.status], error.message)
+
+    if method.server_streaming:
+
+        async def stream(data: bytes, context):
+            try:
+                async for message in behavior(*await arguments(data, context)):
+                    yield message
+            except SolarApiError as e:
+                await abort(context, e)
+
+        return grpc.unary_stream_rpc_method_handler(stream)
+
+    async def unary(data: bytes, context):
+        try:
+            return await behavior(*await arguments(data, context))
+        except SolarApiError as e:
+            await abort(context, e)
+
+    return grpc.unary_unary_rpc_method_handler(unary)
+
+
+def generic_handler(service: SolarService = None) -> grpc.GenericRpcHandler:
+    """The handler of the `Solar` service, exchanging raw bytes with gRPC."""
+    service = service or SolarService()
+    return grpc.method_handlers_generic_handler(
+        f"{PACKAGE}.{SERVICE}", {name: _handler(service, name) for name in METHODS}
+    )
+
+
+async def serve(address: str = "[::]:50051"):
+    settings = get_settings()
+    faults.injector = faults.FaultInjector(
+        settings.fault_profiles, settings.fault_seed, settings.fault_profiles_file
+    )
+    quota.limiter = quota.from_settings(settings)
+    metrics.install_thread_pool()
+    watcher = None
+    if settings.dataset_path is not None:
+        from solar_api_mock.core import dataset
+
+        await asyncio.to_thread(dataset.get_corpus)
+        if settings.dataset_watch_interval is not None:
+            watcher = asyncio.create_task(
+                dataset.corpus_holder.watch(
+                    settings.dataset_path, settings.dataset_watch_interval
+                )
+            )
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((generic_handler(),))
+    server.add_insecure_port(address)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="solar-api-mock-grpc")
+    parser.add_argument("--dataset", help="Corpus file to serve.")
+    parser.add_argument("--address", default="[::]:50051")
+    args = parser.parse_args(argv)
+    if args.dataset is not None:
+        os.environ[f"{ENV_PREFIX}DATASET_PATH"] = str(Path(args.dataset).resolve())
+    asyncio.run(serve(args.address))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""The `Solar` service over serialized messages.
+
+Handlers take a decoded request and the call metadata and return, or
+for streaming methods yield, encoded responses. They are built like the
+HTTP responses, from the same builders and corpus and with the field
+mask given by the `x-goog-fieldmask` metadata, and raise `SolarApiError`
+on failures, which `rpc.server` turns into gRPC statuses."""
+
+import asyncio
+from time import perf_counter
+
+from solar_api_mock.core import geotiff, metrics, properties, schema
+from solar_api_mock.core.errors import InvalidArgumentError
+from solar_api_mock.core.field_mask import parse_field_mask
+from solar_api_mock.core.serialization import dumps_model
+from solar_api_mock.rpc import wire
+
+CHUNK_BYTES = 64 * 1024
+FIELD_MASK_METADATA = "x-goog-fieldmask"
+API_KEY_METADATA = "x-goog-api-key"
+
+
+def _location(request: dict) -> properties.LatLngProperties:
+    location = request.get("location")
+    if location is None:
+        raise InvalidArgumentError("Missing required field: location.")
+    try:
+        return properties.LatLngProperties.model_validate(location)
+    except ValueError:
+        raise InvalidArgumentError(
+            "Invalid value at 'location': expected a latitude in [-90, 90] "
+            "and a longitude in [-180, 180]."
+        )
+
+
+def _encode(message: str, obj, schema_name: str, fields) -> bytes:
+    start = perf_counter()
+    data = dumps_model(obj, wire.serializer(message), fields)
+    metrics.STAGE_SECONDS.observe(perf_counter() - start, schema_name, "serialization")
+    return data
+
+
+class SolarService:
+    """Handlers of the `Solar` service, taking and returning serialized
+    messages."""
+
+    async def find_closest_building_insights(self, request: dict, metadata: dict):
+        fields = parse_field_mask(
+            metadata.get(FIELD_MASK_METADATA), properties.BuildingInsightsProperties
+        )
+        builder = schema.building_insights_builder(
+            _location(request), request.get("requiredQuality")
+        )
+        obj = builder.construct_model(fields)
+        return _encode("BuildingInsights", obj.properties, "BuildingInsights", fields)
+
+    async def get_data_layers(self, request: dict, metadata: dict):
+        fields = parse_field_mask(
+            metadata.get(FIELD_MASK_METADATA), properties.DataLayersProperties
+        )
+        builder = schema.data_layers_builder(
+            _location(request),
+            request.get("view"),
+            request.get("requiredQuality"),
+            request.get("exactQualityRequired", False),
+        )
+        obj = builder.construct_model(fields)
+        return _encode("DataLayers", obj.properties, "DataLayers", fields)
+
+    async def get_geo_tiff(self, request: dict, metadata: dict):
+        """The GeoTIFF in `HttpBody` chunks of `CHUNK_BYTES`, the content
+        type given with the first."""
+        geotiff_id = request.get("id", "")
+        place_id, _, _ = geotiff.parse_geotiff_id(geotiff_id)
+        latitude, longitude = geotiff.building_center(place_id)
+        data = await asyncio.to_thread(
+            geotiff.render_geotiff, geotiff_id, latitude, longitude
+        )
+        for offset in range(0, len(data), CHUNK_BYTES):
+            chunk = {"data": data[offset : offset + CHUNK_BYTES]}
+            if offset == 0:
+                chunk["contentType"] = "image/tiff"
+            yield wire.encode("google.api.HttpBody", chunk)
@@ -0,0 +1,267 @@
+"""Protocol buffer wire format of the messages in `rpc.messages`.
+
+Messages are encoded from, and decoded to, the JSON-compatible objects
+pydantic dumps the properties models to, so the gRPC server needs
+neither generated code nor the `protobuf` package. As in the JSON
+mapping of protocol buffers, enums are their value names and int64
+values strings. Every field present in the input is written, defaults
+included, and repeated numbers are packed."""
+
+import struct
+from functools import lru_cache
+
+from solar_api_mock.core.serialization import PROTOBUF, Serializer
+from solar_api_mock.rpc.messages import ENUMS, MESSAGES, Field
+
+VARINT, FIXED64, LENGTH_DELIMITED, FIXED32 = 0, 1, 2, 5
+
+_WIRE_TYPES = {
+    "double": FIXED64,
+    "float": FIXED32,
+    "int32": VARINT,
+    "int64": VARINT,
+    "bool": VARINT,
+    "string": LENGTH_DELIMITED,
+    "bytes": LENGTH_DELIMITED,
+}
+_PACKED_FORMATS = {"double": "d", "float": "f"}
+
+
+def _wire_type(field: Field) -> int:
+    if field.type in ENUMS:
+        return VARINT
+    return _WIRE_TYPES.get(field.type, LENGTH_DELIMITED)
+
+
+_SMALL_VARINTS = [bytes((value,)) for value in range(128)]
+
+
+def _varint(value: int) -> bytes:
+    if 0 <= value < 128:
+        return _SMALL_VARINTS[value]
+    # Negative numbers take ten bytes, as 64-bit two's complement.
+    value &= 0xFFFF_FFFF_FFFF_FFFF
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _write(field: Field, key: bytes, value: str, indent: str) -> list[str]:
+    """Statements appending `key` and the single value `value` of `field`
+    to `out`."""
+    kind = field.type
+    if kind in ("string", "bytes") or kind in MESSAGES:
+        if kind == "string":
+            encoded = f"{value}.encode()"
+        elif kind == "bytes":
+            encoded = value
+        else:
+            encoded = f"{_function_name(kind)}({value})"
+        return [
+            f"{indent}encoded = {encoded}",
+            f"{indent}out += {key!r}",
+            f"{indent}out += _varint(len(encoded))",
+            f"{indent}out += encoded",
+        ]
+    return [f"{indent}out += {key!r}", f"{indent}out += {_number(field, value)}"]
+
+
+def _number(field: Field, value: str) -> str:
+    """An expression encoding `value`, a number, bool or enum of `field`."""
+    if field.type == "double":
+        return f"_pack_double({value})"
+    if field.type == "float":
+        return f"_pack_float({value})"
+    if field.type == "bool":
+        return f"(b'\\x01' if {value} else b'\\x00')"
+    if field.type in ENUMS:
+        return f"_varint(_{field.type}[{value}])"
+    return f"_varint(int({value}))"
+
+
+def _function_name(message: str) -> str:
+    return "_encode_" + message.replace(".", "_")
+
+
+def _encoder_source(message: str) -> str:
+    lines = [
+        f"def {_function_name(message)}(content):",
+        "    out = bytearray()",
+        "    get = content.get",
+    ]
+    for field in MESSAGES[message]:
+        key = _varint(field.number << 3 | _wire_type(field))
+        packed_key = _varint(field.number << 3 | LENGTH_DELIMITED)
+        lines += [f"    value = get({field.name!r})", "    if value is not None:"]
+        if not field.repeated:
+            lines += _write(field, key, "value", " " * 8)
+            continue
+        if field.type in ("double", "float"):
+            code = "d" if field.type == "double" else "f"
+            packed = f"struct.pack(f'<{{len(value)}}{code}', *value)"
+        elif _wire_type(field) == VARINT:
+            packed = f"b''.join({_number(field, 'item')} for item in value)"
+        else:
+            lines.append("        for item in value:")
+            lines += _write(field, key, "item", " " * 12)
+            continue
+        lines += [
+            f"        packed = {packed}",
+            f"        out += {packed_key!r}",
+            "        out += _varint(len(packed))",
+            "        out += packed",
+        ]
+    lines.append("    return out")
+    return "\n".join(lines)
+
+
+@lru_cache
+def _encoders() -> dict:
+    """An encoding function per message, generated from its fields: about
+    twice as fast as interpreting the fields of every message encoded."""
+    namespace = {
+        "struct": struct,
+        "_varint": _varint,
+        "_pack_double": struct.Struct("<d").pack,
+        "_pack_float": struct.Struct("<f").pack,
+        **{
+            f"_{name}": {value: i for i, value in enumerate(values)}
+            for name, values in ENUMS.items()
+        },
+    }
+    source = "\n\n".join(_encoder_source(message) for message in MESSAGES)
+    exec(compile(source, f"<{__name__} encoders>", "exec"), namespace)
+    return {message: namespace[_function_name(message)] for message in MESSAGES}
+
+
+def encode(message: str, content: dict) -> bytes:
+    """The wire encoding of `content` as a `message`; fields unknown to the
+    message are ignored."""
+    return bytes(_encoders()[message](content))
+
+
+class ProtobufSerializer(Serializer):
+    """Encodes responses as the protocol buffer `message`."""
+
+    media_type = PROTOBUF
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def dumps(self, content) -> bytes:
+        return encode(self.message, content)
+
+
+@lru_cache
+def serializer(message: str) -> ProtobufSerializer:
+    """The serializer of responses of the protocol buffer `message`."""
+    return ProtobufSerializer(message)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+        if shift > 63:
+            raise ValueError("Varint too long")
+
+
+def _from_varint(field: Field, value: int):
+    if field.type == "bool":
+        return bool(value)
+    if value >= 1 << 63:
+        value -= 1 << 64
+    if field.type == "int32":
+        # Negative int32 values are sign-extended to 64 bits.
+        return value
+    if field.type == "int64":
+        return str(value)
+    values = ENUMS[field.type]
+    return values[value] if 0 <= value < len(values) else value
+
+
+def _from_bytes(field: Field, payload: bytes):
+    if field.type == "string":
+        return payload.decode()
+    if field.type == "bytes":
+        return payload
+    return decode(field.type, payload)
+
+
+@lru_cache
+def _fields_by_number(message: str) -> dict[int, Field]:
+    return {field.number: field for field in MESSAGES[message]}
+
+
+def decode(message: str, data: bytes) -> dict:
+    """The content of a `message` read from `data`; unknown fields are
+    skipped. Raises `ValueError` when `data` is malformed."""
+    fields = _fields_by_number(message)
+    content = {}
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == VARINT:
+            raw, position = _read_varint(data, position)
+        elif wire_type in (FIXED64, FIXED32):
+            size = 8 if wire_type == FIXED64 else 4
+            raw = data[position : position + size]
+            position += size
+        elif wire_type == LENGTH_DELIMITED:
+            size, position = _read_varint(data, position)
+            raw = data[position : position + size]
+            position += size
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        if position > len(data):
+            raise ValueError("Truncated message")
+
+        field = fields.get(number)
+        if field is None:
+            continue
+        expected = _wire_type(field)
+        if (
+            field.repeated
+            and wire_type == LENGTH_DELIMITED
+            and expected != LENGTH_DELIMITED
+        ):
+            # Packed repeated numbers.
+            values = _unpack(field, raw)
+        elif wire_type != expected:
+            raise ValueError(f"Wrong wire type for {message}.{field.name}")
+        elif wire_type == VARINT:
+            values = [_from_varint(field, raw)]
+        elif wire_type == LENGTH_DELIMITED:
+            values = [_from_bytes(field, raw)]
+        else:
+            values = [struct.unpack("<d" if wire_type == FIXED64 else "<f", raw)[0]]
+        if field.repeated:
+            content.setdefault(field.name, []).extend(values)
+        else:
+            content[field.name] = values[-1]
+    return content
+
+
+def _unpack(field: Field, payload: bytes) -> list:
+    if field.type in _PACKED_FORMATS:
+        code = _PACKED_FORMATS[field.type]
+        count, remainder = divmod(len(payload), struct.calcsize(code))
+        if remainder:
+            raise ValueError(f"Truncated packed {field.name}")
+        return list(struct.unpack(f"<{count}{code}", payload))
+    values, position = [], 0
+    while position < len(payload):
+        value, position = _read_varint(payload, position)
+        values.append(_from_varint(field, value))
+    return values
@@ -1,11 +1,119 @@
-from typing import Annotated, Literal
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Annotated, Awaitable, Callable, Literal, Type
 
-from fastapi import FastAPI, Query
-from pydantic import BaseModel
+from fastapi import Body, FastAPI, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ValidationError
 
-from solar_api_mock.core import properties, schema
+from solar_api_mock.core import faults, metrics, properties, quota, schema
+from solar_api_mock.core.errors import (
+    InvalidArgumentError,
+    NotFoundError,
+    SolarApiError,
+)
+from solar_api_mock.core.field_mask import FieldMask, parse_field_mask
+from solar_api_mock.core.serialization import (
+    JSON,
+    MSGPACK,
+    PROTOBUF,
+    dumps_model,
+    get_media_serializer,
+)
+from solar_api_mock.core.settings import FaultProfile, get_settings
+from solar_api_mock.rpc import wire
+from solar_api_mock.web import etag, profiling, response_cache
+from solar_api_mock.web.compression import (
+    IDENTITY,
+    CompressionMiddleware,
+    EncodedBody,
+    negotiate,
+)
+from solar_api_mock.web.media_types import negotiate_media_type
+from solar_api_mock.web.openapi import cached_openapi
+from solar_api_mock.web.profiling import ProfilingMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    metrics.install_thread_pool()
+    watcher = None
+    if settings.dataset_path is not None:
+        # Imported here: fixture-only apps start without NumPy.
+        from solar_api_mock.core import dataset
+
+        await asyncio.to_thread(dataset.get_corpus)
+        if settings.dataset_watch_interval is not None:
+            watcher = asyncio.create_task(
+                dataset.corpus_holder.watch(
+                    settings.dataset_path, settings.dataset_watch_interval
+                )
+            )
+    yield
+    if watcher is not None:
+        watcher.cancel()
+
+
+class MetricsMiddleware:
+    """Time every HTTP request and count those in flight.
+
+    The receipt time is left in the request state so that handlers can
+    time the middleware, routing and parameter parsing done before they
+    run."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = perf_counter()
+        scope.setdefault("state", {})["received"] = start
+        status = 500
 
-app = FastAPI(prefix="/v1")
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            metrics.REQUEST_SECONDS.observe(
+                perf_counter() - start,
+                route.path if route is not None else "unmatched",
+                status,
+            )
+
+
+app = FastAPI(prefix="/v1", lifespan=lifespan)
+app.openapi = cached_openapi(app)
+app.add_middleware(
+    CompressionMiddleware, min_bytes=get_settings().compression_min_bytes
+)
+app.add_middleware(MetricsMiddleware)
+response_cache.responses.max_bytes = get_settings().response_cache_bytes
+faults.injector = faults.FaultInjector(
+    get_settings().fault_profiles,
+    get_settings().fault_seed,
+    get_settings().fault_profiles_file,
+)
+quota.limiter = quota.from_settings(get_settings())
+
+
+@app.exception_handler(SolarApiError)
+async def solar_api_error_handler(request: Request, exc: SolarApiError):
+    return JSONResponse(exc.to_dict(), status_code=exc.code)
 
 
 class BuildingInsightsParams(BaseModel):
@@ -15,6 +123,28 @@ class BuildingInsightsParams(BaseModel):
     required_quality: Literal[
         "IMAGERY_QUALITY_UNSPECIFIED", "HIGH", "MEDIUM", "LOW", "BASE"
     ] = None
+    fields: str = None
+    key: str = None
+
+
+class BuildingParams(BaseModel):
+    fields: str = None
+    key: str = None
+
+
+class RegionSummaryParams(BaseModel):
+    fields: str = None
+    key: str = None
+
+
+class DatasetReloadParams(BaseModel):
+    path: str = None
+
+
+class DatasetStatus(BaseModel):
+    path: str = None
+    version: int
+    buildings: int
 
 
 class DataLayersParams(BaseModel):
@@ -35,20 +165,177 @@ class DataLayersParams(BaseModel):
     ] = None
     pixel_size_numbers: float = None
     exact_quality_required: bool = None
+    fields: str = None
+    key: str = None
+
+
+def query_lat_lng(
+    request: Request, name: str, default: properties.LatLngProperties
+) -> properties.LatLngProperties:
+    """Read a `name.latitude`/`name.longitude` pair from the query string.
+
+    FastAPI does not expand nested models of query parameter models, so
+    the dotted form used by the Google API is parsed here."""
+    latitude = request.query_params.get(f"{name}.latitude")
+    longitude = request.query_params.get(f"{name}.longitude")
+    if latitude is None and longitude is None:
+        return default
+    try:
+        return properties.LatLngProperties(latitude=latitude, longitude=longitude)
+    except ValidationError:
+        raise InvalidArgumentError(
+            f"Invalid value at '{name}': expected a latitude in [-90, 90] "
+            "and a longitude in [-180, 180]."
+        )
+
+
+def record_routing(request: Request, schema_name: str):
+    """Record the time from the receipt of `request` to its handler: the
+    middleware, routing and parameter parsing, as the `routing` stage."""
+    received = getattr(request.state, "received", None)
+    if received is not None:
+        metrics.STAGE_SECONDS.observe(perf_counter() - received, schema_name, "routing")
+
+
+def request_field_mask(request: Request, model: Type[BaseModel]) -> FieldMask | None:
+    """The field mask of `request`, from its `fields` parameter or else its
+    `X-Goog-FieldMask` header."""
+    text = request.query_params.get("fields") or request.headers.get(
+        etag.FIELD_MASK_HEADER
+    )
+    return parse_field_mask(text, model)
+
+
+def serialize(
+    model: Type[BaseModel],
+    obj: BaseModel,
+    schema_name: str,
+    fields: FieldMask = None,
+    media_type: str = JSON,
+) -> bytes:
+    """Serialize `obj` as FastAPI does for a `response_model` with
+    `response_model_exclude_none`, keeping the fields selected by
+    `fields`, timing each stage. Other media types than JSON encode the
+    same content, as the protocol buffer message named `schema_name`.
+
+    The response is returned pre-encoded, so FastAPI does not validate it
+    again. Unless `Settings.validate_responses` is set, it is not
+    validated here either: the builders are trusted."""
+    start = perf_counter()
+    if get_settings().validate_responses:
+        obj = model.model_validate(obj.model_dump(by_alias=True, exclude_none=True))
+        validation_end = perf_counter()
+        metrics.STAGE_SECONDS.observe(
+            validation_end - start, schema_name, "response_validation"
+        )
+        start = validation_end
+    if media_type == PROTOBUF:
+        serializer = wire.serializer(schema_name)
+    else:
+        serializer = get_media_serializer(media_type)
+    body = dumps_model(obj, serializer, fields)
+    metrics.STAGE_SECONDS.observe(perf_counter() - start, schema_name, "serialization")
+    return body
+
+
+async def respond(
+    request: Request,
+    model: Type[BaseModel],
+    schema_name: str,
+    build: Callable[[FieldMask | None], Awaitable[BaseModel]],
+) -> Response:
+    """Answer `request` with the object made by `build` for its field mask,
+    unless the client already has it, in the media type and encoding it
+    prefers.
 
+    Encoded bodies are cached under their ETag, with the compressed
+    variants made for earlier requests. Neither the cache nor the cache
+    headers are used when the corpus was swapped while the body was
+    built: it may then come from either corpus.
 
-async def get_building_insights_properties():
-    builder = schema.BuildingInsightsBuilder()
-    obj = builder.construct_model()
+    Calls over the limits of their API key are rejected first. Then the
+    latency and errors of the fault profile of the route are injected, as
+    if the service were slow or failing."""
+    route = request.scope["route"].path
+    quota.limiter.check(
+        request.query_params.get("key") or request.headers.get(etag.API_KEY_HEADER),
+        route,
+    )
+    await faults.injector.inject(route)
+    fields = request_field_mask(request, model)
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    version = schema.dataset_version()
+    tag = etag.compute_etag(request, version, media_type)
+    match = etag.matching_etag(request, tag)
+    if match is not None:
+        return etag.not_modified(match)
+    body = response_cache.responses.get(tag)
+    if body is None:
+        obj = await build(fields)
+        body = EncodedBody(serialize(model, obj, schema_name, fields, media_type))
+    content, used = body.encode(encoding, get_settings().compression_min_bytes)
+    response = Response(content, media_type=media_type)
+    response.headers["Vary"] = etag.VARY
+    if used != IDENTITY:
+        response.headers["Content-Encoding"] = used
+    if schema.dataset_version() == version:
+        response_cache.responses.put(tag, body)
+        response.headers.update(etag.cache_headers(etag.for_encoding(tag, used)))
+    if etag.matches_any(request):
+        return etag.not_modified(etag.for_encoding(tag, used))
+    return response
+
+
+async def get_building_insights_properties(
+    lat_lon: properties.LatLngProperties,
+    required_quality: str = None,
+    fields: FieldMask = None,
+):
+    builder = schema.building_insights_builder(lat_lon, required_quality)
+    obj = builder.construct_model(fields)
     return obj.properties
 
 
-async def get_data_layers_properties():
-    builder = schema.DataLayersBuilder()
-    obj = builder.construct_model()
+async def get_building_properties(place_id: str, fields: FieldMask = None):
+    builder = schema.building_builder(place_id)
+    obj = builder.construct_model(fields)
     return obj.properties
 
 
+async def get_region_summary_properties(
+    box: properties.LatLngBoxProperties, fields: FieldMask = None
+):
+    builder = schema.region_summary_builder(box)
+    obj = builder.construct_model(fields)
+    return obj.properties
+
+
+async def get_data_layers_properties(
+    location: properties.LatLngProperties,
+    view: str = None,
+    required_quality: str = None,
+    exact_quality_required: bool = False,
+    fields: FieldMask = None,
+):
+    builder = schema.data_layers_builder(
+        location, view, required_quality, exact_quality_required
+    )
+    obj = builder.construct_model(fields)
+    return obj.properties
+
+
+# The binary forms of the API routes, for the OpenAPI document.
+BINARY_RESPONSES = {
+    200: {
+        "content": {
+            MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+            PROTOBUF: {"schema": {"type": "string", "format": "binary"}},
+        }
+    }
+}
+
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Mock Solar API"}
@@ -58,19 +345,173 @@ async def root():
     "/buildingInsights:findClosest",
     response_model=properties.BuildingInsightsProperties,
     response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
 )
 async def building_insights(
+    request: Request,
     building_insights_params_query: Annotated[BuildingInsightsParams, Query()],
 ):
-    obj = await get_building_insights_properties()
-    return obj
+    # `location` as in the Google API, or `lat_lon`.
+    lat_lon = query_lat_lng(
+        request,
+        "location",
+        query_lat_lng(request, "lat_lon", building_insights_params_query.lat_lon),
+    )
+    record_routing(request, "BuildingInsights")
+    return await respond(
+        request,
+        properties.BuildingInsightsProperties,
+        "BuildingInsights",
+        lambda fields: get_building_insights_properties(
+            lat_lon, building_insights_params_query.required_quality, fields
+        ),
+    )
+
+
+@app.get(
+    "/buildings/{place_id}",
+    response_model=properties.BuildingInsightsProperties,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+)
+async def building(
+    request: Request,
+    place_id: str,
+    building_params_query: Annotated[BuildingParams, Query()],
+):
+    """The building of resource name `buildings/{place_id}`, looked up by its
+    id without any search around a location."""
+    record_routing(request, "BuildingInsights")
+    return await respond(
+        request,
+        properties.BuildingInsightsProperties,
+        "BuildingInsights",
+        lambda fields: get_building_properties(place_id, fields),
+    )
+
+
+@app.get(
+    "/regions:summarize",
+    response_model=properties.RegionSummaryProperties,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+)
+async def region_summary(
+    request: Request,
+    region_summary_params_query: Annotated[RegionSummaryParams, Query()],
+):
+    """The aggregate solar potential of the buildings whose center lies in
+    the box of corners `bounding_box.sw` and `bounding_box.ne`. A box whose
+    west edge is east of its east edge crosses the antimeridian."""
+    sw = query_lat_lng(request, "bounding_box.sw", None)
+    ne = query_lat_lng(request, "bounding_box.ne", None)
+    if sw is None or ne is None:
+        raise InvalidArgumentError(
+            "Invalid value at 'bounding_box': both corners 'sw' and 'ne' are required."
+        )
+    if sw.latitude > ne.latitude:
+        raise InvalidArgumentError(
+            "Invalid value at 'bounding_box': the latitude of 'sw' is north of 'ne'."
+        )
+    box = properties.LatLngBoxProperties(sw=sw, ne=ne)
+    record_routing(request, "RegionSummary")
+    return await respond(
+        request,
+        properties.RegionSummaryProperties,
+        "RegionSummary",
+        lambda fields: get_region_summary_properties(box, fields),
+    )
 
 
 @app.get(
     "/dataLayers:get",
     response_model=properties.DataLayersProperties,
     response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
 )
-async def data_layers(data_layers_params_query: Annotated[DataLayersParams, Query()]):
-    obj = await get_data_layers_properties()
-    return obj
+async def data_layers(
+    request: Request, data_layers_params_query: Annotated[DataLayersParams, Query()]
+):
+    location = query_lat_lng(request, "location", data_layers_params_query.location)
+    record_routing(request, "DataLayers")
+    return await respond(
+        request,
+        properties.DataLayersProperties,
+        "DataLayers",
+        lambda fields: get_data_layers_properties(
+            location,
+            data_layers_params_query.view,
+            data_layers_params_query.required_quality,
+            data_layers_params_query.exact_quality_required,
+            fields,
+        ),
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_text():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post("/admin/dataset:reload", response_model=DatasetStatus)
+async def reload_dataset(params: Annotated[DatasetReloadParams, Body()] = None):
+    """Load a corpus in the background and swap it in atomically.
+
+    Without a path, the current corpus file is reloaded. Other paths must
+    be in the directory of `dataset_path`. Only the worker serving this
+    call reloads; multi-worker deployments should replace the file at
+    `dataset_path` and rely on `dataset_watch_interval`."""
+    from solar_api_mock.core import dataset
+
+    holder = dataset.corpus_holder
+    configured = get_settings().dataset_path
+    path = params.path if params is not None else None
+    if path is None:
+        current = holder.corpus
+        path = current.source if current is not None else configured
+    elif (
+        configured is None
+        or Path(path).resolve().parent != Path(configured).resolve().parent
+    ):
+        raise InvalidArgumentError(
+            "Only corpora in the directory of dataset_path can be loaded."
+        )
+    if path is None:
+        raise InvalidArgumentError("No dataset path to reload.")
+    try:
+        corpus = await asyncio.to_thread(holder.load, path)
+    except (OSError, ValueError):
+        logger.exception("Could not load corpus %s", path)
+        raise InvalidArgumentError("Could not load the dataset.")
+    return DatasetStatus(
+        path=str(corpus.source), version=holder.version, buildings=len(corpus)
+    )
+
+
+@app.get("/admin/faults", response_model=dict[str, FaultProfile])
+async def get_faults():
+    return faults.injector.profiles
+
+
+@app.put("/admin/faults", response_model=dict[str, FaultProfile])
+async def set_faults(profiles: Annotated[dict[str, FaultProfile], Body()]):
+    """Replace the fault profiles of the routes; `{}` turns injection off.
+
+    With `fault_profiles_file` set, as `solar-api-mock-serve` does for
+    several workers, every worker switches; otherwise only the one serving
+    this call does."""
+    faults.injector.profiles = profiles
+    return profiles
+
+
+if get_settings().profiling_enabled:
+    profiling.profiles.directory = get_settings().profiling_dir
+    app.add_middleware(ProfilingMiddleware, header=get_settings().profiling_header)
+
+    @app.get("/admin/profiles/{request_id}", response_class=PlainTextResponse)
+    async def get_profile(request_id: str):
+        """The collapsed stacks of a profiled request."""
+        profile = profiling.profiles.get(request_id)
+        if profile is None:
+            raise NotFoundError()
+        return profile
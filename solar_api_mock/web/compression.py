@@ -0,0 +1,145 @@
+"""Content-Encoding negotiation and compression of responses.
+
+gzip is always available, brotli when the optional `brotli` package is
+installed. The API routes keep the compressed variants of a body next to
+it in the response cache so that a hot entry is compressed only once;
+`CompressionMiddleware` compresses the responses of the other routes.
+Bodies smaller than `Settings.compression_min_bytes` are sent as they
+are, since compression would barely shrink them."""
+
+import gzip
+from time import perf_counter
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from solar_api_mock.core import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = "identity"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _gzip(body: bytes) -> bytes:
+    # No timestamp: the same body always compresses to the same bytes,
+    # as strong ETags require.
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+# In order of preference between equally acceptable encodings.
+ENCODINGS = {"br": _brotli, "gzip": _gzip} if brotli is not None else {"gzip": _gzip}
+
+
+def parse_weights(header: str) -> dict[str, float]:
+    """The values listed by an `Accept`-like header, lowercased, with their
+    `q` weights."""
+    weights = {}
+    for item in header.split(","):
+        value, *parameters = item.split(";")
+        weight = 1.0
+        for parameter in parameters:
+            name, _, quality = parameter.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    weight = float(quality)
+                except ValueError:
+                    weight = 0.0
+        weights[value.strip().lower()] = weight
+    return weights
+
+
+def negotiate(accept_encoding: str = None) -> str:
+    """The supported encoding the client prefers, according to the weights
+    of its `Accept-Encoding` header, or identity."""
+    if not accept_encoding:
+        return IDENTITY
+    weights = parse_weights(accept_encoding)
+    best, best_weight = IDENTITY, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    start = perf_counter()
+    compressed = ENCODINGS[encoding](body)
+    metrics.COMPRESSION_SECONDS.observe(perf_counter() - start, encoding)
+    return compressed
+
+
+class EncodedBody:
+    """A response body and its compressed variants, made on first use."""
+
+    def __init__(self, identity: bytes):
+        self.variants = {IDENTITY: identity}
+
+    @property
+    def size(self) -> int:
+        return sum(map(len, self.variants.values()))
+
+    def encode(self, encoding: str, min_bytes: int) -> tuple[bytes, str]:
+        """The body in `encoding`, or as it is when it is too small to be
+        worth compressing, with the encoding actually used."""
+        identity = self.variants[IDENTITY]
+        if encoding == IDENTITY or len(identity) < min_bytes:
+            return identity, IDENTITY
+        body = self.variants.get(encoding)
+        if body is None:
+            body = self.variants[encoding] = compress(identity, encoding)
+        return body, encoding
+
+
+class CompressionMiddleware:
+    """Compress complete response bodies of at least `min_bytes`.
+
+    Responses that already have a `Content-Encoding`, like those of the
+    API routes, and streamed ones are passed through."""
+
+    def __init__(self, app, min_bytes: int = 1024):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding == IDENTITY:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None:
+                return await send(message)
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and len(body) >= self.min_bytes
+            ):
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
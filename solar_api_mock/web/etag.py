@@ -0,0 +1,74 @@
+"""Strong ETags and conditional GETs of the API routes.
+
+A response is a function of the route, its query parameters, the data
+served and the code serving it, so its ETag is a hash of those, known
+before any work is done: a request whose `If-None-Match` matches is
+answered 304 straight away. `If-None-Match: *` matches any existing
+representation, so it is only answered once the response is known to
+exist."""
+
+import hashlib
+
+from fastapi import Request, Response
+
+from solar_api_mock.core import metrics
+from solar_api_mock.core.serialization import JSON
+from solar_api_mock.core.settings import get_settings
+from solar_api_mock.web.compression import ENCODINGS, IDENTITY
+from solar_api_mock.web.openapi import fingerprint
+
+# Request headers that the responses of the API routes depend on.
+FIELD_MASK_HEADER = "X-Goog-FieldMask"
+VARY = f"Accept, Accept-Encoding, {FIELD_MASK_HEADER}"
+# Identifies the caller; responses do not depend on it.
+API_KEY_HEADER = "X-Goog-Api-Key"
+
+
+def compute_etag(request: Request, dataset_version: str, media_type: str = JSON) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{fingerprint()}\0{dataset_version}\0{request.url.path}".encode())
+    for name, value in sorted(request.query_params.multi_items()):
+        if name == "key":
+            continue
+        digest.update(f"\0{name}={value}".encode())
+    field_mask = request.headers.get(FIELD_MASK_HEADER)
+    if field_mask is not None:
+        digest.update(f"\0{FIELD_MASK_HEADER}:{field_mask}".encode())
+    if media_type != JSON:
+        digest.update(f"\0Content-Type:{media_type}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def for_encoding(etag: str, encoding: str) -> str:
+    """The ETag of the representation of `etag` in `encoding`: compressed
+    bodies are different bytes, so they get tags of their own."""
+    if encoding == IDENTITY:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(request: Request, etag: str) -> str | None:
+    """The tag listed by `If-None-Match` among those of the representations
+    of `etag`, compared weakly as RFC 9110 requires for this header."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    variants = [etag, *(for_encoding(etag, encoding) for encoding in ENCODINGS)]
+    match = next((tag for tag in variants if tag in tags), None)
+    metrics.cache_lookup("etag", match is not None)
+    return match
+
+
+def matches_any(request: Request) -> bool:
+    """Whether `If-None-Match` is `*`, matching the response if it exists."""
+    header = request.headers.get("if-none-match")
+    return header is not None and header.strip() == "*"
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": get_settings().cache_control}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={**cache_headers(etag), "Vary": VARY})
@@ -0,0 +1,34 @@
+"""Content negotiation of the API routes.
+
+Responses are JSON unless the `Accept` header prefers protocol buffers
+(`application/x-protobuf`) or, when the optional `msgpack` package is
+installed, msgpack (`application/x-msgpack`). Clients accepting nothing
+the API produces get JSON, as from the Google API, rather than a 406."""
+
+from solar_api_mock.core.serialization import (
+    JSON,
+    MSGPACK,
+    PROTOBUF,
+    msgpack_available,
+)
+from solar_api_mock.web.compression import parse_weights
+
+# In order of preference between equally acceptable media types.
+MEDIA_TYPES = (JSON, PROTOBUF, MSGPACK) if msgpack_available() else (JSON, PROTOBUF)
+
+
+def negotiate_media_type(accept: str = None) -> str:
+    """The supported media type the client prefers, according to the
+    weights of its `Accept` header."""
+    if not accept:
+        return JSON
+    weights = parse_weights(accept)
+    best, best_weight = JSON, 0.0
+    for media_type in MEDIA_TYPES:
+        weight = weights.get(
+            media_type,
+            weights.get(media_type.partition("/")[0] + "/*", weights.get("*/*", 0.0)),
+        )
+        if weight > best_weight:
+            best, best_weight = media_type, weight
+    return best
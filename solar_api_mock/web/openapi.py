@@ -0,0 +1,94 @@
+"""OpenAPI document cached on disk.
+
+Generating the document walks every model and its long descriptions,
+which takes longer than serving a request. When `Settings.openapi_cache_dir`
+is set, it is written there once under a fingerprint of the package
+sources and of the FastAPI and pydantic versions, so any change to the API
+invalidates it, and read back by later processes. Precompute it when
+building an image with::
+
+    SOLAR_API_MOCK_OPENAPI_CACHE_DIR=/var/cache/solar-api-mock \\
+        python -m solar_api_mock.web.openapi
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import fastapi
+import pydantic
+from fastapi import FastAPI
+
+import solar_api_mock
+from solar_api_mock.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def fingerprint() -> str:
+    """Identifies the code serving the API."""
+    digest = hashlib.sha256(f"{fastapi.__version__}:{pydantic.VERSION}".encode())
+    package = Path(solar_api_mock.__file__).parent
+    for source in sorted(package.rglob("*.py")):
+        digest.update(str(source.relative_to(package)).encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_path() -> Path | None:
+    """The cached document, or None when caching is off."""
+    directory = get_settings().openapi_cache_dir
+    if directory is None:
+        return None
+    return directory / f"openapi-{fingerprint()}.json"
+
+
+def write_cache(app: FastAPI, path: Path) -> Path:
+    """Generate the document of `app` and store it at `path`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = FastAPI.openapi(app)
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False) as f:
+        json.dump(document, f, separators=(",", ":"))
+    os.replace(f.name, path)
+    return path
+
+
+def cached_openapi(app: FastAPI):
+    """A replacement for `app.openapi` reading the document from the cache,
+    and filling the cache on a miss."""
+
+    def openapi() -> dict:
+        path = cache_path()
+        if app.openapi_schema is None and path is not None:
+            try:
+                app.openapi_schema = json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                try:
+                    write_cache(app, path)
+                except OSError:
+                    logger.warning(
+                        "Could not cache the OpenAPI document", exc_info=True
+                    )
+        return FastAPI.openapi(app)
+
+    return openapi
+
+
+def main() -> int:
+    path = cache_path()
+    if path is None:
+        sys.exit("Set SOLAR_API_MOCK_OPENAPI_CACHE_DIR to cache the document.")
+    from solar_api_mock.web.app import app
+
+    print(write_cache(app, path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""On-demand profiling of single requests.
+
+When enabled in the settings, requests carrying the debug header are run
+under a deterministic profiler and their profile is kept, as collapsed
+stacks readable by `flamegraph.pl`, speedscope and the like, under the
+request id. Other requests only pay for a header lookup.
+
+The profiler hooks the event loop thread, so code of other requests
+running while the profiled one awaits shows up in its profile too; work
+sent to worker threads does not."""
+
+import logging
+import os
+import sys
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-Id"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def _label(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackProfiler:
+    """Self time per call stack of the calling thread, using `sys.setprofile`.
+
+    The current stack is tracked incrementally: a frame is pushed on each
+    call (including the resumption of a coroutine) and popped on each
+    return (including its suspension)."""
+
+    def __init__(self):
+        self.stacks: Counter[tuple[str, ...], float] = Counter()
+        self._stack: list[str] = []
+        self._last = 0.0
+
+    def _callback(self, frame, event, arg):
+        now = perf_counter()
+        self.stacks[tuple(self._stack)] += now - self._last
+        if event == "call":
+            self._stack.append(_label(frame.f_code))
+        elif event == "c_call":
+            self._stack.append(getattr(arg, "__qualname__", repr(arg)))
+        elif self._stack:
+            # return, c_return and c_exception
+            self._stack.pop()
+        self._last = perf_counter()
+
+    def start(self):
+        stack = []
+        # This frame is included: its return is the first event profiled.
+        frame = sys._getframe(0)
+        while frame is not None:
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        self._stack = stack[::-1]
+        self._last = perf_counter()
+        sys.setprofile(self._callback)
+
+    def stop(self):
+        sys.setprofile(None)
+        self.stacks[tuple(self._stack)] += perf_counter() - self._last
+
+    def collapsed(self) -> str:
+        """The profile as `frame;frame;frame microseconds` lines."""
+        lines = []
+        for stack, seconds in self.stacks.items():
+            microseconds = round(seconds * 1e6)
+            if stack and microseconds:
+                lines.append(f"{';'.join(stack)} {microseconds}")
+        return "\n".join(sorted(lines)) + "\n"
+
+
+class ProfileStore:
+    """The most recent profiles, by request id, optionally also written to
+    `<directory>/<request id>.collapsed`."""
+
+    def __init__(self, capacity: int = 100, directory: Path = None):
+        self.capacity = capacity
+        self.directory = directory
+        self.profiles: OrderedDict[str, str] = OrderedDict()
+
+    def add(self, request_id: str, profile: str):
+        self.profiles[request_id] = profile
+        self.profiles.move_to_end(request_id)
+        while len(self.profiles) > self.capacity:
+            self.profiles.popitem(last=False)
+        if self.directory is not None:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                (self.directory / f"{request_id}.collapsed").write_text(profile)
+            except OSError:
+                logger.exception("Could not write the profile of %s", request_id)
+
+    def get(self, request_id: str) -> str | None:
+        return self.profiles.get(request_id)
+
+
+profiles = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """Profile the requests carrying `header`, one at a time.
+
+    The profile is stored under the `X-Request-Id` of the request, or a
+    fresh id, which is returned in the `X-Profile-Id` response header."""
+
+    def __init__(
+        self, app, header: str = "X-Debug-Profile", store: ProfileStore = None
+    ):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.store = store if store is not None else profiles
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.active:
+            return await self.app(scope, receive, send)
+        if not any(name == self.header for name, _ in scope["headers"]):
+            return await self.app(scope, receive, send)
+
+        request_id = dict(scope["headers"]).get(
+            REQUEST_ID_HEADER.lower().encode("latin-1")
+        )
+        request_id = request_id.decode("latin-1") if request_id else uuid.uuid4().hex
+        # The id names a file: keep it to a safe alphabet.
+        request_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in request_id)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER.lower().encode("latin-1"), request_id.encode()),
+                ]
+            await send(message)
+
+        profiler = StackProfiler()
+        self.active = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            self.active = False
+            self.store.add(request_id, profiler.collapsed())
@@ -0,0 +1,54 @@
+"""In-process cache of encoded API responses.
+
+Responses are keyed by their ETag, which covers everything they depend
+on, so entries never go stale: a reload or a new release changes the
+keys, and the old entries age out. Each entry is an `EncodedBody` whose
+compressed variants are added as clients ask for them."""
+
+from collections import OrderedDict
+
+from solar_api_mock.core import metrics
+from solar_api_mock.web.compression import EncodedBody
+
+
+class ResponseCache:
+    """Least recently used entries, within `max_bytes` of bodies and their
+    variants. A budget of 0 disables the cache."""
+
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[EncodedBody, int]] = OrderedDict()
+
+    def get(self, key: str) -> EncodedBody | None:
+        if not self.max_bytes:
+            return None
+        entry = self._entries.get(key)
+        metrics.cache_lookup("response", entry is not None)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, body: EncodedBody):
+        """Store `body`, or account for the variants added to it since."""
+        if not self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        size = body.size
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (body, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Sized from `Settings.response_cache_bytes` by the app.
+responses = ResponseCache()
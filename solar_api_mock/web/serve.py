@@ -0,0 +1,71 @@
+"""Multi-worker launcher sharing one memory-mapped corpus.
+
+Each worker maps the corpus file read-only, so they all share the pages
+of the page cache and memory use stays flat as workers are added. With
+`shared_memory_dir`, the parent first stages a copy in that tmpfs
+directory, for sources on slow or network file systems; the copy is kept
+and reused by workers uvicorn respawns and by later runs."""
+
+import argparse
+import os
+from pathlib import Path
+
+import uvicorn
+
+from solar_api_mock.core.dataset import share_corpus
+from solar_api_mock.core.settings import ENV_PREFIX
+
+# tmpfs directory of the state the workers share.
+RUN_DIR = "/dev/shm"
+
+
+def serve(
+    dataset_path=None,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 1,
+    shared_memory_dir: str = None,
+):
+    if dataset_path is not None:
+        dataset_path = Path(dataset_path).resolve()
+        if shared_memory_dir:
+            # Workers find this copy already staged and only map it.
+            share_corpus(dataset_path, shared_memory_dir)
+            os.environ[f"{ENV_PREFIX}SHARED_MEMORY_DIR"] = str(shared_memory_dir)
+        os.environ[f"{ENV_PREFIX}DATASET_PATH"] = str(dataset_path)
+    shared = []
+    if workers > 1 and os.path.isdir(RUN_DIR):
+        # One set of token buckets, so that rate limits hold across workers,
+        # and one of fault profiles, so that they all see updates.
+        for setting, suffix in (
+            ("RATE_LIMIT_STORE", "buckets"),
+            ("FAULT_PROFILES_FILE", "faults"),
+        ):
+            if f"{ENV_PREFIX}{setting}" not in os.environ:
+                path = Path(RUN_DIR) / f"solar-api-mock-{os.getpid()}.{suffix}"
+                os.environ[f"{ENV_PREFIX}{setting}"] = str(path)
+                shared.append(path)
+    try:
+        uvicorn.run("solar_api_mock.web.app:app", host=host, port=port, workers=workers)
+    finally:
+        for path in shared:
+            path.unlink(missing_ok=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="solar-api-mock-serve")
+    parser.add_argument("--dataset", help="Corpus file to serve.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument(
+        "--shared-memory-dir",
+        default=None,
+        help="tmpfs directory to stage a copy of the corpus in, e.g. /dev/shm, for sources on slow or network file systems. By default the file is mapped in place.",
+    )
+    args = parser.parse_args(argv)
+    serve(args.dataset, args.host, args.port, args.workers, args.shared_memory_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -238,3 +238,29 @@ def test_read_data_layers_default():
 
     assert response.status_code == 200
     assert response.json() == expected_response
+
+
+def test_read_building_by_place_id():
+    response = client.get("/buildings/ChIJh0CMPQW7j4ARLrRiVvmg6Vs")
+    assert response.status_code == 200
+    assert response.json()["name"] == "buildings/ChIJh0CMPQW7j4ARLrRiVvmg6Vs"
+    assert client.get("/buildings/ChIJunknown").status_code == 404
+
+
+def test_read_region_summary():
+    corners = {"bounding_box.sw.latitude": 37, "bounding_box.ne.latitude": 38}
+    response = client.get(
+        "/regions:summarize",
+        params=corners
+        | {"bounding_box.sw.longitude": -123, "bounding_box.ne.longitude": -122},
+    )
+    assert response.status_code == 200
+    assert response.json()["buildingsCount"] == 1
+    # The fixture building is outside of the box.
+    response = client.get(
+        "/regions:summarize",
+        params=corners
+        | {"bounding_box.sw.longitude": 10, "bounding_box.ne.longitude": 11},
+    )
+    assert response.json()["buildingsCount"] == 0
+    assert response.json()["yearlyEnergyDcKwh"] == 0
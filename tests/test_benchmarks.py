@@ -0,0 +1,22 @@
+from benchmarks.layers import compare, measure, synthetic_corpus
+
+
+def test_synthetic_corpus_has_requested_panels(tmp_path):
+    corpus = synthetic_corpus(tmp_path / "one.corpus", 123)
+    assert len(corpus) == 1
+    assert len(corpus.panels_of(0)) == 123
+
+
+def test_measure_runs_min_rounds():
+    calls = []
+    stats = measure(lambda: calls.append(1), min_time=0, min_rounds=3)
+    assert stats["rounds"] == len(calls) == 3
+    assert stats["min"] <= stats["median"] <= stats["p95"]
+
+
+def test_compare_flags_slower_medians():
+    baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    results = {
+        "results": {"a": {"median": 1.1}, "b": {"median": 1.5}, "c": {"median": 9}}
+    }
+    assert compare(results, baseline, 0.2) == ["b: 1.50x the baseline median"]
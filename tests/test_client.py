@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+
+from solar_api_mock.client import LazyView, SolarClient
+from solar_api_mock.core import faults, properties, quota
+from solar_api_mock.core.errors import InvalidArgumentError, ResourceExhaustedError
+from solar_api_mock.core.faults import FaultInjector
+from solar_api_mock.core.quota import RateLimiter
+from solar_api_mock.core.settings import FaultProfile, RateLimit
+from solar_api_mock.web.app import app
+
+LOCATION = properties.LatLngProperties(latitude=37.4449739, longitude=-122.1391466)
+
+
+def _client(**kwargs) -> SolarClient:
+    return SolarClient(
+        "http://mock", transport=httpx.ASGITransport(app=app), seed=0, **kwargs
+    )
+
+
+async def _call(method: str, *args, **kwargs):
+    async with _client(backoff=0.001) as client:
+        return await getattr(client, method)(*args, **kwargs)
+
+
+def test_responses_are_properties_models():
+    building = asyncio.run(_call("find_closest_building_insights", LOCATION))
+    assert isinstance(building, properties.BuildingInsightsProperties)
+    assert building.center.latitude == pytest.approx(LOCATION.latitude)
+
+    layers = asyncio.run(_call("get_data_layers", LOCATION, view="DSM_LAYER"))
+    assert isinstance(layers, properties.DataLayersProperties)
+
+    masked = asyncio.run(
+        _call("get_building", building.name.split("/")[1], fields="name")
+    )
+    assert masked.name == building.name
+    assert masked.center is None
+
+
+def test_lazy_views_read_the_same_values():
+    validated = asyncio.run(_call("find_closest_building_insights", LOCATION))
+    lazy = asyncio.run(_call("find_closest_building_insights", LOCATION, lazy=True))
+    assert isinstance(lazy, LazyView)
+    segment = lazy.solarPotential.roofSegmentStats[0]
+    assert segment.center.latitude == (
+        validated.solarPotential.roofSegmentStats[0].center.latitude
+    )
+    assert lazy.solarPotential.maxArrayPanelsCount == (
+        validated.solarPotential.maxArrayPanelsCount
+    )
+    assert lazy.model_validate() == validated
+    with pytest.raises(AttributeError):
+        lazy.notAField
+
+
+def test_errors_raise_their_solar_api_error():
+    box = properties.LatLngBoxProperties.model_validate(
+        {
+            "sw": {"latitude": 38, "longitude": -123},
+            "ne": {"latitude": 37, "longitude": -122},
+        }
+    )
+    with pytest.raises(InvalidArgumentError, match="bounding_box"):
+        asyncio.run(_call("summarize_region", box))
+
+
+def test_retries_unavailable_and_exhausted_calls(monkeypatch):
+    monkeypatch.setattr(
+        faults,
+        "injector",
+        FaultInjector(
+            {"/dataLayers:get": FaultProfile(error_rates={"UNAVAILABLE": 0.5})}, seed=2
+        ),
+    )
+
+    async def fetch():
+        async with _client(backoff=0.001) as client:
+            return await client.gather(client.get_data_layers, [LOCATION] * 20)
+
+    layers = asyncio.run(fetch())
+    assert all(isinstance(layer, properties.DataLayersProperties) for layer in layers)
+
+    monkeypatch.setattr(
+        quota,
+        "limiter",
+        RateLimiter({"/buildingInsights:findClosest": RateLimit(queries_per_day=1)}),
+    )
+
+    async def exhaust():
+        async with _client(retries=2, backoff=0.001) as client:
+            return await client.gather(
+                client.find_closest_building_insights,
+                [LOCATION] * 3,
+                return_exceptions=True,
+            )
+
+    results = asyncio.run(exhaust())
+    assert sum(isinstance(r, ResourceExhaustedError) for r in results) == 2
+
+
+def test_gather_bounds_calls_in_flight():
+    in_flight = peak = 0
+
+    async def call(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return item * 2
+
+    async def run():
+        async with _client(max_connections=4) as client:
+            return await client.gather(call, range(50))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(50)]
+    assert peak == 4
+
+
+def test_retry_after_is_capped():
+    client = _client(max_backoff=2.0)
+    for header, delay in (("3600", 2.0), ("-5", 0.0), ("0.5", 0.5)):
+        response = httpx.Response(429, headers={"Retry-After": header})
+        assert client._delay(0, response) == delay
+    asyncio.run(client.aclose())
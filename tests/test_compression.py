@@ -0,0 +1,81 @@
+import gzip
+
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core import metrics
+from solar_api_mock.web import compression, etag, response_cache
+from solar_api_mock.web.app import app
+from solar_api_mock.web.compression import EncodedBody, negotiate
+from solar_api_mock.web.response_cache import ResponseCache
+
+client = TestClient(app)
+
+
+def test_negotiate_honours_weights():
+    assert negotiate(None) == "identity"
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") == "identity"
+    assert negotiate("deflate, *;q=0.5") in compression.ENCODINGS
+    assert negotiate("identity") == "identity"
+
+
+def test_encoded_body_compresses_once_and_deterministically():
+    identity = b'{"name": "buildings/x"}' * 100
+    body = EncodedBody(identity)
+    compressed, encoding = body.encode("gzip", min_bytes=1024)
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == identity
+    assert body.encode("gzip", min_bytes=1024)[0] is compressed
+    assert EncodedBody(identity).encode("gzip", min_bytes=1024)[0] == compressed
+    assert body.encode("gzip", min_bytes=len(identity) + 1) == (identity, "identity")
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=250)
+    for key in "abc":
+        cache.put(key, EncodedBody(b"x" * 100))
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    cache.put("d", EncodedBody(b"x" * 100))
+    assert cache.get("c") is None
+    assert cache.size == 200
+    cache.put("e", EncodedBody(b"x" * 300))
+    assert cache.get("e") is None
+
+
+def _get(headers):
+    return client.get(
+        "/buildingInsights:findClosest",
+        params={"lat_lon.latitude": 37.4449739, "lat_lon.longitude": -122.1391466},
+        headers=headers,
+    )
+
+
+def test_api_routes_compress_with_variant_etags(monkeypatch):
+    monkeypatch.setattr(response_cache.responses, "max_bytes", 1 << 20)
+    identity = _get({"Accept-Encoding": "identity"})
+    compressed = _get({"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == etag.VARY
+    assert compressed.json() == identity.json()
+    tag = identity.headers["etag"]
+    assert compressed.headers["etag"] == f'{tag[:-1]}-gzip"'
+
+    # Served from the cache, compressed on the first request only.
+    count = metrics.COMPRESSION_SECONDS.count("gzip")
+    assert _get({"Accept-Encoding": "gzip"}).json() == identity.json()
+    assert metrics.COMPRESSION_SECONDS.count("gzip") == count
+
+    not_modified = _get(
+        {"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == compressed.headers["etag"]
+
+
+def test_small_responses_are_not_compressed():
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
@@ -1,6 +1,13 @@
 import json
 
-from solar_api_mock.core.main import get_building_insights, get_data_layers
+import numpy as np
+
+from solar_api_mock.core import geotiff
+from solar_api_mock.core.main import (
+    get_building_insights,
+    get_data_layer_arrays,
+    get_data_layers,
+)
 
 
 def test_get_building_insights_default():
@@ -219,3 +226,48 @@ def test_get_data_layers_default():
     }
 
     assert json.loads(response) == expected_response
+
+
+def test_get_data_layer_arrays_are_views_of_the_rasters():
+    center = {"latitude": 37.4449739, "longitude": -122.13914659999998}
+    layers = json.loads(get_data_layers(center, 50))
+    dsm = geotiff.raster(layers["dsmUrl"].partition("id=")[2])
+
+    arrays = get_data_layer_arrays(center, radius_meters=1000)
+    assert set(arrays) == {
+        "dsm",
+        "rgb",
+        "mask",
+        "annualFlux",
+        "monthlyFlux",
+        "hourlyShade",
+    }
+    assert len(arrays["hourlyShade"]) == 12
+    assert arrays["hourlyShade"][0].shape == (100, 100, 24)
+    assert arrays["rgb"].shape == (1000, 1000, 3)
+    # The whole raster, without a copy.
+    assert np.array_equal(arrays["dsm"], dsm[..., 0])
+    assert np.shares_memory(arrays["dsm"], dsm)
+    assert not arrays["dsm"].flags.writeable
+
+    small = get_data_layer_arrays(center, radius_meters=5)
+    assert small["dsm"].shape == (100, 100)
+    assert np.array_equal(small["dsm"], dsm[450:550, 450:550, 0])
+    assert small["monthlyFlux"].shape == (20, 20, 12)
+
+    # Sampled every 5 layer pixels, still a view; coarser layers as is.
+    coarse = get_data_layer_arrays(center, pixel_size_meters=0.5)
+    assert coarse["dsm"].shape == (200, 200)
+    assert np.shares_memory(coarse["dsm"], dsm)
+    assert coarse["monthlyFlux"].shape == (200, 200, 12)
+    assert get_data_layer_arrays(center, pixel_size_meters=0.25)["dsm"].shape == (
+        400,
+        400,
+    )
+
+    window = {
+        "sw": center,
+        "ne": {"latitude": 40.0, "longitude": 0.0},
+    }
+    quarter = get_data_layer_arrays(center, window=window)
+    assert np.array_equal(quarter["dsm"], dsm[:500, 500:, 0])
@@ -0,0 +1,39 @@
+import numpy as np
+
+from solar_api_mock.core.coverage import BloomFilter, CoverageMap
+
+
+def test_bloom_filter_has_no_false_negatives():
+    keys = np.arange(-5_000, 5_000) * 7_919
+    bloom = BloomFilter(keys, false_positive_rate=0.01)
+    assert all(int(key) in bloom for key in keys)
+    false_positives = sum(int(key) in bloom for key in np.arange(1, 10_000) * 7_919 + 1)
+    assert false_positives < 300
+
+
+def test_coverage_bitmap_and_bloom_agree_inside_extent():
+    rng = np.random.default_rng(0)
+    latitude = rng.uniform(37.4, 37.5, 500)
+    longitude = rng.uniform(-122.2, -122.1, 500)
+    bitmap = CoverageMap(latitude, longitude, 500)
+    bloom = CoverageMap(latitude, longitude, 500, max_bitmap_bits=1)
+    assert (bitmap.kind, bloom.kind) == ("bitmap", "bloom")
+
+    for lat, lng in zip(latitude, longitude):
+        assert (lat, lng) in bitmap
+        assert (lat, lng) in bloom
+    assert (48.85, 2.35) not in bitmap
+    assert (48.85, 2.35) not in bloom
+    assert (37.45, -121.5) not in bitmap
+
+
+def test_coverage_covers_search_radius():
+    coverage = CoverageMap(np.array([0.0]), np.array([0.0]), 2_000)
+    assert (0.017, 0.0) in coverage
+    assert (0.0, -0.017) in coverage
+    assert (0.05, 0.0) not in coverage
+
+
+def test_empty_coverage():
+    coverage = CoverageMap(np.array([]), np.array([]), 1_000)
+    assert (0.0, 0.0) not in coverage
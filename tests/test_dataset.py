@@ -0,0 +1,654 @@
+import asyncio
+import gzip
+import json
+import shutil
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core import dataset, geotiff, region_tables, regions, schema
+from solar_api_mock.core.dataset import (
+    QUALITIES,
+    Corpus,
+    CorpusFormatError,
+    CorpusHolder,
+    qualifying_qualities,
+    share_corpus,
+)
+from solar_api_mock.core.errors import InvalidArgumentError, NotFoundError
+from solar_api_mock.core.main import (
+    build_dataset,
+    cli,
+    export_building_insights,
+    get_building_insights,
+    get_data_layer_arrays,
+    get_data_layers,
+)
+from solar_api_mock.core.properties import (
+    BuildingInsightsProperties,
+    LatLngBoxProperties,
+    LatLngProperties,
+)
+from solar_api_mock.core.corpus_schema import (
+    DATA_LAYER_VIEWS,
+    CorpusBuildingInsightsBuilder,
+)
+from solar_api_mock.core.settings import get_settings
+from solar_api_mock.web.app import app
+
+BBOX = (37.40, -122.20, 37.50, -122.05)
+
+
+@pytest.fixture(scope="module")
+def corpus_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("corpus") / "buildings.corpus"
+    build_dataset(path, 2_000, *BBOX, seed=7, workers=2)
+    return path
+
+
+@pytest.fixture
+def corpus(corpus_path, monkeypatch):
+    corpus = Corpus(corpus_path)
+    monkeypatch.setattr(dataset, "corpus_holder", CorpusHolder(corpus))
+    return corpus
+
+
+def test_build_dataset_is_sorted_and_consistent(corpus):
+    assert len(corpus) == 2_000
+    quality = corpus["imagery_quality"]
+    assert np.all(np.diff(quality) >= 0)
+    for q in np.unique(quality):
+        rows = slice(corpus.cell_offsets[q, 0], corpus.cell_offsets[q, -1])
+        assert np.all(quality[rows] == q)
+        cells = corpus.grid.cell(corpus.latitude[rows], corpus.longitude[rows])
+        assert np.all(np.diff(cells) >= 0)
+    assert corpus.cell_offsets[-1, -1] == len(corpus)
+    assert corpus.panel_offsets[-1] == len(corpus.panels)
+    assert np.array_equal(
+        np.diff(corpus.panel_offsets), corpus["max_array_panels_count"]
+    )
+    assert not corpus.latitude.flags.writeable
+
+
+def test_build_dataset_is_deterministic(corpus_path, tmp_path):
+    other = tmp_path / "again.corpus"
+    build_dataset(other, 2_000, *BBOX, seed=7, workers=1)
+    assert other.read_bytes() == corpus_path.read_bytes()
+
+
+def test_nearest_matches_brute_force(corpus):
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        latitude = rng.uniform(BBOX[0] - 0.05, BBOX[2] + 0.05)
+        longitude = rng.uniform(BBOX[1] - 0.05, BBOX[3] + 0.05)
+        distance = np.hypot(
+            corpus.latitude - latitude,
+            (corpus.longitude - longitude) * np.cos(np.radians(latitude)),
+        )
+        assert corpus.nearest(latitude, longitude) == np.argmin(distance)
+
+
+@pytest.mark.parametrize(
+    "required_quality, exact, expected",
+    [
+        (None, False, {"HIGH"}),
+        ("IMAGERY_QUALITY_UNSPECIFIED", False, {"HIGH"}),
+        ("LOW", False, {"HIGH", "MEDIUM", "LOW"}),
+        ("BASE", False, {"HIGH", "MEDIUM", "LOW", "BASE"}),
+        ("MEDIUM", True, {"MEDIUM"}),
+        (None, True, {"HIGH"}),
+    ],
+)
+def test_qualifying_qualities(required_quality, exact, expected):
+    qualities = qualifying_qualities(required_quality, exact)
+    assert {QUALITIES[q] for q in qualities} == expected
+
+
+@pytest.mark.parametrize("qualities", [[1], [2], [1, 2, 3], [4]])
+def test_nearest_searches_only_qualifying_partitions(corpus, qualities):
+    allowed = np.isin(corpus["imagery_quality"], qualities)
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        latitude = rng.uniform(*BBOX[::2])
+        longitude = rng.uniform(*BBOX[1::2])
+        distance = np.hypot(
+            corpus.latitude - latitude,
+            (corpus.longitude - longitude) * np.cos(np.radians(latitude)),
+        )
+        distance[~allowed] = np.inf
+        row = corpus.nearest(latitude, longitude, qualities=qualities)
+        assert row == np.argmin(distance)
+
+
+def test_routes_honor_quality(corpus):
+    client = TestClient(app)
+    location = {"location.latitude": 37.45, "location.longitude": -122.1}
+    response = client.get(
+        "/dataLayers:get",
+        params={
+            **location,
+            "required_quality": "MEDIUM",
+            "exact_quality_required": True,
+        },
+    )
+    assert response.json()["imageryQuality"] == "MEDIUM"
+
+    response = client.get(
+        "/buildingInsights:findClosest",
+        params={
+            "lat_lon.latitude": 37.45,
+            "lat_lon.longitude": -122.1,
+            "required_quality": "BASE",
+        },
+    )
+    assert (
+        response.json()["center"]["latitude"]
+        == corpus.latitude[corpus.nearest(37.45, -122.1)]
+    )
+
+
+def test_get_building_insights_from_corpus(corpus):
+    row = corpus.nearest(37.45, -122.1, qualities=[QUALITIES.index("HIGH")])
+    response = json.loads(
+        get_building_insights({"latitude": 37.45, "longitude": -122.1})
+    )
+    BuildingInsightsProperties.model_validate(response)
+    assert response["name"] == f"buildings/{corpus['place_id'][row].decode()}"
+    solar_potential = response["solarPotential"]
+    assert len(solar_potential["solarPanels"]) == solar_potential["maxArrayPanelsCount"]
+    assert [c["panelsCount"] for c in solar_potential["solarPanelConfigs"]] == list(
+        range(4, solar_potential["maxArrayPanelsCount"] + 1)
+    )
+
+
+def test_field_mask_skips_masked_out_subtrees(corpus, monkeypatch):
+    full = json.loads(get_building_insights({"latitude": 37.45, "longitude": -122.1}))
+    calls = []
+    panel_configs = CorpusBuildingInsightsBuilder._panel_configs
+    monkeypatch.setattr(
+        CorpusBuildingInsightsBuilder,
+        "_panel_configs",
+        lambda *args: calls.append(args) or panel_configs(*args),
+    )
+    response = json.loads(
+        get_building_insights(
+            {"latitude": 37.45, "longitude": -122.1},
+            fields="center,solarPotential(maxArrayPanelsCount,buildingStats)",
+        )
+    )
+    assert calls == []
+    assert response == {
+        "center": full["center"],
+        "solarPotential": {
+            "maxArrayPanelsCount": full["solarPotential"]["maxArrayPanelsCount"],
+            "buildingStats": full["solarPotential"]["buildingStats"],
+        },
+    }
+
+    response = json.loads(
+        get_building_insights(
+            {"latitude": 37.45, "longitude": -122.1},
+            fields="solarPotential.financialAnalyses",
+        )
+    )
+    assert len(calls) == 1
+    assert response["solarPotential"] == {
+        "financialAnalyses": full["solarPotential"]["financialAnalyses"]
+    }
+
+
+def test_routes_use_corpus(corpus):
+    client = TestClient(app)
+    response = client.get(
+        "/buildingInsights:findClosest",
+        params={"lat_lon.latitude": 37.45, "lat_lon.longitude": -122.1},
+    )
+    assert response.status_code == 200
+    row = corpus.nearest(37.45, -122.1, qualities=[QUALITIES.index("HIGH")])
+    assert response.json()["center"]["latitude"] == corpus.latitude[row]
+    # The location may also be named as in the Google API.
+    google = client.get(
+        "/buildingInsights:findClosest",
+        params={"location.latitude": 37.45, "location.longitude": -122.1},
+    )
+    assert google.json() == response.json()
+
+    response = client.get(
+        "/dataLayers:get",
+        params={
+            "location.latitude": 37.45,
+            "location.longitude": -122.1,
+            "view": "DSM_LAYER",
+        },
+    )
+    assert response.status_code == 200
+    assert set(response.json()) == {
+        "imageryDate",
+        "imageryProcessedDate",
+        "imageryQuality",
+        "dsmUrl",
+    }
+
+
+def test_fixture_served_without_a_loaded_corpus(corpus, monkeypatch):
+    assert schema.dataset_version() == corpus.fingerprint
+    # The dataset module is imported, but its holder is empty.
+    monkeypatch.setattr(dataset, "corpus_holder", CorpusHolder())
+    assert schema.dataset_version() == "fixture"
+    location = LatLngProperties(latitude=37.45, longitude=-122.1)
+    builder = schema.building_insights_builder(location)
+    assert type(builder) is schema.BuildingInsightsBuilder
+
+
+def test_find_by_place_id(corpus):
+    place_ids = corpus["place_id"]
+    assert "place_id_sorted" in corpus.columns
+    for row in range(0, len(corpus), 97):
+        assert corpus.find(place_ids[row].decode()) == row
+    assert corpus.find("ChIJ-not-a-building") is None
+    assert corpus.find("x" * 40) is None
+
+    # Corpora written without the index get one sorted on first use.
+    del corpus.columns["place_id_sorted"], corpus.columns["place_id_rows"]
+    corpus._place_id_index = None
+    assert corpus.find(place_ids[5].decode()) == 5
+
+
+def test_building_route_looks_up_place_id(corpus):
+    client = TestClient(app)
+    row = 123
+    place_id = corpus["place_id"][row].decode()
+    response = client.get(f"/buildings/{place_id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == f"buildings/{place_id}"
+    assert response.json()["center"]["latitude"] == corpus.latitude[row]
+
+    masked = client.get(f"/buildings/{place_id}", params={"fields": "name"})
+    assert masked.json() == {"name": f"buildings/{place_id}"}
+    missing = client.get("/buildings/ChIJ-not-a-building")
+    assert missing.status_code == 404
+    assert missing.json()["error"]["status"] == "NOT_FOUND"
+
+
+def _box(south, west, north, east) -> LatLngBoxProperties:
+    return LatLngBoxProperties.model_validate(
+        {
+            "sw": {"latitude": south, "longitude": west},
+            "ne": {"latitude": north, "longitude": east},
+        }
+    )
+
+
+def _summarize_brute_force(corpus, box) -> np.ndarray:
+    bounds = schema.box_bounds(box)
+    rows = np.flatnonzero(regions.in_box(*bounds, corpus.latitude, corpus.longitude))
+    values = region_tables.building_values(corpus.columns, rows)
+    return region_tables.cell_aggregates(
+        values, np.zeros(len(rows), dtype=np.int64), 1
+    )[:, 0]
+
+
+def test_summarize_matches_brute_force(corpus):
+    assert corpus.columns["region_tables"].shape == (
+        regions.TABLES,
+        corpus.grid.rows + 1,
+        corpus.grid.cols + 1,
+    )
+    rng = np.random.default_rng(1)
+    boxes = [
+        _box(*BBOX),
+        _box(-90, -180, 90, 180),
+        _box(37.45, -122.1, 37.45, -122.1),
+        _box(10, 10, 11, 11),
+        # Across the antimeridian: all but a band of the corpus.
+        _box(37.42, -122.1, 37.48, -122.15),
+    ]
+    for _ in range(40):
+        south, north = np.sort(rng.uniform(BBOX[0] - 0.02, BBOX[2] + 0.02, 2))
+        west, east = np.sort(rng.uniform(BBOX[1] - 0.02, BBOX[3] + 0.02, 2))
+        boxes.append(_box(south, west, north, east))
+    for box in boxes:
+        expected = _summarize_brute_force(corpus, box)
+        bounds = schema.box_bounds(box)
+        assert np.allclose(region_tables.summarize(corpus, *bounds), expected)
+    assert region_tables.summarize(corpus, *BBOX)[0] == len(corpus)
+
+    # Corpora written without the tables get them summed on first use.
+    written = corpus.region_tables()
+    del corpus.columns["region_tables"]
+    corpus._region_tables = None
+    assert np.allclose(corpus.region_tables(), written)
+
+
+def test_region_summary_route(corpus):
+    client = TestClient(app)
+    box = _box(37.42, -122.18, 37.47, -122.09)
+    params = {
+        "bounding_box.sw.latitude": 37.42,
+        "bounding_box.sw.longitude": -122.18,
+        "bounding_box.ne.latitude": 37.47,
+        "bounding_box.ne.longitude": -122.09,
+    }
+    response = client.get("/regions:summarize", params=params)
+    assert response.status_code == 200
+    summary = response.json()
+    expected = _summarize_brute_force(corpus, box)
+    assert summary["buildingsCount"] == expected[0]
+    assert summary["yearlyEnergyDcKwh"] == pytest.approx(expected[3])
+    for name in regions.REGION_DISTRIBUTIONS:
+        buckets = summary[f"{name}Distribution"]
+        assert sum(b["buildingsCount"] for b in buckets) == expected[0]
+        assert "upperBound" not in buckets[-1]
+
+    inverted = client.get(
+        "/regions:summarize", params=params | {"bounding_box.sw.latitude": 38}
+    )
+    assert inverted.status_code == 400
+    assert client.get("/regions:summarize").status_code == 400
+
+
+def test_export_building_insights_matches_single_calls(corpus, corpus_path, tmp_path):
+    rng = np.random.default_rng(2)
+    locations = [
+        (rng.uniform(BBOX[0], BBOX[2]), rng.uniform(BBOX[1], BBOX[3]))
+        for _ in range(40)
+    ]
+    # Outside of the coverage of the corpus, and invalid.
+    locations[7] = (10.0, 10.0)
+    locations[8] = (91.0, 0.0)
+    path = tmp_path / "insights.ndjson.gz"
+    count = export_building_insights(
+        path,
+        iter(locations),
+        fields="name,center",
+        workers=2,
+        batch_size=6,
+        dataset_path=corpus_path,
+    )
+    assert count == len(locations)
+    with gzip.open(path, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == len(locations)
+    assert lines[7]["error"]["status"] == "NOT_FOUND"
+    assert lines[8]["error"]["status"] == "INVALID_ARGUMENT"
+
+    for i in (0, 13, 39):
+        latitude, longitude = locations[i]
+        expected = get_building_insights(
+            {"latitude": latitude, "longitude": longitude}, fields="name,center"
+        )
+        assert lines[i] == json.loads(expected)
+
+    with pytest.raises(InvalidArgumentError):
+        export_building_insights(tmp_path / "masked.ndjson", [], fields="notAField")
+    assert not (tmp_path / "masked.ndjson").exists()
+
+
+def test_export_cli_reads_csv(corpus_path, tmp_path):
+    locations = tmp_path / "locations.csv"
+    locations.write_text(
+        "latitude,longitude,label\n37.45,-122.1,home\n\nfoo,bar\n37.46\n"
+        "37.46,-122.11,work\n"
+    )
+    output = tmp_path / "insights.ndjson"
+    cli(
+        [
+            "export-insights",
+            str(locations),
+            str(output),
+            "--dataset",
+            str(corpus_path),
+            "--fields",
+            "center",
+            "-j",
+            "1",
+        ]
+    )
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == 4
+    assert "center" in lines[0] and "center" in lines[3]
+    # Malformed rows get an error line in their place.
+    for line in lines[1:3]:
+        assert line["error"]["status"] == "INVALID_ARGUMENT"
+
+    with pytest.raises(SystemExit):
+        cli(
+            ["export-insights", str(locations), str(output), "--required-quality", "HI"]
+        )
+
+
+def test_data_layer_arrays_are_centered_on_the_building(corpus):
+    row = corpus.nearest(37.45, -122.1, qualities=[QUALITIES.index("HIGH")])
+    center = {"latitude": corpus.latitude[row], "longitude": corpus.longitude[row]}
+    layers = json.loads(get_data_layers(center, 50, view="IMAGERY_LAYERS"))
+    rgb = geotiff.raster(layers["rgbUrl"].partition("id=")[2])
+
+    arrays = get_data_layer_arrays(center, radius_meters=2, view="IMAGERY_LAYERS")
+    assert set(arrays) == {"dsm", "rgb", "mask"}
+    assert np.array_equal(arrays["rgb"], rgb[480:520, 480:520])
+    assert np.shares_memory(arrays["rgb"], rgb)
+
+
+def test_share_corpus_stages_once(corpus_path, tmp_path):
+    shared = share_corpus(corpus_path, tmp_path)
+    assert shared.read_bytes() == corpus_path.read_bytes()
+    assert share_corpus(corpus_path, tmp_path) == shared
+    assert list(tmp_path.glob("*.corpus")) == [shared]
+
+    not_a_corpus = tmp_path / "not-a.corpus"
+    not_a_corpus.write_bytes(b"not a corpus")
+    with pytest.raises(CorpusFormatError):
+        share_corpus(not_a_corpus, tmp_path)
+    assert sorted(tmp_path.glob("*.corpus")) == sorted([shared, not_a_corpus])
+
+    first, second = Corpus(shared), Corpus(shared)
+    assert not first.latitude.flags.writeable
+    assert np.array_equal(first.latitude, second.latitude)
+
+
+@pytest.fixture(scope="module")
+def other_corpus_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("corpus") / "other.corpus"
+    build_dataset(path, 500, *BBOX, seed=8, workers=1)
+    return path
+
+
+def test_reload_keeps_in_flight_corpus(corpus, other_corpus_path):
+    holder = dataset.corpus_holder
+    in_flight = holder.corpus
+    row = in_flight.nearest(37.45, -122.1)
+    latitude = in_flight.latitude[row]
+
+    holder.load(other_corpus_path)
+
+    assert holder.version == 2
+    assert len(holder.corpus) == 500
+    assert in_flight.latitude[row] == latitude
+
+
+def test_reload_endpoint(corpus, corpus_path, other_corpus_path, monkeypatch):
+    client = TestClient(app)
+    response = client.post(
+        "/admin/dataset:reload", json={"path": str(other_corpus_path)}
+    )
+    assert response.status_code == 400
+    assert dataset.corpus_holder.version == 1
+
+    configured = other_corpus_path.with_name("configured.corpus")
+    monkeypatch.setenv("SOLAR_API_MOCK_DATASET_PATH", str(configured))
+    get_settings.cache_clear()
+    try:
+        response = client.post(
+            "/admin/dataset:reload", json={"path": str(other_corpus_path)}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "path": str(other_corpus_path),
+            "version": 2,
+            "buildings": 500,
+        }
+
+        for path in (corpus_path, configured, "missing.corpus"):
+            response = client.post("/admin/dataset:reload", json={"path": str(path)})
+            assert response.status_code == 400
+            assert str(path) not in response.text
+        assert dataset.corpus_holder.version == 2
+    finally:
+        get_settings.cache_clear()
+
+
+def test_conditional_get(corpus, other_corpus_path, monkeypatch):
+    client = TestClient(app)
+    params = {"lat_lon.latitude": 37.45, "lat_lon.longitude": -122.1}
+    response = client.get("/buildingInsights:findClosest", params=params)
+    tag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=300"
+
+    other = client.get(
+        "/buildingInsights:findClosest", params={**params, "required_quality": "LOW"}
+    )
+    assert other.headers["etag"] != tag
+
+    # Answered before any builder runs.
+    with monkeypatch.context() as patch:
+        patch.setattr(schema, "building_insights_builder", None)
+        # The client accepts gzip: `tag` is that of the gzip variant.
+        identity_tag = tag.replace("-gzip", "")
+        for if_none_match, matched in (
+            (tag, tag),
+            (f'"other", W/{tag}', tag),
+            (identity_tag, identity_tag),
+        ):
+            response = client.get(
+                "/buildingInsights:findClosest",
+                params=params,
+                headers={"If-None-Match": if_none_match},
+            )
+            assert response.status_code == 304
+            assert response.headers["etag"] == matched
+            assert response.content == b""
+
+    # `*` matches only responses that exist.
+    for location, status in (((37.45, -122.1), 304), ((10, 10), 404)):
+        response = client.get(
+            "/buildingInsights:findClosest",
+            params={"lat_lon.latitude": location[0], "lat_lon.longitude": location[1]},
+            headers={"If-None-Match": "*"},
+        )
+        assert response.status_code == status
+    assert response.json()["error"]["status"] == "NOT_FOUND"
+
+    dataset.corpus_holder.load(other_corpus_path)
+    response = client.get(
+        "/buildingInsights:findClosest",
+        params=params,
+        headers={"If-None-Match": tag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+
+def test_watch_reloads_replaced_file(corpus_path, other_corpus_path, tmp_path):
+    watched = tmp_path / "watched.corpus"
+    shutil.copyfile(corpus_path, watched)
+    holder = CorpusHolder()
+    holder.load(watched)
+
+    async def replace_and_wait():
+        watcher = asyncio.create_task(holder.watch(watched, 0.01))
+        await asyncio.sleep(0.05)
+        shutil.copyfile(other_corpus_path, tmp_path / "next.corpus")
+        (tmp_path / "next.corpus").replace(watched)
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if holder.version == 2:
+                break
+        watcher.cancel()
+
+    asyncio.run(replace_and_wait())
+    assert holder.version == 2
+    assert len(holder.corpus) == 500
+
+
+def test_nearest_respects_max_distance(corpus):
+    row = corpus.nearest(37.45, -122.1)
+    distance = corpus.distance_meters(row, 37.45, -122.1)
+    assert corpus.nearest(37.45, -122.1, distance + 1) == row
+    assert corpus.nearest(37.45, -122.1, distance - 1) is None
+
+
+def test_not_found_outside_coverage(corpus):
+    client = TestClient(app)
+    response = client.get(
+        "/buildingInsights:findClosest",
+        params={"lat_lon.latitude": 48.85, "lat_lon.longitude": 2.35},
+    )
+    assert response.status_code == 404
+    assert response.json() == {
+        "error": {
+            "code": 404,
+            "message": "Requested entity was not found.",
+            "status": "NOT_FOUND",
+        }
+    }
+
+    response = client.get(
+        "/dataLayers:get",
+        params={"location.latitude": 37.45, "location.longitude": -121.0},
+    )
+    assert response.status_code == 404
+
+    with pytest.raises(NotFoundError):
+        get_building_insights({"latitude": 48.85, "longitude": 2.35})
+
+
+def test_invalid_location(corpus):
+    client = TestClient(app)
+    response = client.get(
+        "/buildingInsights:findClosest",
+        params={"lat_lon.latitude": 137.45, "lat_lon.longitude": -122.1},
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["status"] == "INVALID_ARGUMENT"
+
+
+def test_trusted_responses_match_validated_ones(corpus, monkeypatch):
+    client = TestClient(app)
+    queries = [("/buildingInsights:findClosest", {}), ("/dataLayers:get", {})]
+    queries += [("/dataLayers:get", {"view": view}) for view in DATA_LAYER_VIEWS]
+    for row in range(0, len(corpus), 97):
+        latitude, longitude = corpus.latitude[row], corpus.longitude[row]
+        queries += [
+            (
+                "/buildingInsights:findClosest",
+                {
+                    "lat_lon.latitude": latitude,
+                    "lat_lon.longitude": longitude,
+                    "required_quality": "BASE",
+                },
+            ),
+            (
+                "/dataLayers:get",
+                {
+                    "location.latitude": latitude,
+                    "location.longitude": longitude,
+                    "required_quality": "BASE",
+                    "view": "FULL_LAYERS",
+                },
+            ),
+        ]
+
+    def responses(validate: bool):
+        monkeypatch.setenv("SOLAR_API_MOCK_VALIDATE_RESPONSES", str(validate))
+        get_settings.cache_clear()
+        try:
+            return [client.get(path, params=p).content for path, p in queries]
+        finally:
+            monkeypatch.delenv("SOLAR_API_MOCK_VALIDATE_RESPONSES")
+            get_settings.cache_clear()
+
+    assert responses(validate=False) == responses(validate=True)
+    # The fixture building and layers.
+    monkeypatch.setattr(dataset, "corpus_holder", CorpusHolder())
+    assert responses(validate=False) == responses(validate=True)
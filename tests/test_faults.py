@@ -0,0 +1,111 @@
+import statistics
+from time import perf_counter
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from solar_api_mock.core import faults, metrics
+from solar_api_mock.core.faults import FaultInjector
+from solar_api_mock.core.settings import FaultProfile, LatencyProfile, Settings
+from solar_api_mock.web.app import app
+
+client = TestClient(app)
+
+
+def test_delays_follow_their_distribution():
+    injector = FaultInjector(seed=3)
+    assert injector.delay(LatencyProfile(seconds=0.2)) == 0.2
+
+    lognormal = LatencyProfile(distribution="lognormal", seconds=0.1, sigma=0.5)
+    delays = [injector.delay(lognormal) for _ in range(5000)]
+    assert statistics.median(delays) == pytest.approx(0.1, rel=0.05)
+
+    histogram = LatencyProfile(
+        distribution="histogram",
+        bucket_seconds=[0.01, 0.05, 0.5],
+        bucket_counts=[3, 0, 1],
+    )
+    delays = [injector.delay(histogram) for _ in range(4000)]
+    assert all(0 <= d <= 0.01 or 0.05 <= d <= 0.5 for d in delays)
+    assert sum(d <= 0.01 for d in delays) / len(delays) == pytest.approx(0.75, abs=0.03)
+
+
+def test_errors_follow_their_rates():
+    injector = FaultInjector(seed=5)
+    profile = FaultProfile(error_rates={"UNAVAILABLE": 0.2, "INTERNAL": 0.1})
+    draws = [injector.error(profile) for _ in range(10000)]
+    assert draws.count("UNAVAILABLE") / len(draws) == pytest.approx(0.2, abs=0.02)
+    assert draws.count("INTERNAL") / len(draws) == pytest.approx(0.1, abs=0.02)
+    assert FaultInjector(seed=5).error(profile) == draws[0]
+
+
+def test_invalid_profiles_are_rejected():
+    with pytest.raises(ValidationError):
+        FaultProfile(error_rates={"TEAPOT": 0.1})
+    with pytest.raises(ValidationError):
+        FaultProfile(error_rates={"UNAVAILABLE": 0.7, "INTERNAL": 0.5})
+    with pytest.raises(ValidationError):
+        LatencyProfile(distribution="histogram", bucket_seconds=[0.2, 0.1])
+    with pytest.raises(ValidationError):
+        LatencyProfile(
+            distribution="histogram", bucket_seconds=[0.2, 0.1], bucket_counts=[1, 1]
+        )
+
+    settings = Settings.from_env(
+        {
+            "SOLAR_API_MOCK_FAULT_PROFILES": '{"/dataLayers:get": '
+            '{"latency": {"seconds": 0.1}, "error_rates": {"UNAVAILABLE": 0.01}}}'
+        }
+    )
+    assert settings.fault_profiles["/dataLayers:get"].latency.seconds == 0.1
+
+
+def test_admin_endpoint_switches_profiles(monkeypatch):
+    monkeypatch.setattr(faults, "injector", FaultInjector(seed=1))
+    profiles = {
+        "/buildingInsights:findClosest": {
+            "latency": {"distribution": "fixed", "seconds": 0.05},
+            "error_rates": {"UNAVAILABLE": 1.0},
+        },
+        "/dataLayers:get": {"latency": {"seconds": 0.05}},
+    }
+    assert client.put("/admin/faults", json=profiles).status_code == 200
+    assert client.get("/admin/faults").json()["/dataLayers:get"]["latency"][
+        "seconds"
+    ] == pytest.approx(0.05)
+
+    count = metrics.INJECTED_FAULTS.values.get(
+        ("/buildingInsights:findClosest", "UNAVAILABLE"), 0
+    )
+    response = client.get("/buildingInsights:findClosest")
+    assert response.status_code == 503
+    assert response.json()["error"]["status"] == "UNAVAILABLE"
+    assert (
+        metrics.INJECTED_FAULTS.values[("/buildingInsights:findClosest", "UNAVAILABLE")]
+        == count + 1
+    )
+
+    start = perf_counter()
+    assert client.get("/dataLayers:get").status_code == 200
+    assert perf_counter() - start >= 0.05
+
+    assert client.put("/admin/faults", json={}).json() == {}
+    assert client.get("/buildingInsights:findClosest").status_code == 200
+
+
+def test_profiles_file_is_shared(tmp_path):
+    path = tmp_path / "faults.json"
+    initial = {"/dataLayers:get": FaultProfile(error_rates={"INTERNAL": 1})}
+    first = FaultInjector(initial, path=path)
+    # Later injectors of the file keep its profiles over their own.
+    second = FaultInjector({}, path=path)
+    assert second.profiles == initial
+
+    updated = {"/": FaultProfile(latency=LatencyProfile(seconds=0.01))}
+    second.profiles = updated
+    assert first.profiles == updated
+    assert FaultInjector(path=path).profiles == updated
+
+    path.write_text("not json")
+    assert first.profiles == updated
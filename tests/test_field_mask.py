@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core.errors import InvalidArgumentError
+from solar_api_mock.core.field_mask import FieldMask, parse_field_mask
+from solar_api_mock.core.properties import BuildingInsightsProperties
+from solar_api_mock.web.app import app
+
+client = TestClient(app)
+PARAMS = {"lat_lon.latitude": 37.4449739, "lat_lon.longitude": -122.1391466}
+
+
+def test_parse_merges_dotted_and_parenthesized_paths():
+    mask = FieldMask.parse(
+        "center, solarPotential(maxArrayPanelsCount,buildingStats.areaMeters2),"
+        "solarPotential.buildingStats.groundAreaMeters2"
+    )
+    assert mask.selects("center.latitude")
+    assert mask.selects("solarPotential.buildingStats")
+    assert not mask.selects("solarPotential.solarPanels")
+    assert not mask.selects("name")
+    content = {
+        "name": "buildings/x",
+        "solarPotential": {
+            "maxArrayPanelsCount": 4,
+            "solarPanels": [{"segmentIndex": 0}],
+            "buildingStats": {"areaMeters2": 1.0, "sunshineQuantiles": [1.0]},
+        },
+    }
+    assert mask.apply(content) == {
+        "solarPotential": {
+            "maxArrayPanelsCount": 4,
+            "buildingStats": {"areaMeters2": 1.0},
+        }
+    }
+    assert FieldMask.parse("*") is None
+    assert FieldMask.parse("solarPotential(*)").selects("solarPotential.solarPanels")
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["center(", "center)", "center,,name", "solarPotential.", "nope", "name(foo)"],
+)
+def test_invalid_masks_are_rejected(text):
+    with pytest.raises(InvalidArgumentError):
+        parse_field_mask(text, BuildingInsightsProperties)
+
+
+def test_masks_apply_to_list_items():
+    mask = parse_field_mask(
+        "solarPotential.solarPanels.center", BuildingInsightsProperties
+    )
+    content = {"solarPotential": {"solarPanels": [{"center": 1, "segmentIndex": 0}]}}
+    assert mask.apply(content) == {"solarPotential": {"solarPanels": [{"center": 1}]}}
+
+
+def test_routes_honor_field_masks():
+    full = client.get("/buildingInsights:findClosest", params=PARAMS)
+    by_param = client.get(
+        "/buildingInsights:findClosest", params={**PARAMS, "fields": "name,center"}
+    )
+    by_header = client.get(
+        "/buildingInsights:findClosest",
+        params=PARAMS,
+        headers={"X-Goog-FieldMask": "name,center"},
+    )
+    expected = {"name": full.json()["name"], "center": full.json()["center"]}
+    assert by_param.json() == by_header.json() == expected
+    tags = {r.headers["etag"] for r in (full, by_param, by_header)}
+    assert len(tags) == 3
+    assert "X-Goog-FieldMask" in by_header.headers["vary"]
+
+    response = client.get(
+        "/buildingInsights:findClosest", params={**PARAMS, "fields": "nope"}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["status"] == "INVALID_ARGUMENT"
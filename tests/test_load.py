@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import pytest
+
+from solar_api_mock.load.histogram import LatencyHistogram
+from solar_api_mock.load.replay import read_log, run, uniform_workload
+from solar_api_mock.load.workload import WorkloadConfig, WorkloadGenerator, main
+from solar_api_mock.web.app import app
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram(precision=0.01)
+    for i in range(1, 10_001):
+        histogram.record(i / 1000)
+    assert histogram.total == 10_000
+    assert histogram.percentile(50) == pytest.approx(5.0, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(9.9, rel=0.01)
+    assert histogram.percentile(99.9) == pytest.approx(9.99, rel=0.01)
+    assert histogram.percentile(100) == 10.0
+    assert sum(count for _, count in histogram.buckets()) == 10_000
+
+
+def test_histogram_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(0.001)
+    second.record(0.1)
+    first.merge(second)
+    assert first.total == 2
+    assert (first.min, first.max) == (0.001, 0.1)
+
+
+def test_open_loop_run_against_app():
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://mock"
+        ) as client:
+            requests = [{"path": "/"}, {"path": "/missing"}] * 10
+            return await run(client, requests, rate=1_000)
+
+    report = asyncio.run(go())
+    assert report.sent == report.completed == 20
+    assert dict(report.statuses) == {200: 10, 404: 10}
+    assert report.to_dict()["error_rate"] == 0.5
+    assert set(report.to_dict()["latency"]["percentiles"]) == {
+        "p50",
+        "p90",
+        "p99",
+        "p999",
+    }
+
+
+def test_failed_requests_count_towards_latency():
+    async def time_out(request):
+        await asyncio.sleep(0.02)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async def go():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(time_out), base_url="http://mock"
+        ) as client:
+            return await run(client, [{"path": "/"}] * 5, rate=1_000)
+
+    report = asyncio.run(go())
+    assert dict(report.errors) == {"ReadTimeout": 5}
+    assert report.latency.total == report.service_time.total == 5
+    assert report.service_time.min >= 0.02
+
+
+def test_open_loop_run_stops_after_duration():
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://mock"
+        ) as client:
+            workload = uniform_workload(37.4, -122.2, 37.5, -122.1)
+            return await run(client, workload, rate=200, duration=0.1)
+
+    assert asyncio.run(go()).sent == 20
+
+
+def test_workload_is_seeded_and_replayable(tmp_path):
+    main([str(tmp_path / "a.jsonl"), "-n", "2000", "--seed", "3"])
+    main([str(tmp_path / "b.jsonl"), "-n", "2000", "--seed", "3"])
+    assert (tmp_path / "a.jsonl").read_bytes() == (tmp_path / "b.jsonl").read_bytes()
+
+    requests = list(read_log(tmp_path / "a.jsonl"))
+    assert len(requests) == 2000
+    paths = {request["path"] for request in requests}
+    assert paths == {"/buildingInsights:findClosest", "/dataLayers:get"}
+    for request in requests:
+        assert request["method"] == "GET"
+        if request["path"] == "/dataLayers:get":
+            assert request["params"]["radius_meter"] in (25, 50, 100, 175)
+
+
+def test_workload_skew_and_mix():
+    def hottest_share(zipf_exponent):
+        config = WorkloadConfig(
+            addresses=1_000, zipf_exponent=zipf_exponent, find_closest_fraction=1
+        )
+        lines = WorkloadGenerator(config).batch(10_000)
+        return max(lines.count(line) for line in set(lines)) / len(lines)
+
+    assert hottest_share(0) < 0.01
+    assert hottest_share(1.5) > 0.2
+
+    config = WorkloadConfig(find_closest_fraction=0, view={"FULL_LAYERS": 1})
+    assert all(
+        '"view":"FULL_LAYERS"' in line for line in WorkloadGenerator(config).batch(100)
+    )
+
+
+def test_workload_clusters_around_cities():
+    config = WorkloadConfig(
+        cluster_fraction=1,
+        cities=[{"latitude": 10.0, "longitude": 20.0, "spread_meters": 1_000}],
+        find_closest_fraction=1,
+    )
+    generator = WorkloadGenerator(config)
+    assert abs(generator.latitude - 10.0).max() < 0.1
+    assert abs(generator.longitude - 20.0).max() < 0.1
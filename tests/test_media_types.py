@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core.serialization import JSON, MSGPACK, PROTOBUF
+from solar_api_mock.rpc import wire
+from solar_api_mock.web import etag
+from solar_api_mock.web.app import app
+from solar_api_mock.web.media_types import MEDIA_TYPES, negotiate_media_type
+
+client = TestClient(app)
+
+BUILDING = {"lat_lon.latitude": 37.4449739, "lat_lon.longitude": -122.1391466}
+
+
+def test_negotiate_media_type_honours_weights():
+    assert negotiate_media_type(None) == JSON
+    assert negotiate_media_type("*/*") == JSON
+    assert negotiate_media_type(PROTOBUF) == PROTOBUF
+    assert negotiate_media_type(f"{JSON};q=0.5, {PROTOBUF}") == PROTOBUF
+    assert negotiate_media_type(f"{JSON}, {PROTOBUF};q=0.5") == JSON
+    assert negotiate_media_type(f"{JSON};q=0, application/*") == PROTOBUF
+    assert negotiate_media_type("text/html") == JSON
+
+
+def test_protobuf_responses_encode_the_json_content():
+    json = client.get("/buildingInsights:findClosest", params=BUILDING)
+    response = client.get(
+        "/buildingInsights:findClosest", params=BUILDING, headers={"Accept": PROTOBUF}
+    )
+    assert response.headers["content-type"] == PROTOBUF
+    assert response.headers["vary"] == etag.VARY
+    assert response.content == wire.encode("BuildingInsights", json.json())
+    assert response.headers["etag"] != json.headers["etag"]
+
+    layers = client.get("/dataLayers:get", headers={"Accept": PROTOBUF})
+    assert (
+        wire.decode("DataLayers", layers.content)
+        == client.get("/dataLayers:get").json()
+    )
+
+
+def test_msgpack_responses_decode_to_the_json_content():
+    msgpack = pytest.importorskip("msgpack")
+    assert MSGPACK in MEDIA_TYPES
+    json = client.get("/buildingInsights:findClosest", params=BUILDING)
+    response = client.get(
+        "/buildingInsights:findClosest", params=BUILDING, headers={"Accept": MSGPACK}
+    )
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == json.json()
+
+    masked = client.get(
+        "/buildingInsights:findClosest",
+        params={**BUILDING, "fields": "solarPotential.solarPanels"},
+        headers={"Accept": MSGPACK},
+    )
+    assert msgpack.unpackb(masked.content) == {
+        "solarPotential": {"solarPanels": json.json()["solarPotential"]["solarPanels"]}
+    }
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core import metrics
+from solar_api_mock.web.app import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram(
+        "h_seconds", "Test.", ("stage",), buckets=(0.001, 0.01)
+    )
+    for value in (0.0005, 0.001, 0.005, 1.0):
+        histogram.observe(value, "build")
+
+    assert histogram.count("build") == 4
+    assert histogram.render() == [
+        "# HELP h_seconds Test.",
+        "# TYPE h_seconds histogram",
+        'h_seconds_bucket{stage="build",le="0.001"} 2',
+        'h_seconds_bucket{stage="build",le="0.01"} 3',
+        'h_seconds_bucket{stage="build",le="+Inf"} 4',
+        'h_seconds_sum{stage="build"} 1.0065',
+        'h_seconds_count{stage="build"} 4',
+    ]
+
+
+def test_metrics_route_reports_stages():
+    client = TestClient(app)
+    before = {
+        stage: metrics.STAGE_SECONDS.count("DataLayers", stage)
+        for stage in (
+            "routing",
+            "build",
+            "serialization",
+        )
+    }
+    response = client.get(
+        "/dataLayers:get",
+        params={"location.latitude": 37.45, "location.longitude": -122.1},
+    )
+    assert response.status_code == 200
+    for stage, count in before.items():
+        assert metrics.STAGE_SECONDS.count("DataLayers", stage) == count + 1
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert (
+        'solar_api_mock_stage_seconds_bucket{schema="DataLayers",stage="build",le="1e-05"}'
+        in response.text
+    )
+    assert (
+        'solar_api_mock_request_seconds_count{route="/dataLayers:get",status="200"}'
+        in response.text
+    )
+    assert 'solar_api_mock_thread_pool_tasks{state="queued"} 0' in response.text
+
+
+def test_thread_pool_gauge_measures_to_thread():
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait()
+
+    async def go():
+        metrics.install_thread_pool()
+        task = asyncio.create_task(asyncio.to_thread(blocked))
+        await asyncio.to_thread(started.wait)
+        usage = metrics.THREAD_POOL_TASKS.collect()
+        release.set()
+        await task
+        return usage
+
+    assert asyncio.run(go())[("busy",)] == 1
+    assert metrics.THREAD_POOL_TASKS.collect()[("busy",)] == 0
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from solar_api_mock.web import profiling
+from solar_api_mock.web.app import app
+from solar_api_mock.web.profiling import ProfileStore, ProfilingMiddleware
+
+
+def test_profiles_only_flagged_requests(tmp_path, monkeypatch):
+    store = ProfileStore(capacity=1, directory=tmp_path)
+    monkeypatch.setattr(profiling, "profiles", store)
+    client = TestClient(ProfilingMiddleware(app, store=store))
+    params = {"location.latitude": 37.45, "location.longitude": -122.1}
+
+    response = client.get("/dataLayers:get", params=params)
+    assert profiling.PROFILE_ID_HEADER not in response.headers
+    assert not store.profiles
+
+    response = client.get(
+        "/dataLayers:get",
+        params=params,
+        headers={"X-Debug-Profile": "1", "X-Request-Id": "slow/1"},
+    )
+    assert response.status_code == 200
+    assert response.headers[profiling.PROFILE_ID_HEADER] == "slow_1"
+    profile = store.get("slow_1")
+    assert (tmp_path / "slow_1.collapsed").read_text() == profile
+    lines = profile.splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any("DataLayersBuilder._set_properties" in line for line in lines)
+
+    client.get("/", headers={"X-Debug-Profile": "1"})
+    assert store.get("slow_1") is None
+
+
+def test_profiles_route_only_when_enabled(tmp_path):
+    assert "/admin/profiles/{request_id}" not in {route.path for route in app.routes}
+    script = (
+        "from fastapi.testclient import TestClient\n"
+        "from solar_api_mock.web.app import app\n"
+        "client = TestClient(app)\n"
+        "headers = {'X-Debug-Profile': '1', 'X-Request-Id': 'root'}\n"
+        "assert client.get('/', headers=headers).status_code == 200\n"
+        "assert client.get('/admin/profiles/root').text\n"
+        "assert client.get('/admin/profiles/other').status_code == 404\n"
+    )
+    env = {
+        **os.environ,
+        "SOLAR_API_MOCK_PROFILING_ENABLED": "1",
+        "SOLAR_API_MOCK_PROFILING_DIR": str(tmp_path),
+    }
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+    assert (tmp_path / "root.collapsed").exists()
@@ -0,0 +1,132 @@
+import multiprocessing
+
+import pytest
+from fastapi.testclient import TestClient
+
+from solar_api_mock.core import metrics, quota
+from solar_api_mock.core.errors import ResourceExhaustedError
+from solar_api_mock.core.quota import BucketStore, RateLimiter
+from solar_api_mock.core.settings import RateLimit
+from solar_api_mock.web.app import app
+
+client = TestClient(app)
+
+ROUTE = "/buildingInsights:findClosest"
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _accepted(limiter: RateLimiter, key: str, calls: int, route: str = ROUTE) -> int:
+    accepted = 0
+    for _ in range(calls):
+        try:
+            limiter.check(key, route)
+            accepted += 1
+        except ResourceExhaustedError:
+            pass
+    return accepted
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = Clock()
+    limiter = RateLimiter(
+        {ROUTE: RateLimit(queries_per_second=2, burst=5)}, clock=clock
+    )
+    assert _accepted(limiter, "a", 10) == 5
+    clock.now += 1
+    assert _accepted(limiter, "a", 10) == 2
+    # Each key and route has its own bucket.
+    assert _accepted(limiter, "b", 10) == 5
+    assert _accepted(limiter, "a", 10, "/dataLayers:get") == 10
+
+
+def test_daily_quota_resets_at_midnight_pacific():
+    # 23:00 in Mountain View.
+    clock = Clock(1_700_000_000.0 - 1_700_000_000.0 % 86400 + 7 * 3600)
+    limiter = RateLimiter({ROUTE: RateLimit(queries_per_day=3)}, clock=clock)
+    assert _accepted(limiter, "a", 5) == 3
+    with pytest.raises(ResourceExhaustedError, match="Requests per day"):
+        limiter.check("a", ROUTE)
+    clock.now += 3600
+    assert _accepted(limiter, "a", 5) == 3
+
+
+def test_key_limits_override_route_limits():
+    limiter = RateLimiter(
+        {ROUTE: RateLimit(queries_per_day=1)},
+        {"premium": {ROUTE: RateLimit(queries_per_day=4)}},
+        clock=Clock(),
+    )
+    assert _accepted(limiter, "basic", 5) == 1
+    assert _accepted(limiter, "premium", 5) == 4
+    assert _accepted(limiter, None, 5) == 1
+
+
+def test_full_table_evicts_the_stalest_bucket(caplog):
+    clock = Clock()
+    limiter = RateLimiter(
+        {ROUTE: RateLimit(queries_per_day=1)}, store=BucketStore(slots=4), clock=clock
+    )
+    for key in "abcd":
+        assert _accepted(limiter, key, 2) == 1
+        clock.now += 1
+    before = metrics.RATE_LIMIT_EVICTIONS.values.get((ROUTE,), 0)
+    assert _accepted(limiter, "b", 1) == 0
+    assert _accepted(limiter, "e", 1) == 1
+    # "a" was evicted: its quota starts over.
+    assert _accepted(limiter, "a", 2) == 1
+    assert limiter.store.evictions == 2
+    assert metrics.RATE_LIMIT_EVICTIONS.values.get((ROUTE,), 0) == before + 2
+    assert "token buckets are full" in caplog.text
+
+
+def test_table_is_sized_from_limits():
+    limit = RateLimit(queries_per_day=1)
+    assert quota.table_slots({ROUTE: limit}, {}) == quota.SLOTS
+    routes = {f"/route{i}": limit for i in range(1000)}
+    keys = {f"key{i}": {ROUTE: limit} for i in range(10)}
+    assert quota.table_slots(routes, keys) == 65536
+
+
+def _take(path, calls, results):
+    limiter = RateLimiter(
+        {ROUTE: RateLimit(queries_per_second=0.001, burst=100)}, store=BucketStore(path)
+    )
+    results.put(_accepted(limiter, "shared", calls))
+
+
+def test_file_store_limits_hold_across_processes(tmp_path):
+    path = tmp_path / "buckets"
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_take, args=(path, 60, results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sum(results.get() for _ in workers) == 100
+
+
+def test_routes_answer_resource_exhausted(monkeypatch):
+    monkeypatch.setattr(
+        quota, "limiter", RateLimiter({ROUTE: RateLimit(queries_per_day=1)})
+    )
+    first = client.get(ROUTE, params={"key": "k1"})
+    assert first.status_code == 200
+    rejected = client.get(ROUTE, params={"key": "k1"})
+    assert rejected.status_code == 429
+    assert rejected.json()["error"]["status"] == "RESOURCE_EXHAUSTED"
+    assert "api_key:k1" in rejected.json()["error"]["message"]
+
+    other = client.get(ROUTE, headers={"X-Goog-Api-Key": "k2"})
+    assert other.status_code == 200
+    # The key does not change the response, nor its ETag.
+    assert other.headers["etag"] == first.headers["etag"]
@@ -0,0 +1,143 @@
+import asyncio
+import struct
+from pathlib import Path
+
+import pytest
+
+from solar_api_mock.core import geotiff
+from solar_api_mock.core.corpus_schema import _geotiff_url
+from solar_api_mock.core.errors import InvalidArgumentError, NotFoundError
+from solar_api_mock.core.schema import BuildingInsightsBuilder
+from solar_api_mock.rpc import messages, wire
+from solar_api_mock.rpc.service import CHUNK_BYTES, SolarService
+
+LOCATION = {"latitude": 37.4449739, "longitude": -122.1391466}
+
+
+def test_proto_file_is_up_to_date():
+    proto = Path(messages.__file__).with_name("solar.proto")
+    assert proto.read_text() == messages.proto_source()
+
+
+def test_encoding_matches_the_protobuf_wire_format():
+    assert wire.encode("google.type.LatLng", {"latitude": 1.0, "longitude": -2.0}) == (
+        b"\x09" + struct.pack("<d", 1.0) + b"\x11" + struct.pack("<d", -2.0)
+    )
+    # Negative int32 take ten bytes; repeated floats are packed.
+    assert wire.encode("FinancialAnalysis", {"panelConfigIndex": -1}) == (
+        b"\x50" + b"\xff" * 9 + b"\x01"
+    )
+    assert wire.encode("SizeAndSunshineStats", {"sunshineQuantiles": [1.0, 2.0]}) == (
+        b"\x12\x08" + struct.pack("<2f", 1.0, 2.0)
+    )
+
+
+def test_building_round_trips():
+    content = (
+        BuildingInsightsBuilder()
+        .construct_model()
+        .properties.model_dump(mode="json", by_alias=True, exclude_none=True)
+    )
+    decoded = wire.decode("BuildingInsights", wire.encode("BuildingInsights", content))
+    assert decoded["name"] == content["name"]
+    assert decoded["center"] == content["center"]
+    assert decoded["imageryQuality"] == "HIGH"
+    potential, expected = decoded["solarPotential"], content["solarPotential"]
+    assert potential["financialAnalyses"][0]["monthlyBill"] == {
+        "currencyCode": "USD",
+        "units": "20",
+    }
+    assert potential["financialAnalyses"][0]["panelConfigIndex"] == -1
+    assert potential["solarPanels"][0]["orientation"] == "LANDSCAPE"
+    assert potential["buildingStats"]["sunshineQuantiles"] == pytest.approx(
+        expected["buildingStats"]["sunshineQuantiles"]
+    )
+
+
+def test_decode_rejects_malformed_messages():
+    with pytest.raises(ValueError):
+        wire.decode("GetGeoTiffRequest", b"\x0a\x05ab")
+    assert wire.decode("GetGeoTiffRequest", b"\x10\x01\x0a\x02ab") == {"id": "ab"}
+
+
+def _call(method, request: dict, metadata: dict = None) -> dict:
+    name = messages.METHODS[method].request
+    behavior = getattr(SolarService(), messages.snake_case(method))
+    data = wire.decode(name, wire.encode(name, request))
+    return asyncio.run(behavior(data, metadata or {}))
+
+
+def test_service_serves_the_builders():
+    response = wire.decode(
+        "BuildingInsights",
+        _call(
+            "FindClosestBuildingInsights",
+            {"location": LOCATION},
+            {"x-goog-fieldmask": "name,solarPotential.maxArrayPanelsCount"},
+        ),
+    )
+    assert response == {
+        "name": "buildings/ChIJh0CMPQW7j4ARLrRiVvmg6Vs",
+        "solarPotential": {"maxArrayPanelsCount": 987},
+    }
+    response = wire.decode("DataLayers", _call("GetDataLayers", {"location": LOCATION}))
+    assert len(response["hourlyShadeUrls"]) == 12
+    with pytest.raises(InvalidArgumentError):
+        _call("FindClosestBuildingInsights", {})
+
+
+def test_geotiff_is_streamed_in_chunks():
+    geotiff_id = _geotiff_url("place", "MONTHLY_FLUX", "HIGH").partition("id=")[2]
+
+    async def collect():
+        behavior = SolarService().get_geo_tiff({"id": geotiff_id}, {})
+        return [wire.decode("google.api.HttpBody", chunk) async for chunk in behavior]
+
+    chunks = asyncio.run(collect())
+    assert chunks[0]["contentType"] == "image/tiff"
+    assert all("contentType" not in chunk for chunk in chunks[1:])
+    assert all(len(chunk["data"]) == CHUNK_BYTES for chunk in chunks[:-1])
+    data = b"".join(chunk["data"] for chunk in chunks)
+    assert data == geotiff.render_geotiff(geotiff_id, 37.4449739, -122.13914659999998)
+
+
+def _tiff_tags(data: bytes) -> dict[int, tuple]:
+    assert data[:4] == b"II*\0"
+    (offset,) = struct.unpack_from("<I", data, 4)
+    (count,) = struct.unpack_from("<H", data, offset)
+    sizes = {3: ("H", 2), 4: ("I", 4), 12: ("d", 8)}
+    tags = {}
+    for i in range(count):
+        tag, kind, n, value = struct.unpack_from("<HHI4s", data, offset + 2 + 12 * i)
+        code, size = sizes[kind]
+        if n * size > 4:
+            (pointer,) = struct.unpack("<I", value)
+            tags[tag] = struct.unpack_from(f"<{n}{code}", data, pointer)
+        else:
+            tags[tag] = struct.unpack_from(f"<{n}{code}", value)
+    return tags
+
+
+def test_geotiffs_are_deterministic_and_well_formed():
+    geotiff_id = _geotiff_url("place", "DSM", "HIGH").partition("id=")[2]
+    data = geotiff.render_geotiff(geotiff_id, 37.45, -122.1)
+    assert data == geotiff.render_geotiff(geotiff_id, 37.45, -122.1)
+    tags = _tiff_tags(data)
+    assert list(tags) == sorted(tags)
+    width, height = tags[256][0], tags[257][0]
+    assert (width, height) == (1000, 1000)
+    (offset,), (size,) = tags[273], tags[279]
+    assert offset + size == len(data) == offset + width * height * 4
+    tiepoint = tags[33922]
+    assert tiepoint[3] < -122.1 < tiepoint[3] + width * tags[33550][0]
+
+    with pytest.raises(InvalidArgumentError):
+        geotiff.parse_geotiff_id("bm90IGFuIGlk")
+
+
+def test_server_registers_the_service():
+    grpc = pytest.importorskip("grpc")
+    from solar_api_mock.rpc.server import generic_handler
+
+    assert generic_handler().service_name() == "google.maps.solar.v1.Solar"
+    assert grpc.StatusCode[NotFoundError.status] == grpc.StatusCode.NOT_FOUND
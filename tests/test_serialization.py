@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from solar_api_mock.core.dataset import Corpus
+from solar_api_mock.core.main import build_dataset
+from solar_api_mock.core.corpus_schema import (
+    DATA_LAYER_VIEWS,
+    CorpusBuildingInsightsBuilder,
+    CorpusDataLayersBuilder,
+)
+from solar_api_mock.core.schema import BuildingInsightsBuilder, DataLayersBuilder
+from solar_api_mock.core.serialization import (
+    JSON,
+    OrjsonSerializer,
+    Serializer,
+    StdlibSerializer,
+    dumps_model,
+    get_media_serializer,
+    get_serializer,
+)
+from solar_api_mock.core.settings import get_settings
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    path = tmp_path_factory.mktemp("corpus") / "buildings.corpus"
+    build_dataset(path, 300, 37.40, -122.20, 37.50, -122.05, seed=11, workers=1)
+    corpus = Corpus(path)
+    models = [BuildingInsightsBuilder(), DataLayersBuilder()]
+    for row in range(0, len(corpus), 7):
+        models.append(CorpusBuildingInsightsBuilder(corpus, row))
+        models += [CorpusDataLayersBuilder(corpus, row, v) for v in DATA_LAYER_VIEWS]
+    return [builder.construct_model().properties for builder in models]
+
+
+def test_stdlib_matches_pydantic(models):
+    for model in models:
+        assert (
+            dumps_model(model, StdlibSerializer())
+            == model.model_dump_json(exclude_none=True).encode()
+        )
+
+
+def test_orjson_matches_stdlib(models):
+    pytest.importorskip("orjson")
+    for model in models:
+        assert dumps_model(model, OrjsonSerializer()) == dumps_model(
+            model, StdlibSerializer()
+        )
+
+    content = {"name": "Zürich ☀", "values": [1, -2.5, 37.4449739, None, True]}
+    assert OrjsonSerializer().dumps(content) == StdlibSerializer().dumps(content)
+    assert json.loads(OrjsonSerializer().dumps(content)) == content
+
+
+def test_serializer_follows_settings(monkeypatch):
+    with pytest.raises(TypeError):
+        Serializer()
+    pytest.importorskip("orjson")
+    try:
+        for name, serializer in (
+            ("stdlib", StdlibSerializer),
+            ("orjson", OrjsonSerializer),
+        ):
+            monkeypatch.setenv("SOLAR_API_MOCK_JSON_SERIALIZER", name)
+            get_settings.cache_clear()
+            assert isinstance(get_serializer(), serializer)
+            assert isinstance(get_media_serializer(JSON), serializer)
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+
+from benchmarks.startup import time_fresh
+from solar_api_mock.core.settings import Settings, get_settings
+from solar_api_mock.web import openapi
+
+
+def test_fixture_app_does_not_import_numpy():
+    script = (
+        "import sys\n"
+        "import solar_api_mock.web.app\n"
+        "from solar_api_mock.core import properties\n"
+        "properties.LatLngProperties\n"
+        "assert 'numpy' not in sys.modules\n"
+        "assert 'solar_api_mock.core.dataset' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_empty_variables_count_as_unset():
+    settings = Settings.from_env(
+        {"SOLAR_API_MOCK_DATASET_PATH": "", "SOLAR_API_MOCK_FAULT_PROFILES": ""}
+    )
+    assert settings.dataset_path is None
+    assert settings.fault_profiles == {}
+    env = {**os.environ, "SOLAR_API_MOCK_DATASET_PATH": ""}
+    subprocess.run(
+        [sys.executable, "-c", "import solar_api_mock.web.app"], env=env, check=True
+    )
+
+
+def test_openapi_document_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOLAR_API_MOCK_OPENAPI_CACHE_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    try:
+        app = FastAPI()
+        app.get("/ping")(lambda: "pong")
+        app.openapi = openapi.cached_openapi(app)
+        document = app.openapi()
+        assert "/ping" in document["paths"]
+        (path,) = tmp_path.iterdir()
+        assert path == openapi.cache_path()
+        assert json.loads(path.read_text()) == document
+
+        # A new process reads the cached document instead of generating it.
+        path.write_text(json.dumps({**document, "info": {"title": "cached"}}))
+        app = FastAPI()
+        app.openapi = openapi.cached_openapi(app)
+        assert app.openapi()["info"] == {"title": "cached"}
+    finally:
+        get_settings.cache_clear()
+
+
+def test_openapi_document_is_not_cached_by_default(monkeypatch):
+    monkeypatch.delenv("SOLAR_API_MOCK_OPENAPI_CACHE_DIR", raising=False)
+    get_settings.cache_clear()
+    try:
+        assert openapi.cache_path() is None
+        app = FastAPI()
+        app.openapi = openapi.cached_openapi(app)
+        assert app.openapi()["paths"] == {}
+    finally:
+        get_settings.cache_clear()
+
+
+def test_time_fresh_times_step_only():
+    assert 0 < time_fresh("import time; time.sleep(0.2)", "pass") < 0.1